@@ -1,3 +1,5 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta, timezone
 from typing import Annotated
 
@@ -9,12 +11,29 @@ from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.config import (ACCESS_TOKEN_EXPIRE_MINUTES, ALGORITHM,
+                        AUTH_TRUST_TOKEN_CLAIMS, BCRYPT_ROUNDS,
+                        PASSWORD_HASH_QUEUE_LIMIT, PASSWORD_HASH_WORKERS,
                         REFRESH_TOKEN_EXPIRE_DAYS, SECRET_KEY)
 from app.db_depends import get_async_db
 from app.models.users import User as UserModel
-
-# Контекст для хеширования с использованием bcrypt
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+from app.principals import principal_cache
+from app.schemas import User as UserSchema
+
+# Контекст для хеширования с использованием bcrypt. Хеши с другой стоимостью
+# считаются устаревшими и пересчитываются при входе (verify_and_update)
+pwd_context = CryptContext(
+    schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=BCRYPT_ROUNDS
+)
+
+# Отдельный пул потоков для bcrypt: хеширование занимает сотни миллисекунд
+# и не должно блокировать event loop. bcrypt освобождает GIL, поэтому потоки
+# выполняются параллельно
+password_hash_executor = ThreadPoolExecutor(
+    max_workers=PASSWORD_HASH_WORKERS, thread_name_prefix="password-hash"
+)
+# Число операций в пуле, включая ожидающие очереди, и число отказов (503)
+password_hash_pending = 0
+password_hash_rejected = 0
 
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="users/token")
@@ -34,6 +53,47 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
 
 
+async def _run_password_hash(func, *args):
+    """
+    Выполняет функцию bcrypt в пуле потоков. Если в пуле уже
+    PASSWORD_HASH_QUEUE_LIMIT операций, сразу возвращает 503, а не
+    наращивает очередь.
+    """
+    global password_hash_pending, password_hash_rejected
+    if password_hash_pending >= PASSWORD_HASH_QUEUE_LIMIT:
+        password_hash_rejected += 1
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Authentication service is busy, try again later",
+            headers={"Retry-After": "1"},
+        )
+    password_hash_pending += 1
+    try:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(password_hash_executor, func, *args)
+    finally:
+        password_hash_pending -= 1
+
+
+async def hash_password_async(password: str) -> str:
+    """
+    Хеширует пароль в пуле потоков, не блокируя event loop.
+    """
+    return await _run_password_hash(pwd_context.hash, password)
+
+
+async def verify_password_async(
+    plain_password: str, hashed_password: str
+) -> tuple[bool, str | None]:
+    """
+    Проверяет пароль в пуле потоков. Возвращает результат проверки и новый
+    хеш, если сохранённый создан с устаревшей стоимостью bcrypt (иначе None).
+    """
+    return await _run_password_hash(
+        pwd_context.verify_and_update, plain_password, hashed_password
+    )
+
+
 def create_access_token(data: dict):
     """
     Создаёт JWT с payload (sub, role, id, exp).
@@ -58,7 +118,10 @@ async def get_current_user(
     token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_async_db)
 ):
     """
-    Проверяет JWT и возвращает пользователя из базы.
+    Проверяет JWT и возвращает пользователя (id, email, роль).
+    Пользователь берётся из кеша principal_cache, при промахе — из базы.
+    При AUTH_TRUST_TOKEN_CLAIMS access-токен с ролью и id принимается без
+    обращения к базе и кешу.
     """
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
@@ -78,17 +141,35 @@ async def get_current_user(
         )
     except jwt.PyJWTError:
         raise credentials_exception
+
+    # Подписанные claims access-токена без обращения к базе
+    if (
+        AUTH_TRUST_TOKEN_CLAIMS
+        and payload.get("token_type") == "access"
+        and isinstance(payload.get("id"), int)
+        and payload.get("role") in ("buyer", "seller", "admin")
+    ):
+        return UserSchema.model_construct(
+            id=payload["id"], email=email, is_active=True, role=payload["role"]
+        )
+
+    user = principal_cache.get(email)
+    if user is not None:
+        return user
+
     result = await db.scalars(
         select(UserModel).where(UserModel.email == email, UserModel.is_active == True)
     )
     user = result.first()
     if user is None:
         raise credentials_exception
+    user = UserSchema.model_validate(user)
+    principal_cache.set(user)
     return user
 
 
 async def get_current_seller(
-    current_user: Annotated[UserModel, Depends(get_current_user)],
+    current_user: Annotated[UserSchema, Depends(get_current_user)],
 ):
     """
     Проверяет, что пользователь имеет роль 'seller'.
@@ -102,7 +183,7 @@ async def get_current_seller(
 
 
 async def get_current_admin(
-    current_user: Annotated[UserModel, Depends(get_current_user)],
+    current_user: Annotated[UserSchema, Depends(get_current_user)],
 ):
     """
     Проверяет, что пользователь имеет роль 'admin'.
@@ -113,3 +194,17 @@ async def get_current_admin(
             detail="Only admins can perform this action",
         )
     return current_user
+
+
+async def get_current_buyer(
+    current_user: Annotated[UserSchema, Depends(get_current_user)],
+):
+    """
+    Проверяет, что пользователь имеет роль 'buyer'.
+    """
+    if current_user.role != "buyer":
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only buyers can perform this action",
+        )
+    return current_user
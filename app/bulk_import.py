@@ -0,0 +1,150 @@
+# --------------- Массовая загрузка товаров -------------------------
+import csv
+import io
+from collections import Counter
+from typing import Any
+
+from pydantic import ValidationError
+from sqlalchemy import insert, select
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import BULK_INSERT_CHUNK_SIZE
+from app.models import Category as CategoryModel
+from app.models import Product as ProductModel
+from app.schemas import ProductCreate
+
+
+def _category_error(index: int) -> dict:
+    """
+    Ошибка строки с отсутствующей или неактивной категорией.
+    """
+    return {
+        "row": index,
+        "errors": [
+            {
+                "loc": ["category_id"],
+                "msg": "Category not found or inactive",
+                "type": "category_not_found",
+            }
+        ],
+    }
+
+
+async def _lock_active_categories(db: AsyncSession, category_ids: set[int]) -> set[int]:
+    """
+    Возвращает активные категории из category_ids и блокирует их строки
+    (FOR SHARE в PostgreSQL) в порядке id до конца текущей транзакции,
+    чтобы параллельное удаление категории не оставило в ней активные товары.
+    """
+    if not category_ids:
+        return set()
+    result = await db.scalars(
+        select(CategoryModel.id)
+        .where(CategoryModel.id.in_(category_ids), CategoryModel.is_active == True)
+        .order_by(CategoryModel.id)
+        .with_for_update(read=True)
+    )
+    return set(result.all())
+
+
+def parse_csv(content: bytes) -> list[dict[str, Any]]:
+    """
+    Читает CSV с заголовком в список словарей. Пустые ячейки считаются
+    отсутствующими значениями.
+    """
+    reader = csv.DictReader(io.StringIO(content.decode("utf-8-sig")))
+    return [
+        {key: value for key, value in row.items() if key and value != ""}
+        for row in reader
+    ]
+
+
+async def import_products(
+    db: AsyncSession,
+    rows: list[Any],
+    seller_id: int,
+    chunk_size: int = BULK_INSERT_CHUNK_SIZE,
+) -> dict:
+    """
+    Проверяет и вставляет пачку товаров продавца.
+
+    Каждая строка валидируется по ProductCreate, затем товары вставляются
+    многострочными INSERT ... RETURNING, каждая порция — в своей транзакции.
+    Категории порции проверяются одним запросом в той же транзакции перед
+    вставкой, поэтому строки, категорию которых удалили во время загрузки,
+    попадают в ошибки category_not_found. Ошибки возвращаются построчно
+    (row — индекс строки во входных данных, начиная с 0), корректные строки
+    вставляются независимо от ошибочных.
+    """
+    errors: list[dict] = []
+    valid: list[tuple[int, ProductCreate]] = []
+    for index, row in enumerate(rows):
+        try:
+            valid.append((index, ProductCreate.model_validate(row)))
+        except ValidationError as exc:
+            errors.append(
+                {
+                    "row": index,
+                    "errors": [
+                        {
+                            "loc": list(error["loc"]),
+                            "msg": error["msg"],
+                            "type": error["type"],
+                        }
+                        for error in exc.errors()
+                    ],
+                }
+            )
+
+    created: list[dict] = []
+    category_counts: Counter[int] = Counter()
+    stmt = insert(ProductModel).returning(ProductModel.id, sort_by_parameter_order=True)
+    for start in range(0, len(valid), chunk_size):
+        rows_chunk = valid[start : start + chunk_size]
+        try:
+            # Блокировка категорий действует до commit порции, поэтому
+            # проверяется в каждой транзакции заново
+            active_categories = await _lock_active_categories(
+                db, {product.category_id for _, product in rows_chunk}
+            )
+            chunk, chunk_errors = [], []
+            for index, product in rows_chunk:
+                if product.category_id in active_categories:
+                    chunk.append(
+                        (index, {**product.model_dump(), "seller_id": seller_id})
+                    )
+                else:
+                    chunk_errors.append(_category_error(index))
+            ids = []
+            if chunk:
+                result = await db.scalars(stmt, [values for _, values in chunk])
+                ids = result.all()
+            await db.commit()
+        except SQLAlchemyError:
+            await db.rollback()
+            errors.extend(
+                {
+                    "row": index,
+                    "errors": [
+                        {
+                            "loc": [],
+                            "msg": "Database error while inserting the row batch",
+                            "type": "insert_failed",
+                        }
+                    ],
+                }
+                for index, _ in rows_chunk
+            )
+            continue
+        errors.extend(chunk_errors)
+        for (index, values), product_id in zip(chunk, ids):
+            created.append({"row": index, "id": product_id})
+            category_counts[values["category_id"]] += 1
+
+    errors.sort(key=lambda error: error["row"])
+    return {
+        "created": created,
+        "errors": errors,
+        "category_counts": category_counts,
+    }
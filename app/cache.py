@@ -0,0 +1,491 @@
+# --------------- Кеш ответов для чтения каталога -------------------------
+# Записи кеша — готовые JSON-тела ответов. Каждая запись помечается тегами
+# (например, "product:42" или "products:all"), и эндпоинты записи после commit
+# сбрасывают ровно те теги, которые затрагивает изменение.
+#
+# Чтение может разминуться с записью: эндпоинт прочитал базу, запись
+# зафиксировалась и сбросила теги, и только потом эндпоинт сохранил уже
+# устаревший ответ. Поэтому хранилище помнит время последнего сброса каждого
+# тега, эндпоинт берёт отметку generation() до чтения базы, и ответ не
+# сохраняется, если хотя бы один из его тегов сбросили после этой отметки.
+#
+# Хранилище memory своё у каждого воркера uvicorn: запись в одном воркере
+# сбрасывает только его кеш, и остальные воркеры отдают старый ответ до
+# истечения CACHE_TTL. При нескольких воркерах используйте sqlite (выбирается
+# по умолчанию, если WEB_CONCURRENCY больше 1).
+import asyncio
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from collections.abc import Iterable
+from typing import Any
+from urllib.parse import urlencode
+
+from fastapi import Response
+from pydantic import TypeAdapter
+
+from app.config import (CACHE_BACKEND, CACHE_MAX_BYTES, CACHE_MAX_ENTRIES,
+                        CACHE_SQLITE_PATH, CACHE_TTL,
+                        READ_AFTER_WRITE_PIN_SECONDS)
+
+# Теги, общие для всех эндпоинтов
+PRODUCTS_ALL = "products:all"  # состав и порядок списков товаров
+PRODUCTS_RATING = (
+    "products:rating"  # списки, отсортированные/отфильтрованные по рейтингу
+)
+CATEGORIES = "categories"  # список категорий
+
+
+def product_tag(product_id: int) -> str:
+    return f"product:{product_id}"
+
+
+def category_tag(category_id: int) -> str:
+    return f"category:{category_id}"
+
+
+def cache_key(endpoint: str, **params: Any) -> str:
+    """
+    Формирует ключ кеша из имени эндпоинта и параметров запроса.
+    """
+    params = {k: v for k, v in sorted(params.items()) if v is not None}
+    return f"{endpoint}?{urlencode(params)}"
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    """
+    Проверяет заголовок If-None-Match против ETag (слабое сравнение, RFC 9110).
+    """
+    if if_none_match is None:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    candidates = (tag.strip().removeprefix("W/") for tag in if_none_match.split(","))
+    return etag.removeprefix("W/") in candidates
+
+
+class CacheBackend(ABC):
+    """
+    Базовый класс хранилища кеша ответов.
+    """
+
+    # Сколько секунд хранится время сброса тега. Ответ, чтение которого
+    # началось раньше, в кеш не попадает: его нельзя проверить. Запас
+    # на отставание реплики, на которое сдвигаются её отметки
+    FILL_WINDOW = 60.0 + READ_AFTER_WRITE_PIN_SECONDS
+
+    def __init__(self, ttl: float = CACHE_TTL):
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+
+    def generation(self) -> float:
+        """
+        Отметка, которую эндпоинт берёт до чтения базы и передаёт
+        в store_response.
+        """
+        return time.monotonic()
+
+    @abstractmethod
+    async def get(self, key: str) -> bytes | None:
+        """
+        Возвращает тело ответа по ключу или None, если записи нет или она устарела.
+        """
+
+    @abstractmethod
+    async def set(
+        self,
+        key: str,
+        value: bytes,
+        tags: Iterable[str],
+        generation: float | None = None,
+    ) -> None:
+        """
+        Сохраняет тело ответа с набором тегов для последующей инвалидации.
+        Если передана отметка generation, запись пропускается, когда хотя бы
+        один из тегов сбросили после неё.
+        """
+
+    @abstractmethod
+    async def invalidate(self, *tags: str) -> None:
+        """
+        Удаляет все записи, помеченные хотя бы одним из тегов.
+        """
+
+    @abstractmethod
+    async def clear(self) -> None:
+        """
+        Полностью очищает кеш.
+        """
+
+    async def cached_response(self, key: str) -> Response | None:
+        """
+        Возвращает готовый ответ из кеша или None.
+        """
+        value = await self.get(key)
+        if value is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        etag, _, body = value.partition(b"\n")
+        headers = {"X-Cache": "HIT"}
+        if etag:
+            headers["ETag"] = etag.decode()
+        return Response(content=body, media_type="application/json", headers=headers)
+
+    async def store_response(
+        self,
+        key: str,
+        adapter: TypeAdapter,
+        data: Any,
+        tags: Iterable[str],
+        etag: str | None = None,
+        store: bool = True,
+        generation: float | None = None,
+    ) -> Response:
+        """
+        Сериализует данные по схеме ответа, сохраняет их в кеш и возвращает ответ.
+        ETag, если передан, хранится вместе с телом в первой строке записи.
+        generation — отметка generation(), взятая до чтения данных из базы.
+        При store=False ответ формируется так же, но в кеш не попадает.
+        """
+        body = adapter.dump_json(adapter.validate_python(data))
+        if store:
+            await self.set(key, (etag or "").encode() + b"\n" + body, tags, generation)
+        headers = {"X-Cache": "MISS"}
+        if etag:
+            headers["ETag"] = etag
+        return Response(content=body, media_type="application/json", headers=headers)
+
+
+class NullCacheBackend(CacheBackend):
+    """
+    Отключённый кеш: ничего не хранит.
+    """
+
+    async def get(self, key: str) -> bytes | None:
+        return None
+
+    async def set(
+        self,
+        key: str,
+        value: bytes,
+        tags: Iterable[str],
+        generation: float | None = None,
+    ) -> None:
+        pass
+
+    async def invalidate(self, *tags: str) -> None:
+        pass
+
+    async def clear(self) -> None:
+        pass
+
+
+class MemoryCacheBackend(CacheBackend):
+    """
+    LRU-кеш в памяти процесса с TTL и ограничением по числу записей и объёму.
+    """
+
+    def __init__(
+        self,
+        ttl: float = CACHE_TTL,
+        max_entries: int = CACHE_MAX_ENTRIES,
+        max_bytes: int = CACHE_MAX_BYTES,
+    ):
+        super().__init__(ttl)
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.size = 0
+        # key -> (expires_at, value, tags)
+        self._entries: OrderedDict[str, tuple[float, bytes, frozenset[str]]] = (
+            OrderedDict()
+        )
+        self._tags: dict[str, set[str]] = {}
+        # tag -> время последнего сброса (time.monotonic), от старых к новым
+        self._invalidated: OrderedDict[str, float] = OrderedDict()
+        self._cleared_at = float("-inf")
+
+    def _remove(self, key: str) -> None:
+        _, value, tags = self._entries.pop(key)
+        self.size -= len(value)
+        for tag in tags:
+            keys = self._tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tags[tag]
+
+    async def get(self, key: str) -> bytes | None:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry[0] <= time.monotonic():
+            self._remove(key)
+            return None
+        self._entries.move_to_end(key)
+        return entry[1]
+
+    def _invalidated_since(self, tags: frozenset[str], generation: float) -> bool:
+        if generation <= time.monotonic() - self.FILL_WINDOW:
+            return True
+        if self._cleared_at >= generation:
+            return True
+        return any(
+            self._invalidated.get(tag, float("-inf")) >= generation for tag in tags
+        )
+
+    async def set(
+        self,
+        key: str,
+        value: bytes,
+        tags: Iterable[str],
+        generation: float | None = None,
+    ) -> None:
+        if len(value) > self.max_bytes:
+            return
+        tags = frozenset(tags)
+        if generation is not None and self._invalidated_since(tags, generation):
+            return
+        if key in self._entries:
+            self._remove(key)
+        self._entries[key] = (time.monotonic() + self.ttl, value, tags)
+        self.size += len(value)
+        for tag in tags:
+            self._tags.setdefault(tag, set()).add(key)
+        # Вытеснение давно не использованных записей
+        while len(self._entries) > self.max_entries or self.size > self.max_bytes:
+            self._remove(next(iter(self._entries)))
+
+    async def invalidate(self, *tags: str) -> None:
+        now = time.monotonic()
+        for tag in tags:
+            self._invalidated[tag] = now
+            self._invalidated.move_to_end(tag)
+            for key in list(self._tags.get(tag, ())):
+                self._remove(key)
+        # Время сброса старше FILL_WINDOW больше не нужно
+        while self._invalidated:
+            tag, invalidated_at = next(iter(self._invalidated.items()))
+            if invalidated_at > now - self.FILL_WINDOW:
+                break
+            del self._invalidated[tag]
+
+    async def clear(self) -> None:
+        self._entries.clear()
+        self._tags.clear()
+        self._invalidated.clear()
+        self._cleared_at = time.monotonic()
+        self.size = 0
+
+
+class SQLiteCacheBackend(CacheBackend):
+    """
+    Кеш в файле SQLite, общий для всех воркеров uvicorn на одном хосте.
+    Не требует внешнего сервера. Вытеснение — LRU по времени последнего
+    обращения (обновляется не чаще раза в секунду), ограничение по числу записей.
+    Время сброса тегов хранится в том же файле, поэтому сброс в одном воркере
+    не даёт другому сохранить ответ, прочитанный до него. Отметки generation
+    — время time.time(), общее для процессов хоста.
+    """
+
+    # Точность отметки последнего обращения, секунды
+    ACCESS_RESOLUTION = 1.0
+    # Служебный тег, время сброса которого — время полной очистки кеша
+    CLEAR_TAG = "*"
+
+    def __init__(
+        self,
+        path: str = CACHE_SQLITE_PATH,
+        ttl: float = CACHE_TTL,
+        max_entries: int = CACHE_MAX_ENTRIES,
+    ):
+        super().__init__(ttl)
+        self.path = path
+        self.max_entries = max_entries
+        self._local = threading.local()
+        self._connection().executescript("""
+                PRAGMA journal_mode = WAL;
+                CREATE TABLE IF NOT EXISTS cache_entries (
+                    key TEXT PRIMARY KEY,
+                    value BLOB NOT NULL,
+                    expires_at REAL NOT NULL,
+                    accessed_at REAL NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS ix_cache_entries_accessed_at
+                    ON cache_entries (accessed_at);
+                CREATE TABLE IF NOT EXISTS cache_tags (
+                    tag TEXT NOT NULL,
+                    key TEXT NOT NULL
+                        REFERENCES cache_entries (key) ON DELETE CASCADE,
+                    PRIMARY KEY (tag, key)
+                ) WITHOUT ROWID;
+                CREATE INDEX IF NOT EXISTS ix_cache_tags_key ON cache_tags (key);
+                CREATE TABLE IF NOT EXISTS cache_invalidations (
+                    tag TEXT PRIMARY KEY,
+                    invalidated_at REAL NOT NULL
+                ) WITHOUT ROWID;
+                CREATE INDEX IF NOT EXISTS ix_cache_invalidations_invalidated_at
+                    ON cache_invalidations (invalidated_at);
+                """)
+
+    def generation(self) -> float:
+        return time.time()
+
+    def _connection(self) -> sqlite3.Connection:
+        """
+        Соединение для текущего потока (операции выполняются в пуле потоков).
+        """
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA foreign_keys = ON")
+            conn.execute("PRAGMA synchronous = NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _get(self, key: str) -> bytes | None:
+        now = time.time()
+        conn = self._connection()
+        row = conn.execute(
+            "SELECT value, expires_at, accessed_at FROM cache_entries WHERE key = ?",
+            (key,),
+        ).fetchone()
+        if row is None:
+            return None
+        value, expires_at, accessed_at = row
+        if expires_at <= now:
+            conn.execute("DELETE FROM cache_entries WHERE key = ?", (key,))
+            return None
+        if now - accessed_at > self.ACCESS_RESOLUTION:
+            conn.execute(
+                "UPDATE cache_entries SET accessed_at = ? WHERE key = ?", (now, key)
+            )
+        return value
+
+    def _invalidated_since(
+        self, conn: sqlite3.Connection, tags: tuple[str, ...], generation: float
+    ) -> bool:
+        if generation <= time.time() - self.FILL_WINDOW:
+            return True
+        tags = (*tags, self.CLEAR_TAG)
+        placeholders = ", ".join("?" * len(tags))
+        row = conn.execute(
+            "SELECT 1 FROM cache_invalidations "
+            f"WHERE tag IN ({placeholders}) AND invalidated_at >= ? LIMIT 1",
+            (*tags, generation),
+        ).fetchone()
+        return row is not None
+
+    def _set(
+        self, key: str, value: bytes, tags: tuple[str, ...], generation: float | None
+    ) -> None:
+        now = time.time()
+        conn = self._connection()
+        # Проверка и запись в одной транзакции BEGIN IMMEDIATE: сброс тегов
+        # в другом воркере выполняется либо до проверки, либо после записи
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            if generation is not None and self._invalidated_since(
+                conn, tags, generation
+            ):
+                conn.execute("ROLLBACK")
+                return
+            conn.execute("DELETE FROM cache_entries WHERE key = ?", (key,))
+            conn.execute(
+                "INSERT INTO cache_entries (key, value, expires_at, accessed_at) "
+                "VALUES (?, ?, ?, ?)",
+                (key, value, now + self.ttl, now),
+            )
+            conn.executemany(
+                "INSERT INTO cache_tags (tag, key) VALUES (?, ?)",
+                [(tag, key) for tag in set(tags)],
+            )
+            # Удаление устаревших записей и вытеснение давно не использованных
+            conn.execute("DELETE FROM cache_entries WHERE expires_at <= ?", (now,))
+            conn.execute(
+                "DELETE FROM cache_entries WHERE key IN ("
+                "SELECT key FROM cache_entries ORDER BY accessed_at "
+                "LIMIT max((SELECT count(*) FROM cache_entries) - ?, 0))",
+                (self.max_entries,),
+            )
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+    def _mark_invalidated(self, conn: sqlite3.Connection, tags: Iterable[str]) -> None:
+        now = time.time()
+        conn.executemany(
+            "INSERT INTO cache_invalidations (tag, invalidated_at) VALUES (?, ?) "
+            "ON CONFLICT (tag) DO UPDATE SET invalidated_at = excluded.invalidated_at",
+            [(tag, now) for tag in set(tags)],
+        )
+        conn.execute(
+            "DELETE FROM cache_invalidations WHERE invalidated_at < ?",
+            (now - self.FILL_WINDOW,),
+        )
+
+    def _invalidate(self, tags: tuple[str, ...]) -> None:
+        placeholders = ", ".join("?" * len(tags))
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            self._mark_invalidated(conn, tags)
+            conn.execute(
+                "DELETE FROM cache_entries WHERE key IN ("
+                f"SELECT key FROM cache_tags WHERE tag IN ({placeholders}))",
+                tags,
+            )
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+    def _clear(self) -> None:
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            self._mark_invalidated(conn, [self.CLEAR_TAG])
+            conn.execute("DELETE FROM cache_entries")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+    async def get(self, key: str) -> bytes | None:
+        return await asyncio.to_thread(self._get, key)
+
+    async def set(
+        self,
+        key: str,
+        value: bytes,
+        tags: Iterable[str],
+        generation: float | None = None,
+    ) -> None:
+        await asyncio.to_thread(self._set, key, value, tuple(tags), generation)
+
+    async def invalidate(self, *tags: str) -> None:
+        if tags:
+            await asyncio.to_thread(self._invalidate, tags)
+
+    async def clear(self) -> None:
+        await asyncio.to_thread(self._clear)
+
+
+def create_cache_backend(name: str = CACHE_BACKEND) -> CacheBackend:
+    """
+    Создаёт хранилище кеша по имени из настроек: memory, sqlite или none.
+    """
+    if name == "memory":
+        return MemoryCacheBackend()
+    if name == "sqlite":
+        return SQLiteCacheBackend()
+    if name == "none":
+        return NullCacheBackend()
+    raise ValueError(f"Unknown cache backend: {name}")
+
+
+response_cache = create_cache_backend()
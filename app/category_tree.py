@@ -0,0 +1,167 @@
+# --------------- Иерархия категорий -------------------------
+import asyncio
+import time
+
+from sqlalchemy import CTE, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import CATEGORY_TREE_TTL
+from app.models.categories import Category as CategoryModel
+from app.models.products import Product as ProductModel
+
+
+def category_subtree_cte(category_id: int) -> CTE:
+    """
+    Рекурсивный CTE с id активной категории и всех её активных потомков.
+    Поддерево разрешается одним запросом по индексу categories.parent_id.
+    UNION (а не UNION ALL) гарантирует завершение даже при цикле в parent_id.
+    """
+    subtree = (
+        select(CategoryModel.id)
+        .where(CategoryModel.id == category_id, CategoryModel.is_active == True)
+        .cte("category_subtree", recursive=True)
+    )
+    return subtree.union(
+        select(CategoryModel.id).where(
+            CategoryModel.parent_id == subtree.c.id, CategoryModel.is_active == True
+        )
+    )
+
+
+def hidden_subtree_cte(category_id: int) -> CTE:
+    """
+    Рекурсивный CTE с id удалённой категории и всех потомков, скрытых вместе
+    с ней (inactive_reason = "category"). Потомки, удалённые отдельно,
+    и их поддеревья в CTE не входят.
+    """
+    subtree = (
+        select(CategoryModel.id)
+        .where(CategoryModel.id == category_id)
+        .cte("hidden_subtree", recursive=True)
+    )
+    return subtree.union(
+        select(CategoryModel.id).where(
+            CategoryModel.parent_id == subtree.c.id,
+            CategoryModel.is_active == False,
+            CategoryModel.inactive_reason == "category",
+        )
+    )
+
+
+class CategoryTreeCache:
+    """
+    Снимок дерева активных категорий со счётчиками товаров в памяти процесса.
+
+    Снимок строится двумя запросами при первом чтении и затем отдаётся без
+    обращений к базе. Изменения категорий сбрасывают снимок (invalidate),
+    изменения товаров патчат счётчики на месте (adjust_product_count).
+    TTL ограничивает устаревание снимка в других воркерах, до которых
+    сброс не доходит.
+    """
+
+    def __init__(self, ttl: float = CATEGORY_TREE_TTL):
+        self.ttl = ttl
+        self._nodes: dict[int, dict] | None = None
+        self._roots: list[dict] = []
+        self._built_at = 0.0
+        self._version = 0
+        self._lock = asyncio.Lock()
+
+    def invalidate(self) -> None:
+        """
+        Сбрасывает снимок, следующее чтение построит его заново.
+        """
+        self._version += 1
+        self._nodes = None
+
+    def adjust_product_count(self, category_id: int, delta: int) -> None:
+        """
+        Изменяет счётчик товаров категории и суммарные счётчики её предков.
+        """
+        # Построение снимка, начатое до изменения, не должно попасть в кеш
+        self._version += 1
+        if self._nodes is None:
+            return
+        node = self._nodes.get(category_id)
+        if node is None:
+            return
+        node["product_count"] += delta
+        while node is not None:
+            node["total_product_count"] += delta
+            node = self._nodes.get(node["parent_id"])
+
+    async def get_tree(self, db: AsyncSession) -> list[dict]:
+        """
+        Возвращает список корневых категорий с вложенными children.
+        """
+        if self._nodes is not None and time.monotonic() - self._built_at < self.ttl:
+            return self._roots
+
+        async with self._lock:
+            if self._nodes is not None and time.monotonic() - self._built_at < self.ttl:
+                return self._roots
+            version = self._version
+            nodes, roots = await self._build(db)
+            if version == self._version:
+                self._nodes, self._roots = nodes, roots
+                self._built_at = time.monotonic()
+            return roots
+
+    @staticmethod
+    async def _build(db: AsyncSession) -> tuple[dict[int, dict], list[dict]]:
+        """
+        Строит дерево из списка активных категорий и количества активных товаров
+        в каждой из них (два запроса независимо от размера дерева).
+        """
+        result = await db.execute(
+            select(CategoryModel.id, CategoryModel.name, CategoryModel.parent_id)
+            .where(CategoryModel.is_active == True)
+            .order_by(CategoryModel.id)
+        )
+        nodes = {
+            row.id: {
+                "id": row.id,
+                "name": row.name,
+                "parent_id": row.parent_id,
+                "product_count": 0,
+                "total_product_count": 0,
+                "children": [],
+            }
+            for row in result
+        }
+
+        result = await db.execute(
+            select(ProductModel.category_id, func.count())
+            .where(ProductModel.is_active == True)
+            .group_by(ProductModel.category_id)
+        )
+        for category_id, count in result:
+            if category_id in nodes:
+                nodes[category_id]["product_count"] = count
+
+        roots = []
+        for node in nodes.values():
+            parent = nodes.get(node["parent_id"])
+            if node["parent_id"] is None:
+                roots.append(node)
+            elif parent is not None:
+                parent["children"].append(node)
+
+        # Обход в ширину от корней; в обратном порядке каждый узел
+        # обрабатывается раньше родителя. Узлы под неактивным родителем
+        # в дерево не попадают.
+        order = list(roots)
+        for node in order:
+            order.extend(node["children"])
+        reachable = {node["id"] for node in order}
+        for node in reversed(order):
+            node["total_product_count"] += node["product_count"]
+            parent = nodes.get(node["parent_id"])
+            if parent is not None:
+                parent["total_product_count"] += node["total_product_count"]
+
+        nodes = {id_: node for id_, node in nodes.items() if id_ in reachable}
+        return nodes, roots
+
+
+category_tree_cache = CategoryTreeCache()
@@ -0,0 +1,369 @@
+# --------------- Генератор синтетических данных -------------------------
+# Запуск: python -m app.commands.generate_data --products 1000000 --reviews 10000000
+# Наполняет базу из DATABASE_URL категориями, пользователями, товарами и
+# отзывами в обход API: все пользователи получают один заранее вычисленный
+# хеш bcrypt, строки пишутся пачками через COPY (PostgreSQL) или многострочные
+# INSERT, агрегаты рейтинга товаров считаются при генерации, а не по отзыву.
+# Схема должна быть создана (alembic upgrade head), пользователей из
+# генератора в базе быть не должно.
+import argparse
+import asyncio
+import random
+import time
+from collections.abc import Sequence
+from datetime import datetime, timedelta
+from decimal import Decimal
+from itertools import accumulate
+
+from sqlalchemy import Table, func, insert, select, text
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+from app.auth import hash_password
+from app.database import async_engine
+from app.models import Category as CategoryModel
+from app.models import Product as ProductModel
+from app.models.reviews import Review as ReviewModel
+from app.models.users import User as UserModel
+
+# Учётные данные сгенерированных пользователей
+GENERATED_PASSWORD = "benchpass1"
+ADMIN_EMAIL = "admin@example.com"
+
+# Доли оценок 1..5 по умолчанию: J-образное распределение, типичное для
+# отзывов в интернет-магазинах
+DEFAULT_GRADE_WEIGHTS = "4,4,9,25,58"
+
+COMMENTS = {
+    1: "Ужасно, не рекомендую",
+    2: "Плохо, есть недостатки",
+    3: "Нормально за свои деньги",
+    4: "Хорошо, доволен покупкой",
+    5: "Отлично, рекомендую",
+}
+ADJECTIVES = ["Надёжный", "Компактный", "Лёгкий", "Прочный", "Удобный", "Яркий"]
+NOUNS = ["чайник", "рюкзак", "фонарь", "плед", "кабель", "блокнот", "термос"]
+
+USER_COLUMNS = ("id", "email", "hashed_password", "is_active", "role")
+CATEGORY_COLUMNS = ("id", "name", "parent_id", "is_active")
+PRODUCT_COLUMNS = (
+    "id",
+    "name",
+    "description",
+    "price",
+    "stock",
+    "is_active",
+    "category_id",
+    "seller_id",
+    "rating",
+    "rating_sum",
+    "rating_count",
+    "version",
+)
+REVIEW_COLUMNS = (
+    "id",
+    "user_id",
+    "product_id",
+    "comment",
+    "comment_date",
+    "grade",
+    "is_active",
+)
+
+
+def seller_email(index: int) -> str:
+    return f"seller{index}@example.com"
+
+
+def buyer_email(index: int) -> str:
+    return f"buyer{index}@example.com"
+
+
+def zipf_weights(n: int, exponent: float) -> list[float]:
+    """
+    Веса закона Ципфа: элемент ранга r (с 1) получает вес 1 / r^exponent.
+    """
+    return [1 / rank**exponent for rank in range(1, n + 1)]
+
+
+def zipf_counts(total: int, n: int, exponent: float, cap: int) -> list[int]:
+    """
+    Делит total между n элементами пропорционально весам Ципфа, не больше
+    cap на элемент. Излишек над cap достаётся остальным пропорционально их
+    весам, поэтому сумма равна total, если total <= n * cap. Порядок — по рангу.
+    """
+    weights = zipf_weights(n, exponent)
+    total = min(total, n * cap)
+    # Самые популярные элементы, чья доля не меньше cap, получают ровно cap
+    capped = 0
+    rest_weight = sum(weights)
+    while capped < n and (total - capped * cap) * weights[capped] >= cap * rest_weight:
+        rest_weight -= weights[capped]
+        capped += 1
+    remaining = total - capped * cap
+    counts = [cap] * capped
+    counts += [int(remaining * weight / rest_weight) for weight in weights[capped:]]
+    # Остаток от округления вниз — по единице самым популярным из остальных
+    for i in range(capped, capped + total - sum(counts)):
+        counts[i] += 1
+    return counts
+
+
+def parse_grade_weights(value: str) -> list[float]:
+    weights = [float(part) for part in value.split(",")]
+    if len(weights) != 5 or any(w < 0 for w in weights) or not sum(weights):
+        raise argparse.ArgumentTypeError("expected 5 non-negative weights")
+    return weights
+
+
+async def next_id(conn: AsyncConnection, model) -> int:
+    return (await conn.scalar(select(func.max(model.id))) or 0) + 1
+
+
+async def write_rows(
+    conn: AsyncConnection, table: Table, columns: Sequence[str], rows: list[tuple]
+) -> None:
+    """
+    Записывает пачку строк: в PostgreSQL (asyncpg) — через COPY, в остальных
+    базах — одним executemany INSERT.
+    """
+    if not rows:
+        return
+    if conn.dialect.driver == "asyncpg":
+        raw = await conn.get_raw_connection()
+        await raw.driver_connection.copy_records_to_table(
+            table.name, records=rows, columns=list(columns)
+        )
+    else:
+        await conn.execute(insert(table), [dict(zip(columns, row)) for row in rows])
+
+
+async def write_in_batches(
+    conn: AsyncConnection,
+    table: Table,
+    columns: Sequence[str],
+    rows: list[tuple],
+    batch_size: int,
+) -> None:
+    for start in range(0, len(rows), batch_size):
+        await write_rows(conn, table, columns, rows[start : start + batch_size])
+        await conn.commit()
+
+
+async def reset_sequences(conn: AsyncConnection) -> None:
+    """
+    Сдвигает последовательности id PostgreSQL за явно записанные id.
+    """
+    if conn.dialect.name != "postgresql":
+        return
+    for model in (UserModel, CategoryModel, ProductModel, ReviewModel):
+        table = model.__tablename__
+        await conn.execute(
+            text(
+                f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), "
+                f"(SELECT coalesce(max(id), 0) + 1 FROM {table}), false)"
+            )
+        )
+    await conn.commit()
+
+
+async def generate(
+    products: int,
+    reviews: int,
+    sellers: int,
+    buyers: int,
+    depth: int,
+    fanout: int,
+    batch_size: int,
+    seed_value: int,
+    zipf_exponent: float = 1.0,
+    grade_weights: list[float] | None = None,
+    days: int = 365,
+) -> dict:
+    """
+    Генерирует дерево категорий глубины depth (fanout детей у каждой),
+    администратора, продавцов, покупателей, товары в листовых категориях
+    и отзывы. Популярность товаров (число отзывов), категорий и продавцов
+    распределена по Ципфу с показателем zipf_exponent; оценки — по весам
+    grade_weights. Каждый покупатель оставляет не больше одного отзыва на
+    товар, поэтому у товара не больше buyers отзывов. Возвращает число
+    созданных строк.
+    """
+    rng = random.Random(seed_value)
+    grade_weights = grade_weights or parse_grade_weights(DEFAULT_GRADE_WEIGHTS)
+    # Один хеш на всех: bcrypt на каждого пользователя занял бы часы
+    hashed = hash_password(GENERATED_PASSWORD)
+    now = datetime.now()
+    period = days * 86400
+    async with async_engine.connect() as conn:
+        if await conn.scalar(
+            select(UserModel.id).where(UserModel.email == ADMIN_EMAIL)
+        ):
+            raise SystemExit(f"{ADMIN_EMAIL} already exists: the database is seeded")
+        user_id = await next_id(conn, UserModel)
+        category_id = await next_id(conn, CategoryModel)
+        product_id = await next_id(conn, ProductModel)
+        review_id = await next_id(conn, ReviewModel)
+        if conn.dialect.name == "postgresql":
+            # Пачки фиксируются без ожидания сброса WAL на диск
+            await conn.execute(text("SET synchronous_commit = off"))
+        await conn.commit()
+
+        # --------------- Пользователи -------------------------
+        users = [(user_id, ADMIN_EMAIL, hashed, True, "admin")]
+        users += [
+            (user_id + 1 + i, seller_email(i), hashed, True, "seller")
+            for i in range(sellers)
+        ]
+        users += [
+            (user_id + 1 + sellers + i, buyer_email(i), hashed, True, "buyer")
+            for i in range(buyers)
+        ]
+        await write_in_batches(
+            conn, UserModel.__table__, USER_COLUMNS, users, batch_size
+        )
+        seller_ids = [row[0] for row in users[1 : 1 + sellers]]
+        buyer_ids = [row[0] for row in users[1 + sellers :]]
+
+        # --------------- Категории -------------------------
+        categories = []
+        level = [(None, "")]
+        for _ in range(depth):
+            next_level = []
+            for parent_id, path in level:
+                for i in range(fanout):
+                    child_path = f"{path}.{i + 1}" if path else str(i + 1)
+                    row = (category_id, f"Category {child_path}", parent_id, True)
+                    categories.append(row)
+                    next_level.append((category_id, child_path))
+                    category_id += 1
+            level = next_level
+        await write_in_batches(
+            conn, CategoryModel.__table__, CATEGORY_COLUMNS, categories, batch_size
+        )
+        leaves = [leaf_id for leaf_id, _ in level]
+
+        # --------------- Товары и отзывы -------------------------
+        # Число отзывов на товар по Ципфу, ранги перемешаны относительно id
+        review_counts = zipf_counts(reviews, products, zipf_exponent, len(buyer_ids))
+        rng.shuffle(review_counts)
+        leaf_weights = list(accumulate(zipf_weights(len(leaves), zipf_exponent)))
+        seller_weights = list(accumulate(zipf_weights(len(seller_ids), zipf_exponent)))
+        grades = [1, 2, 3, 4, 5]
+        grade_cum_weights = list(accumulate(grade_weights))
+        review_total = 0
+        for start in range(0, products, batch_size):
+            product_rows = []
+            review_rows = []
+            for i in range(start, min(start + batch_size, products)):
+                count = review_counts[i]
+                product_grades = rng.choices(
+                    grades, cum_weights=grade_cum_weights, k=count
+                )
+                for buyer, grade in zip(rng.sample(buyer_ids, count), product_grades):
+                    review_rows.append(
+                        (
+                            review_id,
+                            buyer,
+                            product_id,
+                            None if rng.random() < 0.3 else COMMENTS[grade],
+                            now - timedelta(seconds=rng.random() * period),
+                            grade,
+                            True,
+                        )
+                    )
+                    review_id += 1
+                rating_sum = sum(product_grades)
+                price = Decimal(int(min(rng.lognormvariate(7, 1.2), 10**7) * 100) + 1)
+                product_rows.append(
+                    (
+                        product_id,
+                        f"Product {i}",
+                        f"{rng.choice(ADJECTIVES)} {rng.choice(NOUNS)}: "
+                        f"описание товара {i}",
+                        price.scaleb(-2),
+                        0 if rng.random() < 0.05 else rng.randint(1, 500),
+                        True,
+                        rng.choices(leaves, cum_weights=leaf_weights)[0],
+                        rng.choices(seller_ids, cum_weights=seller_weights)[0],
+                        Decimal(rating_sum) / count if count else Decimal(0),
+                        rating_sum,
+                        count,
+                        1,
+                    )
+                )
+                product_id += 1
+            await write_rows(
+                conn, ProductModel.__table__, PRODUCT_COLUMNS, product_rows
+            )
+            await conn.commit()
+            await write_in_batches(
+                conn, ReviewModel.__table__, REVIEW_COLUMNS, review_rows, batch_size
+            )
+            review_total += len(review_rows)
+
+        await reset_sequences(conn)
+        # Свежая статистика планировщика для профилирования запросов
+        await conn.execute(text("ANALYZE"))
+        await conn.commit()
+    return {
+        "users": len(users),
+        "categories": len(categories),
+        "products": products,
+        "reviews": review_total,
+    }
+
+
+def build_parser(**defaults) -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Генерация синтетических данных")
+    parser.add_argument("--products", type=int, default=100_000)
+    parser.add_argument("--reviews", type=int, default=1_000_000)
+    parser.add_argument("--sellers", type=int, default=100)
+    parser.add_argument("--buyers", type=int, default=10_000)
+    parser.add_argument("--depth", type=int, default=3, help="Глубина дерева категорий")
+    parser.add_argument("--fanout", type=int, default=8, help="Дочерних категорий")
+    parser.add_argument("--batch-size", type=int, default=10_000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument(
+        "--zipf", type=float, default=1.0, help="Показатель Ципфа популярности"
+    )
+    parser.add_argument(
+        "--grades",
+        type=parse_grade_weights,
+        default=DEFAULT_GRADE_WEIGHTS,
+        help="Веса оценок 1..5 через запятую",
+    )
+    parser.add_argument("--days", type=int, default=365, help="Период отзывов, дней")
+    parser.set_defaults(**defaults)
+    return parser
+
+
+async def main(**defaults) -> None:
+    args = build_parser(**defaults).parse_args()
+    if args.sellers < 1 or args.depth < 1 or args.fanout < 1:
+        raise SystemExit("--sellers, --depth and --fanout must be positive")
+
+    started = time.perf_counter()
+    counts = await generate(
+        args.products,
+        args.reviews,
+        args.sellers,
+        args.buyers,
+        args.depth,
+        args.fanout,
+        args.batch_size,
+        args.seed,
+        zipf_exponent=args.zipf,
+        grade_weights=args.grades,
+        days=args.days,
+    )
+    await async_engine.dispose()
+    elapsed = time.perf_counter() - started
+    rows = sum(counts.values())
+    print(
+        f"Generated {counts} in {elapsed:.1f}s "
+        f"({rows / elapsed * 60 / 1_000_000:.2f}M rows/min)"
+    )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
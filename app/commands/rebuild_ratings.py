@@ -0,0 +1,20 @@
+# --------------- Сверка агрегатов рейтинга с отзывами -------------------------
+# Запуск: python -m app.commands.rebuild_ratings
+import asyncio
+
+from app.cache import response_cache
+from app.database import async_engine, async_session_maker
+from app.ratings import rebuild_ratings
+
+
+async def main() -> None:
+    async with async_session_maker() as session:
+        fixed = await rebuild_ratings(session)
+    if fixed:
+        await response_cache.clear()
+    await async_engine.dispose()
+    print(f"Rating aggregates rebuilt, products fixed: {fixed}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -1,10 +1,174 @@
 import os
+from dataclasses import dataclass, replace
 
 from dotenv import load_dotenv
 
 load_dotenv()
 
+
+def env_bool(name: str, default: bool = False) -> bool:
+    """
+    Читает логический флаг из переменной окружения (1/true/yes/on).
+    """
+    value = os.getenv(name)
+    if value is None:
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
 SECRET_KEY = os.getenv("SECRET_KEY")
 ALGORITHM = os.getenv("ALGORITHM")
-ACCESS_TOKEN_EXPIRE_MINUTES = os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES")
-REFRESH_TOKEN_EXPIRE_DAYS = os.getenv("REFRESH_TOKEN_EXPIRE_DAYS")
+ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", 30))
+REFRESH_TOKEN_EXPIRE_DAYS = int(os.getenv("REFRESH_TOKEN_EXPIRE_DAYS", 7))
+
+
+@dataclass(frozen=True)
+class DatabaseSettings:
+    """
+    Настройки подключения к базе данных и пула соединений.
+    """
+
+    url: str
+    # Вывод каждого SQL-запроса в stdout средствами SQLAlchemy (только для отладки)
+    echo: bool = False
+    # Пул соединений на один воркер: постоянные соединения и сверх них
+    pool_size: int = 5
+    max_overflow: int = 10
+    # Ожидание свободного соединения, секунды
+    pool_timeout: float = 30.0
+    # Пересоздание соединений старше N секунд (-1 — никогда)
+    pool_recycle: int = 1800
+    # Проверка соединения перед выдачей из пула
+    pool_pre_ping: bool = True
+    # Кеш подготовленных запросов asyncpg на соединение (0 — для pgbouncer
+    # в режиме transaction)
+    statement_cache_size: int = 100
+    # Таймаут выполнения запроса asyncpg, секунды (None — без ограничения)
+    command_timeout: float | None = None
+    # Журнал SQL-запросов: off, sampled (доля запросов и все медленные) или all
+    log_mode: str = "off"
+    log_sample_rate: float = 0.01
+    log_slow_ms: float = 500.0
+    # Предупреждение в журнале при ожидании соединения из пула дольше N мс
+    pool_wait_warn_ms: float = 100.0
+
+    @classmethod
+    def from_env(cls) -> "DatabaseSettings":
+        command_timeout = os.getenv("DB_COMMAND_TIMEOUT")
+        settings = cls(
+            url=os.getenv("DATABASE_URL"),
+            echo=env_bool("DB_ECHO"),
+            pool_size=int(os.getenv("DB_POOL_SIZE", 5)),
+            max_overflow=int(os.getenv("DB_MAX_OVERFLOW", 10)),
+            pool_timeout=float(os.getenv("DB_POOL_TIMEOUT", 30)),
+            pool_recycle=int(os.getenv("DB_POOL_RECYCLE", 1800)),
+            pool_pre_ping=env_bool("DB_POOL_PRE_PING", True),
+            statement_cache_size=int(os.getenv("DB_STATEMENT_CACHE_SIZE", 100)),
+            command_timeout=float(command_timeout) if command_timeout else None,
+            log_mode=os.getenv("DB_LOG_MODE", "off"),
+            log_sample_rate=float(os.getenv("DB_LOG_SAMPLE_RATE", 0.01)),
+            log_slow_ms=float(os.getenv("DB_LOG_SLOW_MS", 500)),
+            pool_wait_warn_ms=float(os.getenv("DB_POOL_WAIT_WARN_MS", 100)),
+        )
+        if settings.log_mode not in ("off", "sampled", "all"):
+            raise ValueError(f"Unknown DB_LOG_MODE: {settings.log_mode}")
+        return settings
+
+
+database_settings = DatabaseSettings.from_env()
+
+# Учёт SQL-запросов на HTTP-запрос: заголовок Server-Timing, бюджет запросов
+# и порог повторов одного запроса (N+1). SQL_GUARD_MODE: off — только учёт,
+# warn — предупреждение в журнале, raise — ответ 500 (для отладки и тестов)
+SQL_SERVER_TIMING = env_bool("SQL_SERVER_TIMING", True)
+SQL_QUERY_BUDGET = int(os.getenv("SQL_QUERY_BUDGET", 20))
+SQL_REPEATED_QUERY_LIMIT = int(os.getenv("SQL_REPEATED_QUERY_LIMIT", 5))
+SQL_GUARD_MODE = os.getenv("SQL_GUARD_MODE", "off")
+if SQL_GUARD_MODE not in ("off", "warn", "raise"):
+    raise ValueError(f"Unknown SQL_GUARD_MODE: {SQL_GUARD_MODE}")
+
+# Метрики Prometheus (/metrics). При нескольких воркерах uvicorn укажите общий
+# каталог: каждый воркер сохраняет туда снимок своих метрик раз в
+# METRICS_FLUSH_INTERVAL секунд. Каталог нужно очищать при перезапуске сервиса
+METRICS_MULTIPROC_DIR = os.getenv("METRICS_MULTIPROC_DIR") or None
+METRICS_FLUSH_INTERVAL = float(os.getenv("METRICS_FLUSH_INTERVAL", 5))
+
+# Необязательная реплика для чтения с теми же параметрами пула, что и у основной
+# базы. После записи клиент читает из основной базы READ_AFTER_WRITE_PIN_SECONDS
+# секунд, чтобы не увидеть устаревшие данные из-за отставания реплики
+READ_DATABASE_URL = os.getenv("READ_DATABASE_URL") or None
+read_database_settings = (
+    replace(database_settings, url=READ_DATABASE_URL) if READ_DATABASE_URL else None
+)
+READ_AFTER_WRITE_PIN_SECONDS = float(os.getenv("READ_AFTER_WRITE_PIN_SECONDS", 5))
+
+# Хеширование паролей: стоимость bcrypt (при изменении хеши пересчитываются
+# при следующем входе), число потоков пула и максимум операций в пуле,
+# включая ожидающие; сверх лимита запросы получают 503
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", 12))
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", 4))
+PASSWORD_HASH_QUEUE_LIMIT = int(os.getenv("PASSWORD_HASH_QUEUE_LIMIT", 64))
+
+# Кеш аутентифицированных пользователей в памяти воркера: время жизни записи
+# (секунды, 0 — отключён) и максимальное число записей
+PRINCIPAL_CACHE_TTL = float(os.getenv("PRINCIPAL_CACHE_TTL", 30))
+PRINCIPAL_CACHE_MAX_ENTRIES = int(os.getenv("PRINCIPAL_CACHE_MAX_ENTRIES", 10000))
+# Доверять ролям и id из подписанного access-токена без обращения к базе.
+# Деактивация пользователя вступает в силу только по истечении токена,
+# поэтому включать стоит лишь при коротком ACCESS_TOKEN_EXPIRE_MINUTES
+AUTH_TRUST_TOKEN_CLAIMS = env_bool("AUTH_TRUST_TOKEN_CLAIMS")
+
+# Размер страницы для курсорной пагинации списков
+DEFAULT_PAGE_SIZE = int(os.getenv("DEFAULT_PAGE_SIZE", 20))
+MAX_PAGE_SIZE = int(os.getenv("MAX_PAGE_SIZE", 100))
+
+# Время жизни снимка дерева категорий в памяти воркера, секунды
+CATEGORY_TREE_TTL = float(os.getenv("CATEGORY_TREE_TTL", 60))
+
+# Кеш ответов каталога: memory (LRU в памяти воркера), sqlite (общий файл
+# для всех воркеров хоста) или none. Кеш memory сбрасывается только в воркере,
+# выполнившем запись, и остальные воркеры отдают устаревший ответ до CACHE_TTL
+# секунд, поэтому по умолчанию при WEB_CONCURRENCY > 1 (число воркеров
+# uvicorn) выбирается sqlite
+WEB_CONCURRENCY = int(os.getenv("WEB_CONCURRENCY", 1))
+CACHE_BACKEND = os.getenv("CACHE_BACKEND") or (
+    "sqlite" if WEB_CONCURRENCY > 1 else "memory"
+)
+CACHE_TTL = float(os.getenv("CACHE_TTL", 300))
+CACHE_MAX_ENTRIES = int(os.getenv("CACHE_MAX_ENTRIES", 10000))
+CACHE_MAX_BYTES = int(os.getenv("CACHE_MAX_BYTES", 64 * 1024 * 1024))
+CACHE_SQLITE_PATH = os.getenv("CACHE_SQLITE_PATH", "response_cache.sqlite3")
+
+# Размер пачки строк при потоковой выгрузке каталога
+EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", 1000))
+
+# Массовая загрузка товаров: максимум строк в запросе и размер порции INSERT
+BULK_MAX_ROWS = int(os.getenv("BULK_MAX_ROWS", 100000))
+BULK_INSERT_CHUNK_SIZE = int(os.getenv("BULK_INSERT_CHUNK_SIZE", 1000))
+
+# Резервирование остатков: срок резервации (секунды), период фоновой задачи,
+# которая возвращает на склад истёкшие резервации и обновляет отображаемый
+# остаток шардированных товаров, размер её пачки и максимум шардов на товар
+STOCK_RESERVATION_TTL = float(os.getenv("STOCK_RESERVATION_TTL", 900))
+STOCK_SWEEP_INTERVAL = float(os.getenv("STOCK_SWEEP_INTERVAL", 30))
+STOCK_SWEEP_BATCH_SIZE = int(os.getenv("STOCK_SWEEP_BATCH_SIZE", 1000))
+STOCK_MAX_SHARDS = int(os.getenv("STOCK_MAX_SHARDS", 64))
+
+# Максимум разных товаров в корзине: ограничивает размер заказа и запросов
+# оформления (число запросов оформления от числа строк не зависит)
+CART_MAX_ITEMS = int(os.getenv("CART_MAX_ITEMS", 100))
+
+# Фоновые задачи воркера (app/jobs.py): очередь в памяти (memory) или в
+# таблице background_jobs (database, переживает перезапуск), число
+# исполнителей, задержка, в течение которой повторные постановки задачи
+# схлопываются, число попыток и начальная задержка повтора (удваивается),
+# время на выполнение оставшихся задач при остановке, период опроса таблицы
+# и срок, после которого задачу упавшего воркера забирает другой
+JOB_QUEUE_BACKEND = os.getenv("JOB_QUEUE_BACKEND", "memory")
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", 4))
+JOB_COALESCE_DELAY = float(os.getenv("JOB_COALESCE_DELAY", 1))
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", 5))
+JOB_RETRY_DELAY = float(os.getenv("JOB_RETRY_DELAY", 1))
+JOB_DRAIN_TIMEOUT = float(os.getenv("JOB_DRAIN_TIMEOUT", 10))
+JOB_POLL_INTERVAL = float(os.getenv("JOB_POLL_INTERVAL", 1))
+JOB_LEASE_TIMEOUT = float(os.getenv("JOB_LEASE_TIMEOUT", 300))
@@ -1,19 +1,63 @@
 # --------------- Асинхронное подключение к PostgreSQL -------------------------
-import os
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import (AsyncEngine, AsyncSession,
+                                    async_sessionmaker, create_async_engine)
+from sqlalchemy.orm import DeclarativeBase
 
-from dotenv import load_dotenv
-from sqlalchemy.ext.asyncio import (AsyncSession, async_sessionmaker,
-                                    create_async_engine)
-from sqlalchemy.orm import DeclarativeBase, sessionmaker
+from app.config import (DatabaseSettings, database_settings,
+                        read_database_settings)
+from app.db_metrics import TimedAsyncAdaptedQueuePool, instrument_engine
 
-load_dotenv()
 
-DATABASE_URL = os.getenv("DATABASE_URL")
-async_engine = create_async_engine(DATABASE_URL, echo=True)
+def create_engine(settings: DatabaseSettings) -> AsyncEngine:
+    """
+    Создаёт асинхронный движок с параметрами пула и журналом SQL из настроек.
+    """
+    url = make_url(settings.url)
+    connect_args = {}
+    if url.get_driver_name() == "asyncpg":
+        # Кеш подготовленных запросов SQLAlchemy и самого asyncpg
+        connect_args["prepared_statement_cache_size"] = settings.statement_cache_size
+        connect_args["statement_cache_size"] = settings.statement_cache_size
+        if settings.command_timeout is not None:
+            connect_args["command_timeout"] = settings.command_timeout
+
+    engine = create_async_engine(
+        url,
+        echo=settings.echo,
+        poolclass=TimedAsyncAdaptedQueuePool,
+        pool_size=settings.pool_size,
+        max_overflow=settings.max_overflow,
+        pool_timeout=settings.pool_timeout,
+        pool_recycle=settings.pool_recycle,
+        pool_pre_ping=settings.pool_pre_ping,
+        connect_args=connect_args,
+    )
+    instrument_engine(engine.sync_engine, settings)
+    return engine
+
+
+DATABASE_URL = database_settings.url
+async_engine = create_engine(database_settings)
 async_session_maker = async_sessionmaker(
     async_engine, expire_on_commit=False, class_=AsyncSession
 )
 
+# Реплика для чтения; без READ_DATABASE_URL чтение идёт из основной базы.
+# Сессии реплики помечены в info, чтобы их данные не попадали в кеш ответов
+# сразу после записи (см. db_depends.cache_generation)
+if read_database_settings is not None:
+    read_async_engine = create_engine(read_database_settings)
+    read_async_session_maker = async_sessionmaker(
+        read_async_engine,
+        expire_on_commit=False,
+        class_=AsyncSession,
+        info={"read_replica": True},
+    )
+else:
+    read_async_engine = async_engine
+    read_async_session_maker = async_session_maker
+
 
 class Base(DeclarativeBase):
     pass
@@ -1,9 +1,16 @@
 # --------------- Асинхронная сессия -------------------------
+import time
 from collections.abc import AsyncGenerator
 
+from fastapi import Request, Response
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.database import async_session_maker
+from app.cache import response_cache
+from app.config import READ_AFTER_WRITE_PIN_SECONDS
+from app.database import async_session_maker, read_async_session_maker
+
+# Cookie, привязывающая клиента к основной базе после записи
+PRIMARY_PIN_COOKIE = "primary_pin"
 
 
 async def get_async_db() -> AsyncGenerator[AsyncSession, None]:
@@ -12,3 +19,57 @@ async def get_async_db() -> AsyncGenerator[AsyncSession, None]:
     """
     async with async_session_maker() as session:
         yield session
+
+
+def is_pinned_to_primary(request: Request) -> bool:
+    """
+    Проверяет, записывал ли клиент данные в последние READ_AFTER_WRITE_PIN_SECONDS.
+    """
+    try:
+        pinned_until = float(request.cookies.get(PRIMARY_PIN_COOKIE, 0))
+    except ValueError:
+        return False
+    return pinned_until > time.time()
+
+
+async def get_read_db(request: Request) -> AsyncGenerator[AsyncSession, None]:
+    """
+    Предоставляет сессию только для чтения: из реплики, если она настроена,
+    или из основной базы для клиента, недавно выполнявшего запись.
+    """
+    maker = (
+        async_session_maker
+        if is_pinned_to_primary(request)
+        else read_async_session_maker
+    )
+    async with maker() as session:
+        yield session
+
+
+def cache_generation(db: AsyncSession) -> float:
+    """
+    Отметка кеша ответов для чтения этой сессией (см. app/cache.py). Реплика
+    может отставать от основной базы на READ_AFTER_WRITE_PIN_SECONDS, поэтому
+    для её сессий отметка сдвигается назад: ответ не попадает в кеш, если
+    его теги сбрасывали за это время. Время сброса хранит само хранилище
+    кеша, так что при общем хранилище sqlite учитываются записи всех воркеров.
+    """
+    generation = response_cache.generation()
+    if db.info.get("read_replica"):
+        generation -= READ_AFTER_WRITE_PIN_SECONDS
+    return generation
+
+
+def pin_to_primary(response: Response) -> None:
+    """
+    Отмечает запись: клиент получает cookie, по которой его чтения идут
+    в основную базу.
+    """
+    if READ_AFTER_WRITE_PIN_SECONDS > 0:
+        response.set_cookie(
+            PRIMARY_PIN_COOKIE,
+            str(time.time() + READ_AFTER_WRITE_PIN_SECONDS),
+            max_age=int(READ_AFTER_WRITE_PIN_SECONDS) + 1,
+            httponly=True,
+            samesite="lax",
+        )
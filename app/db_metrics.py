@@ -0,0 +1,195 @@
+# --------------- Журнал SQL-запросов и метрики пула соединений -------------------------
+import json
+import logging
+import random
+import threading
+import time
+from collections import Counter
+from contextvars import ContextVar
+
+from sqlalchemy import event, exc
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+from app.config import DatabaseSettings, database_settings
+
+sql_logger = logging.getLogger("app.sql")
+pool_logger = logging.getLogger("app.db.pool")
+
+# Максимальная длина текста запроса в журнале
+STATEMENT_MAX_LENGTH = 2000
+
+
+class PoolMetrics:
+    """
+    Счётчики выдачи соединений из пула: число выдач, суммарное и максимальное
+    время ожидания, таймауты и гистограмма ожидания.
+    """
+
+    # Верхние границы корзин гистограммы ожидания, секунды
+    BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+        self.wait_buckets = [0] * (len(self.BUCKETS) + 1)
+
+    def observe(self, wait: float, timed_out: bool = False) -> None:
+        with self._lock:
+            if timed_out:
+                self.timeouts += 1
+            else:
+                self.checkouts += 1
+            self.wait_seconds_total += wait
+            self.wait_seconds_max = max(self.wait_seconds_max, wait)
+            for i, bound in enumerate(self.BUCKETS):
+                if wait <= bound:
+                    self.wait_buckets[i] += 1
+                    break
+            else:
+                self.wait_buckets[-1] += 1
+
+    def snapshot(self, engine: Engine | None = None) -> dict:
+        """
+        Текущие значения счётчиков и, если передан engine, состояние его пула.
+        """
+        with self._lock:
+            data = {
+                "checkouts": self.checkouts,
+                "timeouts": self.timeouts,
+                "wait_seconds_total": self.wait_seconds_total,
+                "wait_seconds_max": self.wait_seconds_max,
+                "wait_buckets": dict(
+                    zip([*map(str, self.BUCKETS), "+Inf"], self.wait_buckets)
+                ),
+            }
+        if engine is not None and isinstance(engine.pool, AsyncAdaptedQueuePool):
+            data.update(
+                pool_size=engine.pool.size(),
+                checked_out=engine.pool.checkedout(),
+                overflow=engine.pool.overflow(),
+            )
+        return data
+
+
+pool_metrics = PoolMetrics()
+
+
+class TimedAsyncAdaptedQueuePool(AsyncAdaptedQueuePool):
+    """
+    Пул соединений, измеряющий время ожидания свободного соединения.
+    """
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except exc.TimeoutError:
+            pool_metrics.observe(time.perf_counter() - start, timed_out=True)
+            raise
+        wait = time.perf_counter() - start
+        pool_metrics.observe(wait)
+        if wait * 1000 > database_settings.pool_wait_warn_ms:
+            pool_logger.warning(
+                json.dumps(
+                    {
+                        "event": "pool_wait",
+                        "wait_ms": round(wait * 1000, 2),
+                        "checked_out": self.checkedout(),
+                        "overflow": self.overflow(),
+                    }
+                )
+            )
+        return connection
+
+
+class RequestQueryStats:
+    """
+    SQL-запросы одного HTTP-запроса: количество, суммарное время и число
+    повторов каждого текста запроса (повторы одного текста — признак N+1).
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.statements: Counter[str] = Counter()
+
+    def record(self, statement: str, duration: float) -> None:
+        self.count += 1
+        self.duration += duration
+        self.statements[statement] += 1
+
+    def repeated(self, limit: int) -> list[tuple[str, int]]:
+        """
+        Тексты запросов, выполненные limit и более раз, по убыванию числа повторов.
+        """
+        return [(sql, n) for sql, n in self.statements.most_common() if n >= limit]
+
+
+# Статистика текущего HTTP-запроса; выставляется middleware в app.main.
+# SQLAlchemy переносит контекст в greenlet, где выполняются события движка
+current_query_stats: ContextVar[RequestQueryStats | None] = ContextVar(
+    "current_query_stats", default=None
+)
+
+
+def _setup_sql_logger() -> None:
+    if not sql_logger.handlers:
+        handler = logging.StreamHandler()
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        sql_logger.addHandler(handler)
+        sql_logger.setLevel(logging.INFO)
+        sql_logger.propagate = False
+
+
+def instrument_engine(engine: Engine, settings: DatabaseSettings) -> None:
+    """
+    Подключает к движку учёт SQL-запросов в статистике текущего HTTP-запроса
+    и журнал запросов в виде JSON-строк в логгер app.sql.
+    В режиме журнала sampled пишется доля log_sample_rate запросов и все
+    запросы дольше log_slow_ms, в режиме all — каждый запрос.
+    Параметры запросов в журнал не попадают.
+    """
+    log_mode = settings.log_mode
+    if log_mode != "off":
+        _setup_sql_logger()
+    slow_seconds = settings.log_slow_ms / 1000
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _start_timer(conn, cursor, statement, parameters, context, executemany):
+        context.query_start = time.perf_counter()
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _record_statement(conn, cursor, statement, parameters, context, executemany):
+        duration = time.perf_counter() - context.query_start
+        stats = current_query_stats.get()
+        if stats is not None:
+            stats.record(statement, duration)
+
+        if log_mode == "off":
+            return
+        slow = duration >= slow_seconds
+        if not (
+            log_mode == "all" or slow or random.random() < settings.log_sample_rate
+        ):
+            return
+        sql_logger.log(
+            logging.WARNING if slow else logging.INFO,
+            json.dumps(
+                {
+                    "event": "sql",
+                    "duration_ms": round(duration * 1000, 2),
+                    "slow": slow,
+                    "rowcount": cursor.rowcount,
+                    "executemany": executemany,
+                    "statement": " ".join(statement.split())[:STATEMENT_MAX_LENGTH],
+                },
+                ensure_ascii=False,
+            ),
+        )
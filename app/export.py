@@ -0,0 +1,74 @@
+# --------------- Потоковая выгрузка каталога -------------------------
+import csv
+import io
+from collections.abc import AsyncIterator, Sequence
+
+from pydantic import TypeAdapter
+from sqlalchemy import Row, select
+
+from app.config import EXPORT_BATCH_SIZE
+from app.database import read_async_session_maker
+from app.models import Product as ProductModel
+from app.projection import schema_columns
+from app.schemas import Product as ProductSchema
+
+product_adapter = TypeAdapter(ProductSchema)
+
+# Выгружаются только столбцы схемы ответа, без гидрации ORM-объектов
+EXPORT_FIELDS = list(ProductSchema.model_fields)
+EXPORT_COLUMNS = schema_columns(ProductModel, ProductSchema)
+
+
+async def stream_active_products(
+    batch_size: int = EXPORT_BATCH_SIZE,
+) -> AsyncIterator[Sequence[Row]]:
+    """
+    Отдаёт активные товары пачками, читая их серверным курсором.
+    В памяти одновременно находится не больше одной пачки.
+    Сессия (реплики, если она настроена) открывается здесь, а не через
+    зависимость, потому что генератор продолжает работать после выхода
+    из обработчика эндпоинта.
+    """
+    stmt = (
+        select(*EXPORT_COLUMNS)
+        .where(ProductModel.is_active == True)
+        .order_by(ProductModel.id)
+        .execution_options(yield_per=batch_size)
+    )
+    async with read_async_session_maker() as session:
+        result = await session.stream(stmt)
+        async for partition in result.partitions():
+            yield partition
+
+
+async def export_ndjson() -> AsyncIterator[bytes]:
+    """
+    Выгрузка каталога в формате NDJSON: один товар — одна строка JSON.
+    """
+    async for batch in stream_active_products():
+        yield b"".join(
+            product_adapter.dump_json(product_adapter.validate_python(row._mapping))
+            + b"\n"
+            for row in batch
+        )
+
+
+async def export_csv() -> AsyncIterator[str]:
+    """
+    Выгрузка каталога в формате CSV с заголовком.
+    """
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=EXPORT_FIELDS)
+    writer.writeheader()
+    # Заголовок отправляется сразу, до первого обращения к базе
+    yield buffer.getvalue()
+    async for batch in stream_active_products():
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerows(
+            product_adapter.dump_python(
+                product_adapter.validate_python(row._mapping), mode="json"
+            )
+            for row in batch
+        )
+        yield buffer.getvalue()
@@ -0,0 +1,377 @@
+# --------------- Фоновые задачи воркера -------------------------
+# Работа, которой не место в транзакции запроса (например, сброс кеша после
+# изменения отзывов), выполняется вне обработки запроса: эндпоинт ставит
+# задачу по имени и ключу (например, "product_rating" и id товара) и сразу
+# отвечает. Повторные постановки того же ключа, пока
+# задача ждёт запуска, схлопываются: задача запускается через
+# JOB_COALESCE_DELAY секунд после первой постановки, поэтому сотни отзывов на
+# один товар за секунду дают один сброс. Постановка во время выполнения
+# задачи запускает её ещё раз после завершения. Обработчики должны быть
+# идемпотентными: упавшая задача повторяется с удваивающейся задержкой, всего
+# до JOB_MAX_ATTEMPTS попыток.
+#
+# memory   — очередь в памяти воркера; при остановке приложения ожидающие
+#            задачи выполняются сразу, не дольше JOB_DRAIN_TIMEOUT секунд
+# database — таблица background_jobs: задачи переживают перезапуск и
+#            схлопываются между всеми воркерами
+# Пока очередь не запущена (команды и скрипты без lifespan), задача
+# выполняется сразу при постановке.
+import asyncio
+import logging
+from abc import ABC, abstractmethod
+from collections.abc import Awaitable, Callable
+from datetime import datetime, timedelta
+from typing import Any
+
+from sqlalchemy import delete, or_, select, update
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+from app.config import (JOB_COALESCE_DELAY, JOB_DRAIN_TIMEOUT,
+                        JOB_LEASE_TIMEOUT, JOB_MAX_ATTEMPTS, JOB_POLL_INTERVAL,
+                        JOB_QUEUE_BACKEND, JOB_RETRY_DELAY, JOB_WORKERS)
+from app.database import async_session_maker
+from app.models.jobs import BackgroundJob as BackgroundJobModel
+
+logger = logging.getLogger("app.jobs")
+
+JobHandler = Callable[[str], Awaitable[None]]
+
+
+class JobQueue(ABC):
+    """
+    Базовый класс очереди фоновых задач.
+    """
+
+    def __init__(self, workers: int = JOB_WORKERS):
+        self.workers = workers
+        self.handlers: dict[str, JobHandler] = {}
+        self._tasks: list[asyncio.Task] = []
+
+    @property
+    def running(self) -> bool:
+        return bool(self._tasks)
+
+    def handler(self, name: str) -> Callable[[JobHandler], JobHandler]:
+        """
+        Декоратор, регистрирующий обработчик задач с именем name.
+        Обработчик получает ключ задачи строкой.
+        """
+
+        def register(func: JobHandler) -> JobHandler:
+            self.handlers[name] = func
+            return func
+
+        return register
+
+    async def enqueue(
+        self, name: str, key: Any, delay: float = JOB_COALESCE_DELAY
+    ) -> None:
+        """
+        Ставит задачу name с ключом key на выполнение через delay секунд.
+        Если очередь не запущена, выполняет задачу сразу.
+        """
+        if name not in self.handlers:
+            raise ValueError(f"Unknown job: {name}")
+        if not self.running:
+            await self.execute(name, str(key))
+            return
+        await self._enqueue(name, str(key), delay)
+
+    async def execute(self, name: str, key: str) -> Exception | None:
+        """
+        Выполняет задачу и возвращает ошибку, если она упала.
+        """
+        try:
+            await self.handlers[name](key)
+        except Exception as exc:
+            logger.exception("Job %s(%s) failed", name, key)
+            return exc
+        return None
+
+    def retry_delay(self, attempts: int) -> float:
+        return JOB_RETRY_DELAY * 2 ** (attempts - 1)
+
+    async def start(self) -> None:
+        """
+        Запускает исполнителей задач.
+        """
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    @abstractmethod
+    async def stop(self) -> None:
+        """
+        Останавливает исполнителей, дав им завершить начатую работу.
+        """
+
+    @abstractmethod
+    async def _enqueue(self, name: str, key: str, delay: float) -> None:
+        pass
+
+    @abstractmethod
+    async def _worker(self) -> None:
+        pass
+
+
+class MemoryJobQueue(JobQueue):
+    """
+    Очередь задач в памяти воркера.
+    """
+
+    def __init__(self, workers: int = JOB_WORKERS):
+        super().__init__(workers)
+        self._queue: asyncio.Queue[tuple[str, str]] | None = None
+        # Задачи, ожидающие запуска: таймер отложенного запуска или None,
+        # если задача уже передана исполнителям
+        self._pending: dict[tuple[str, str], asyncio.TimerHandle | None] = {}
+        self._active: set[tuple[str, str]] = set()
+        self._rerun: set[tuple[str, str]] = set()
+        self._attempts: dict[tuple[str, str], int] = {}
+        self._draining = False
+
+    async def start(self) -> None:
+        self._queue = asyncio.Queue()
+        self._draining = False
+        await super().start()
+
+    async def _enqueue(self, name: str, key: str, delay: float) -> None:
+        job = (name, key)
+        if job in self._pending:
+            return
+        if job in self._active:
+            self._rerun.add(job)
+            return
+        self._schedule(job, delay)
+
+    def _schedule(self, job: tuple[str, str], delay: float) -> None:
+        if self._draining or delay <= 0:
+            self._release(job)
+        else:
+            loop = asyncio.get_running_loop()
+            self._pending[job] = loop.call_later(delay, self._release, job)
+
+    def _release(self, job: tuple[str, str]) -> None:
+        self._pending[job] = None
+        self._queue.put_nowait(job)
+
+    async def _worker(self) -> None:
+        while True:
+            job = await self._queue.get()
+            self._pending.pop(job, None)
+            self._active.add(job)
+            try:
+                error = await self.execute(*job)
+            finally:
+                self._active.discard(job)
+
+            attempts = self._attempts.pop(job, 0) + 1
+            rerun = job in self._rerun
+            self._rerun.discard(job)
+            if error is not None and attempts < JOB_MAX_ATTEMPTS:
+                self._attempts[job] = attempts
+                self._schedule(job, self.retry_delay(attempts))
+            else:
+                if error is not None:
+                    logger.error("Job %s(%s) dropped after %d attempts", *job, attempts)
+                if rerun:
+                    self._schedule(job, JOB_COALESCE_DELAY)
+            self._queue.task_done()
+
+    async def stop(self) -> None:
+        """
+        Запускает ожидающие задачи, не дожидаясь их срока, и ждёт их
+        выполнения не дольше JOB_DRAIN_TIMEOUT секунд; оставшиеся теряются.
+        """
+        if not self.running:
+            return
+        self._draining = True
+        for job, timer in list(self._pending.items()):
+            if timer is not None:
+                timer.cancel()
+                self._release(job)
+        try:
+            await asyncio.wait_for(self._queue.join(), JOB_DRAIN_TIMEOUT)
+        except TimeoutError:
+            logger.warning(
+                "Job queue drain timed out, %d jobs dropped",
+                len(self._pending) + len(self._active),
+            )
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        self._pending.clear()
+        self._rerun.clear()
+        self._attempts.clear()
+
+
+class DatabaseJobQueue(JobQueue):
+    """
+    Очередь задач в таблице background_jobs, общая для всех воркеров.
+    Исполнитель забирает задачу, срок которой наступил, продлевая её
+    блокировку на JOB_LEASE_TIMEOUT секунд; задачу упавшего воркера
+    по истечении этого срока забирает другой.
+    """
+
+    def __init__(self, workers: int = JOB_WORKERS):
+        super().__init__(workers)
+        self._stopping: asyncio.Event | None = None
+
+    async def start(self) -> None:
+        self._stopping = asyncio.Event()
+        await super().start()
+
+    async def _enqueue(self, name: str, key: str, delay: float) -> None:
+        async with async_session_maker() as session:
+            if session.get_bind().dialect.name == "postgresql":
+                stmt = postgresql_insert(BackgroundJobModel)
+            else:
+                stmt = sqlite_insert(BackgroundJobModel)
+            stmt = stmt.values(
+                name=name, key=key, run_at=datetime.now() + timedelta(seconds=delay)
+            )
+            # Ожидающая задача остаётся как есть, выполняемая помечается
+            # для повторного запуска
+            await session.execute(
+                stmt.on_conflict_do_update(
+                    index_elements=[BackgroundJobModel.name, BackgroundJobModel.key],
+                    set_={"rerun": BackgroundJobModel.locked_until.is_not(None)},
+                )
+            )
+            await session.commit()
+
+    async def _claim(self) -> tuple[int, str, str, int] | None:
+        """
+        Забирает одну задачу, срок которой наступил: id, имя, ключ и номер попытки.
+        """
+        now = datetime.now()
+        due = (
+            select(BackgroundJobModel.id)
+            .where(
+                BackgroundJobModel.run_at <= now,
+                or_(
+                    BackgroundJobModel.locked_until.is_(None),
+                    BackgroundJobModel.locked_until < now,
+                ),
+            )
+            .order_by(BackgroundJobModel.run_at)
+            .limit(1)
+            .with_for_update(skip_locked=True)
+            .scalar_subquery()
+        )
+        async with async_session_maker() as session:
+            result = await session.execute(
+                update(BackgroundJobModel)
+                .where(BackgroundJobModel.id == due)
+                .values(
+                    locked_until=now + timedelta(seconds=JOB_LEASE_TIMEOUT),
+                    rerun=False,
+                    attempts=BackgroundJobModel.attempts + 1,
+                )
+                .returning(
+                    BackgroundJobModel.id,
+                    BackgroundJobModel.name,
+                    BackgroundJobModel.key,
+                    BackgroundJobModel.attempts,
+                )
+                .execution_options(synchronize_session=False)
+            )
+            job = result.first()
+            await session.commit()
+        return tuple(job) if job is not None else None
+
+    async def _finish(
+        self, job_id: int, attempts: int, error: Exception | None
+    ) -> None:
+        """
+        Удаляет выполненную задачу или назначает её повтор.
+        """
+        now = datetime.now()
+        async with async_session_maker() as session:
+            if error is not None and attempts < JOB_MAX_ATTEMPTS:
+                await session.execute(
+                    update(BackgroundJobModel)
+                    .where(BackgroundJobModel.id == job_id)
+                    .values(
+                        locked_until=None,
+                        run_at=now + timedelta(seconds=self.retry_delay(attempts)),
+                        last_error=repr(error)[:1000],
+                    )
+                )
+            else:
+                result = await session.execute(
+                    delete(BackgroundJobModel).where(
+                        BackgroundJobModel.id == job_id,
+                        BackgroundJobModel.rerun == False,
+                    )
+                )
+                if result.rowcount == 0:
+                    # Задачу поставили повторно во время выполнения
+                    await session.execute(
+                        update(BackgroundJobModel)
+                        .where(BackgroundJobModel.id == job_id)
+                        .values(
+                            locked_until=None,
+                            rerun=False,
+                            attempts=0,
+                            run_at=now + timedelta(seconds=JOB_COALESCE_DELAY),
+                        )
+                    )
+            await session.commit()
+
+    async def _worker(self) -> None:
+        while not self._stopping.is_set():
+            try:
+                job = await self._claim()
+            except Exception:
+                logger.exception("Job claim failed")
+                job = None
+            if job is None:
+                try:
+                    await asyncio.wait_for(self._stopping.wait(), JOB_POLL_INTERVAL)
+                except TimeoutError:
+                    pass
+                continue
+
+            job_id, name, key, attempts = job
+            error = await self.execute(name, key)
+            if error is not None and attempts >= JOB_MAX_ATTEMPTS:
+                logger.error(
+                    "Job %s(%s) dropped after %d attempts", name, key, attempts
+                )
+            try:
+                await self._finish(job_id, attempts, error)
+            except Exception:
+                logger.exception("Job %s(%s) finish failed", name, key)
+
+    async def stop(self) -> None:
+        """
+        Ждёт завершения начатых задач не дольше JOB_DRAIN_TIMEOUT секунд.
+        Ожидающие задачи остаются в таблице до следующего запуска.
+        """
+        if not self.running:
+            return
+        self._stopping.set()
+        _, pending = await asyncio.wait(self._tasks, timeout=JOB_DRAIN_TIMEOUT)
+        if pending:
+            logger.warning(
+                "Job queue drain timed out, %d jobs left to lease expiry", len(pending)
+            )
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+
+def create_job_queue(name: str = JOB_QUEUE_BACKEND) -> JobQueue:
+    """
+    Создаёт очередь фоновых задач по имени из настроек: memory или database.
+    """
+    if name == "memory":
+        return MemoryJobQueue()
+    if name == "database":
+        return DatabaseJobQueue()
+    raise ValueError(f"Unknown job queue backend: {name}")
+
+
+job_queue = create_job_queue()
@@ -1,13 +1,56 @@
+import asyncio
+import contextlib
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI, HTTPException
+from fastapi.responses import PlainTextResponse
+
+from app.config import METRICS_MULTIPROC_DIR
+from app.jobs import job_queue
+from app.metrics import (collect_metrics, flush_metrics_periodically, registry,
+                         render, write_snapshot)
+from app.middleware import (http_metrics, read_after_write_pin,
+                            sql_instrumentation)
+from app.routers import (cart, categories, orders, products, reservations,
+                         reviews, users)
+from app.stock import sweep_stock_periodically
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Фоновые задачи воркера на время работы приложения.
+    """
+    flush_task = None
+    if METRICS_MULTIPROC_DIR:
+        flush_task = asyncio.create_task(flush_metrics_periodically())
+    stock_task = asyncio.create_task(sweep_stock_periodically())
+    await job_queue.start()
+    yield
+    stock_task.cancel()
+    with contextlib.suppress(asyncio.CancelledError):
+        await stock_task
+    await job_queue.stop()
+    if flush_task is not None:
+        flush_task.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await flush_task
+        write_snapshot(registry.collect())
 
-from app.routers import categories, products, reviews, users
 
-app = FastAPI(title="Ecommerce App", version="1.0.0")
+app = FastAPI(title="Ecommerce App", version="1.0.0", lifespan=lifespan)
+
+app.middleware("http")(read_after_write_pin)
+app.middleware("http")(sql_instrumentation)
+app.middleware("http")(http_metrics)
 
 app.include_router(categories.router)
 app.include_router(products.router)
 app.include_router(users.router)
 app.include_router(reviews.router)
+app.include_router(reservations.router)
+app.include_router(cart.router)
+app.include_router(orders.router)
 
 
 @app.get("/")
@@ -22,3 +65,13 @@ async def root(num: int = 0):
             detail="I'm a teapot. I can't hack the Pentagon because I don't have paws.",
         )
     return {"message": "Добро пожаловать в API интернет-магазина!"}
+
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """
+    Метрики в текстовом формате Prometheus.
+    """
+    return PlainTextResponse(
+        render(await collect_metrics()), media_type="text/plain; version=0.0.4"
+    )
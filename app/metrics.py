@@ -0,0 +1,399 @@
+# --------------- Метрики в формате Prometheus -------------------------
+# Лёгкий реестр метрик в памяти процесса: счётчик, gauge и гистограмма
+# обновляются простыми операциями со словарём. При нескольких воркерах
+# uvicorn каждый воркер периодически сохраняет снимок своих метрик
+# в METRICS_MULTIPROC_DIR, а /metrics суммирует снимки всех воркеров.
+import asyncio
+import json
+import os
+import time
+from bisect import bisect_left
+from collections.abc import Callable, Iterable
+from dataclasses import dataclass, field
+
+from app import auth
+from app.cache import response_cache
+from app.config import METRICS_FLUSH_INTERVAL, METRICS_MULTIPROC_DIR
+from app.database import async_engine, read_async_engine
+from app.db_metrics import PoolMetrics, pool_metrics
+
+# Границы корзин гистограммы длительности запросов, секунды
+DEFAULT_BUCKETS = (
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.075,
+    0.1,
+    0.25,
+    0.5,
+    0.75,
+    1.0,
+    2.5,
+    5.0,
+    7.5,
+    10.0,
+)
+
+
+@dataclass
+class MetricFamily:
+    """
+    Метрика с набором значений: (имя значения, метки, значение).
+    """
+
+    name: str
+    type: str
+    documentation: str
+    samples: list[tuple[str, dict[str, str], float]] = field(default_factory=list)
+
+
+class Metric:
+    type = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: dict[tuple[str, ...], float] = {}
+
+    def _labels(self, labelvalues: tuple[str, ...]) -> dict[str, str]:
+        return dict(zip(self.labelnames, labelvalues))
+
+    def collect(self) -> MetricFamily:
+        return MetricFamily(
+            self.name,
+            self.type,
+            self.documentation,
+            [
+                (self.name, self._labels(labels), value)
+                for labels, value in self._values.items()
+            ],
+        )
+
+
+class Counter(Metric):
+    type = "counter"
+
+    def inc(self, *labelvalues: str, amount: float = 1) -> None:
+        self._values[labelvalues] = self._values.get(labelvalues, 0) + amount
+
+
+class Gauge(Metric):
+    type = "gauge"
+
+    def set(self, value: float, *labelvalues: str) -> None:
+        self._values[labelvalues] = value
+
+    def inc(self, *labelvalues: str, amount: float = 1) -> None:
+        self._values[labelvalues] = self._values.get(labelvalues, 0) + amount
+
+    def dec(self, *labelvalues: str, amount: float = 1) -> None:
+        self.inc(*labelvalues, amount=-amount)
+
+
+class Histogram(Metric):
+    type = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Iterable[str] = (),
+        buckets: tuple[float, ...] = DEFAULT_BUCKETS,
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = buckets
+        # метки -> [счётчики корзин (последняя — +Inf), сумма]
+        self._observations: dict[tuple[str, ...], list] = {}
+
+    def observe(self, value: float, *labelvalues: str) -> None:
+        state = self._observations.get(labelvalues)
+        if state is None:
+            state = self._observations[labelvalues] = [
+                [0] * (len(self.buckets) + 1),
+                0.0,
+            ]
+        state[0][bisect_left(self.buckets, value)] += 1
+        state[1] += value
+
+    def collect(self) -> MetricFamily:
+        family = MetricFamily(self.name, self.type, self.documentation)
+        for labels, (counts, total) in self._observations.items():
+            family.samples.extend(
+                histogram_samples(
+                    self.name, self._labels(labels), self.buckets, counts, total
+                )
+            )
+        return family
+
+
+def histogram_samples(
+    name: str,
+    labels: dict[str, str],
+    buckets: Iterable[float],
+    counts: list[int],
+    total: float,
+) -> list[tuple[str, dict[str, str], float]]:
+    """
+    Значения гистограммы Prometheus (_bucket, _sum, _count) из счётчиков корзин.
+    """
+    samples = []
+    cumulative = 0
+    for bound, count in zip([*map(str, buckets), "+Inf"], counts):
+        cumulative += count
+        samples.append((f"{name}_bucket", {**labels, "le": bound}, cumulative))
+    samples.append((f"{name}_sum", labels, total))
+    samples.append((f"{name}_count", labels, cumulative))
+    return samples
+
+
+class Registry:
+    """
+    Набор метрик и функций-сборщиков, значения которых читаются при сборе.
+    """
+
+    def __init__(self):
+        self._metrics: list[Metric] = []
+        self._collectors: list[Callable[[], list[MetricFamily]]] = []
+
+    def register(self, metric: Metric) -> Metric:
+        self._metrics.append(metric)
+        return metric
+
+    def register_collector(self, collector: Callable[[], list[MetricFamily]]):
+        self._collectors.append(collector)
+        return collector
+
+    def collect(self) -> list[MetricFamily]:
+        families = [metric.collect() for metric in self._metrics]
+        for collector in self._collectors:
+            families.extend(collector())
+        return families
+
+
+registry = Registry()
+
+# --------------- HTTP-запросы -------------------------
+http_requests_total = registry.register(
+    Counter(
+        "http_requests_total",
+        "Number of HTTP requests",
+        ("method", "route", "status"),
+    )
+)
+http_request_duration_seconds = registry.register(
+    Histogram(
+        "http_request_duration_seconds",
+        "HTTP request latency by route template",
+        ("method", "route"),
+    )
+)
+http_requests_in_flight = registry.register(
+    Gauge("http_requests_in_flight", "HTTP requests being processed")
+)
+
+
+# --------------- База данных, кеш и bcrypt -------------------------
+def _engine_pools() -> dict[str, object]:
+    pools = {"primary": async_engine.sync_engine}
+    if read_async_engine is not async_engine:
+        pools["replica"] = read_async_engine.sync_engine
+    return pools
+
+
+@registry.register_collector
+def collect_db_pool() -> list[MetricFamily]:
+    snapshot = pool_metrics.snapshot()
+    wait = MetricFamily(
+        "db_pool_checkout_wait_seconds",
+        "histogram",
+        "Time spent waiting for a database connection from the pool",
+    )
+    wait.samples = histogram_samples(
+        wait.name,
+        {},
+        PoolMetrics.BUCKETS,
+        list(snapshot["wait_buckets"].values()),
+        snapshot["wait_seconds_total"],
+    )
+    families = [
+        wait,
+        MetricFamily(
+            "db_pool_checkout_timeouts_total",
+            "counter",
+            "Pool checkouts that timed out",
+            [("db_pool_checkout_timeouts_total", {}, snapshot["timeouts"])],
+        ),
+    ]
+    for name, documentation, key in (
+        ("db_pool_size", "Configured pool size", "pool_size"),
+        ("db_pool_checked_out", "Connections checked out", "checked_out"),
+        ("db_pool_overflow", "Overflow connections in use", "overflow"),
+    ):
+        family = MetricFamily(name, "gauge", documentation)
+        for engine_name, engine in _engine_pools().items():
+            value = pool_metrics.snapshot(engine).get(key)
+            if value is not None:
+                family.samples.append((name, {"engine": engine_name}, value))
+        families.append(family)
+    return families
+
+
+@registry.register_collector
+def collect_cache() -> list[MetricFamily]:
+    return [
+        MetricFamily(
+            "response_cache_hits_total",
+            "counter",
+            "Response cache hits",
+            [("response_cache_hits_total", {}, response_cache.hits)],
+        ),
+        MetricFamily(
+            "response_cache_misses_total",
+            "counter",
+            "Response cache misses",
+            [("response_cache_misses_total", {}, response_cache.misses)],
+        ),
+    ]
+
+
+@registry.register_collector
+def collect_password_hash() -> list[MetricFamily]:
+    return [
+        MetricFamily(
+            "password_hash_queue_depth",
+            "gauge",
+            "bcrypt operations running or waiting in the thread pool",
+            [("password_hash_queue_depth", {}, auth.password_hash_pending)],
+        ),
+        MetricFamily(
+            "password_hash_rejected_total",
+            "counter",
+            "bcrypt operations rejected with 503 because the pool was saturated",
+            [("password_hash_rejected_total", {}, auth.password_hash_rejected)],
+        ),
+    ]
+
+
+# --------------- Несколько процессов -------------------------
+def _snapshot_path(pid: int) -> str:
+    return os.path.join(METRICS_MULTIPROC_DIR, f"metrics-{pid}.json")
+
+
+def write_snapshot(families: list[MetricFamily]) -> None:
+    """
+    Атомарно сохраняет метрики текущего процесса в METRICS_MULTIPROC_DIR.
+    """
+    path = _snapshot_path(os.getpid())
+    with open(path + ".tmp", "w") as f:
+        json.dump([family.__dict__ for family in families], f)
+    os.replace(path + ".tmp", path)
+
+
+def read_snapshots() -> list[tuple[list[MetricFamily], bool]]:
+    """
+    Снимки остальных процессов и признак свежести снимка: значения gauge
+    из давно не обновлявшегося (завершённого) процесса не учитываются.
+    """
+    snapshots = []
+    own = os.path.basename(_snapshot_path(os.getpid()))
+    stale_before = time.time() - 3 * METRICS_FLUSH_INTERVAL
+    for name in os.listdir(METRICS_MULTIPROC_DIR):
+        if name == own or not name.endswith(".json"):
+            continue
+        path = os.path.join(METRICS_MULTIPROC_DIR, name)
+        try:
+            with open(path) as f:
+                families = [MetricFamily(**family) for family in json.load(f)]
+            fresh = os.path.getmtime(path) >= stale_before
+        except (OSError, ValueError, TypeError):
+            continue
+        snapshots.append((families, fresh))
+    return snapshots
+
+
+def merge_families(
+    families: list[MetricFamily],
+    snapshots: list[tuple[list[MetricFamily], bool]],
+) -> list[MetricFamily]:
+    """
+    Суммирует метрики текущего процесса со снимками остальных воркеров.
+    Счётчики и гистограммы суммируются по всем снимкам, gauge — только
+    по живым процессам.
+    """
+    merged: dict[str, MetricFamily] = {}
+    values: dict[str, dict[tuple, float]] = {}
+
+    def add(family: MetricFamily) -> None:
+        merged.setdefault(
+            family.name, MetricFamily(family.name, family.type, family.documentation)
+        )
+        samples = values.setdefault(family.name, {})
+        for sample_name, labels, value in family.samples:
+            key = (sample_name, tuple(labels.items()))
+            samples[key] = samples.get(key, 0) + value
+
+    for family in families:
+        add(family)
+    for snapshot, fresh in snapshots:
+        for family in snapshot:
+            if family.type != "gauge" or fresh:
+                add(family)
+
+    for name, family in merged.items():
+        family.samples = [
+            (sample_name, dict(labels), value)
+            for (sample_name, labels), value in values[name].items()
+        ]
+    return list(merged.values())
+
+
+async def collect_metrics() -> list[MetricFamily]:
+    """
+    Метрики текущего процесса, а в многопроцессном режиме — сумма метрик
+    всех воркеров. Реестр читается в event loop, файлы — в пуле потоков.
+    """
+    families = registry.collect()
+    if not METRICS_MULTIPROC_DIR:
+        return families
+    return merge_families(families, await asyncio.to_thread(read_snapshots))
+
+
+async def flush_metrics_periodically() -> None:
+    """
+    Фоновая задача воркера: сохраняет снимок метрик каждые METRICS_FLUSH_INTERVAL.
+    """
+    while True:
+        await asyncio.to_thread(write_snapshot, registry.collect())
+        await asyncio.sleep(METRICS_FLUSH_INTERVAL)
+
+
+# --------------- Текстовый формат Prometheus -------------------------
+def _format_value(value: float) -> str:
+    if value == int(value):
+        return str(int(value))
+    return repr(float(value))
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def render(families: Iterable[MetricFamily]) -> str:
+    """
+    Формирует текстовое представление метрик (Prometheus exposition format 0.0.4).
+    """
+    lines = []
+    for family in families:
+        lines.append(f"# HELP {family.name} {family.documentation}")
+        lines.append(f"# TYPE {family.name} {family.type}")
+        for sample_name, labels, value in family.samples:
+            if labels:
+                label_text = ",".join(
+                    f'{key}="{_escape(str(label))}"' for key, label in labels.items()
+                )
+                lines.append(f"{sample_name}{{{label_text}}} {_format_value(value)}")
+            else:
+                lines.append(f"{sample_name} {_format_value(value)}")
+    return "\n".join(lines) + "\n"
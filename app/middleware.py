@@ -0,0 +1,112 @@
+# --------------- HTTP middleware -------------------------
+import json
+import logging
+import time
+
+from fastapi import Request
+from fastapi.responses import JSONResponse
+
+from app.config import (SQL_GUARD_MODE, SQL_QUERY_BUDGET,
+                        SQL_REPEATED_QUERY_LIMIT, SQL_SERVER_TIMING)
+from app.database import async_engine, read_async_engine
+from app.db_depends import pin_to_primary
+from app.db_metrics import RequestQueryStats, current_query_stats
+from app.metrics import (http_request_duration_seconds,
+                         http_requests_in_flight, http_requests_total)
+
+request_logger = logging.getLogger("app.request")
+
+
+async def read_after_write_pin(request: Request, call_next):
+    """
+    После успешного запроса на запись направляет чтения клиента в основную базу.
+    """
+    response = await call_next(request)
+    if (
+        read_async_engine is not async_engine
+        and request.method not in ("GET", "HEAD", "OPTIONS")
+        and response.status_code < 400
+    ):
+        pin_to_primary(response)
+    return response
+
+
+def query_guard_violations(stats: RequestQueryStats) -> list[str]:
+    """
+    Нарушения бюджета SQL-запросов: превышение общего числа запросов
+    и повторы одного текста запроса (N+1).
+    """
+    violations = []
+    if SQL_QUERY_BUDGET and stats.count > SQL_QUERY_BUDGET:
+        violations.append(f"{stats.count} queries, budget {SQL_QUERY_BUDGET}")
+    if SQL_REPEATED_QUERY_LIMIT:
+        for statement, count in stats.repeated(SQL_REPEATED_QUERY_LIMIT):
+            violations.append(f"{count} repeats: {' '.join(statement.split())[:200]}")
+    return violations
+
+
+async def sql_instrumentation(request: Request, call_next):
+    """
+    Считает SQL-запросы и время в базе на каждый HTTP-запрос, отдаёт их
+    в заголовке Server-Timing и в журнале app.request. При SQL_GUARD_MODE
+    warn/raise сообщает о превышении бюджета запросов и N+1.
+    Запросы, выполняемые при потоковой отдаче тела ответа, не учитываются.
+    """
+    stats = RequestQueryStats()
+    token = current_query_stats.set(stats)
+    start = time.perf_counter()
+    try:
+        response = await call_next(request)
+    finally:
+        current_query_stats.reset(token)
+    duration = time.perf_counter() - start
+
+    violations = query_guard_violations(stats) if SQL_GUARD_MODE != "off" else []
+    if violations and SQL_GUARD_MODE == "raise":
+        response = JSONResponse(
+            status_code=500,
+            content={"detail": "SQL query budget exceeded", "violations": violations},
+        )
+    if SQL_SERVER_TIMING:
+        response.headers["Server-Timing"] = (
+            f'db;dur={stats.duration * 1000:.2f};desc="{stats.count} queries", '
+            f"app;dur={duration * 1000:.2f}"
+        )
+
+    record = {
+        "event": "request",
+        "method": request.method,
+        "path": request.url.path,
+        "status": response.status_code,
+        "duration_ms": round(duration * 1000, 2),
+        "db_queries": stats.count,
+        "db_ms": round(stats.duration * 1000, 2),
+    }
+    if violations:
+        record["violations"] = violations
+        request_logger.warning(json.dumps(record, ensure_ascii=False))
+    else:
+        request_logger.info(json.dumps(record, ensure_ascii=False))
+    return response
+
+
+async def http_metrics(request: Request, call_next):
+    """
+    Число запросов, задержка по шаблону маршрута (например, /products/{product_id})
+    и число запросов в обработке. Запросы к несуществующим маршрутам
+    объединяются под меткой unmatched, чтобы не раздувать число рядов.
+    """
+    http_requests_in_flight.inc()
+    start = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        duration = time.perf_counter() - start
+        http_requests_in_flight.dec()
+        route = request.scope.get("route")
+        route_path = getattr(route, "path", "unmatched")
+        http_requests_total.inc(request.method, route_path, str(status))
+        http_request_duration_seconds.observe(duration, request.method, route_path)
@@ -0,0 +1,72 @@
+"""Add keyset pagination indexes for reviews
+
+Revision ID: 14517706919d
+Revises: b404912ff59d
+Create Date: 2026-10-16 18:41:07.512380
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "14517706919d"
+down_revision: Union[str, Sequence[str], None] = "b404912ff59d"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Частичные индексы написаны вручную и повторяют __table_args__ модели
+    # Review: при повторной генерации миграции сохраните условия WHERE
+    # (postgresql_where/sqlite_where), иначе индексы станут полными
+    op.create_index(
+        "ix_reviews_comment_date_active",
+        "reviews",
+        ["comment_date", "id"],
+        unique=False,
+        postgresql_where=sa.text("is_active"),
+        sqlite_where=sa.text("is_active = 1"),
+    )
+    op.create_index(
+        "ix_reviews_product_id_comment_date_active",
+        "reviews",
+        ["product_id", "comment_date", "id"],
+        unique=False,
+        postgresql_where=sa.text("is_active"),
+        sqlite_where=sa.text("is_active = 1"),
+    )
+    op.create_index(
+        "ix_reviews_product_id_grade_active",
+        "reviews",
+        ["product_id", "grade", "comment_date", "id"],
+        unique=False,
+        postgresql_where=sa.text("is_active"),
+        sqlite_where=sa.text("is_active = 1"),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # Удаление частичных индексов, написанных вручную
+    op.drop_index(
+        "ix_reviews_product_id_grade_active",
+        table_name="reviews",
+        postgresql_where=sa.text("is_active"),
+        sqlite_where=sa.text("is_active = 1"),
+    )
+    op.drop_index(
+        "ix_reviews_product_id_comment_date_active",
+        table_name="reviews",
+        postgresql_where=sa.text("is_active"),
+        sqlite_where=sa.text("is_active = 1"),
+    )
+    op.drop_index(
+        "ix_reviews_comment_date_active",
+        table_name="reviews",
+        postgresql_where=sa.text("is_active"),
+        sqlite_where=sa.text("is_active = 1"),
+    )
@@ -0,0 +1,44 @@
+"""Add keyset pagination index for products
+
+Revision ID: 2d20022dc982
+Revises: ebe813b2a44d
+Create Date: 2026-10-16 10:12:41.318205
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "2d20022dc982"
+down_revision: Union[str, Sequence[str], None] = "ebe813b2a44d"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Частичные индексы написаны вручную и повторяют __table_args__ модели
+    # Product: при повторной генерации миграции сохраните условия WHERE
+    # (postgresql_where/sqlite_where), иначе индексы станут полными
+    op.create_index(
+        "ix_products_category_id_id_active",
+        "products",
+        ["category_id", "id"],
+        unique=False,
+        postgresql_where=sa.text("is_active"),
+        sqlite_where=sa.text("is_active = 1"),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # Удаление частичных индексов, написанных вручную
+    op.drop_index(
+        "ix_products_category_id_id_active",
+        table_name="products",
+        postgresql_where=sa.text("is_active"),
+        sqlite_where=sa.text("is_active = 1"),
+    )
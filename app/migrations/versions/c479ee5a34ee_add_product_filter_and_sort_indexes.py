@@ -0,0 +1,100 @@
+"""Add product filter and sort indexes
+
+Revision ID: c479ee5a34ee
+Revises: 2d20022dc982
+Create Date: 2026-10-16 12:40:07.914362
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "c479ee5a34ee"
+down_revision: Union[str, Sequence[str], None] = "2d20022dc982"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Частичные индексы написаны вручную и повторяют __table_args__ модели
+    # Product: при повторной генерации миграции сохраните условия WHERE
+    # (postgresql_where/sqlite_where), иначе индексы станут полными
+    op.create_index(
+        "ix_products_category_id_price_active",
+        "products",
+        ["category_id", "price", "id"],
+        unique=False,
+        postgresql_where=sa.text("is_active"),
+        sqlite_where=sa.text("is_active = 1"),
+    )
+    op.create_index(
+        "ix_products_category_id_rating_active",
+        "products",
+        ["category_id", "rating", "id"],
+        unique=False,
+        postgresql_where=sa.text("is_active"),
+        sqlite_where=sa.text("is_active = 1"),
+    )
+    op.create_index(
+        "ix_products_price_active",
+        "products",
+        ["price", "id"],
+        unique=False,
+        postgresql_where=sa.text("is_active"),
+        sqlite_where=sa.text("is_active = 1"),
+    )
+    op.create_index(
+        "ix_products_rating_active",
+        "products",
+        ["rating", "id"],
+        unique=False,
+        postgresql_where=sa.text("is_active"),
+        sqlite_where=sa.text("is_active = 1"),
+    )
+    op.create_index(
+        "ix_products_seller_id_id_active",
+        "products",
+        ["seller_id", "id"],
+        unique=False,
+        postgresql_where=sa.text("is_active"),
+        sqlite_where=sa.text("is_active = 1"),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # Удаление частичных индексов, написанных вручную
+    op.drop_index(
+        "ix_products_seller_id_id_active",
+        table_name="products",
+        postgresql_where=sa.text("is_active"),
+        sqlite_where=sa.text("is_active = 1"),
+    )
+    op.drop_index(
+        "ix_products_rating_active",
+        table_name="products",
+        postgresql_where=sa.text("is_active"),
+        sqlite_where=sa.text("is_active = 1"),
+    )
+    op.drop_index(
+        "ix_products_price_active",
+        table_name="products",
+        postgresql_where=sa.text("is_active"),
+        sqlite_where=sa.text("is_active = 1"),
+    )
+    op.drop_index(
+        "ix_products_category_id_rating_active",
+        table_name="products",
+        postgresql_where=sa.text("is_active"),
+        sqlite_where=sa.text("is_active = 1"),
+    )
+    op.drop_index(
+        "ix_products_category_id_price_active",
+        table_name="products",
+        postgresql_where=sa.text("is_active"),
+        sqlite_where=sa.text("is_active = 1"),
+    )
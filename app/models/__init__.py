@@ -1,6 +1,21 @@
+from .carts import CartItem
 from .categories import Category
+from .jobs import BackgroundJob
+from .orders import Order, OrderItem
 from .products import Product
 from .reviews import Review
+from .stock import StockReservation, StockShard
 from .users import User
 
-__all__ = ["Category", "Product", "User", "Review"]
+__all__ = [
+    "Category",
+    "Product",
+    "User",
+    "Review",
+    "StockReservation",
+    "StockShard",
+    "CartItem",
+    "Order",
+    "OrderItem",
+    "BackgroundJob",
+]
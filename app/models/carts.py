@@ -0,0 +1,24 @@
+from datetime import datetime
+
+from sqlalchemy import TIMESTAMP, ForeignKey, Integer
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.database import Base
+
+
+class CartItem(Base):
+    """
+    Строка корзины покупателя: у каждого пользователя одна корзина,
+    товар встречается в ней не больше одного раза.
+    """
+
+    __tablename__ = "cart_items"
+
+    user_id: Mapped[int] = mapped_column(
+        Integer, ForeignKey("users.id"), primary_key=True
+    )
+    product_id: Mapped[int] = mapped_column(
+        Integer, ForeignKey("products.id"), primary_key=True
+    )
+    quantity: Mapped[int] = mapped_column(Integer, nullable=False)
+    added_at: Mapped[datetime] = mapped_column(TIMESTAMP, default=datetime.now)
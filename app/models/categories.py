@@ -10,9 +10,11 @@ class Category(Base):
     id: Mapped[int] = mapped_column(primary_key=True)
     name: Mapped[str] = mapped_column(String(50), nullable=False)
     parent_id: Mapped[int | None] = mapped_column(
-        ForeignKey("categories.id"), nullable=True
+        ForeignKey("categories.id"), nullable=True, index=True
     )
     is_active: Mapped[bool] = mapped_column(Boolean, default=True)
+    # Причина неактивности, см. app/soft_delete.py
+    inactive_reason: Mapped[str | None] = mapped_column(String(20), nullable=True)
 
     products: Mapped[list["Product"]] = relationship(
         "Product", back_populates="category"
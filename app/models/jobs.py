@@ -0,0 +1,38 @@
+from datetime import datetime
+
+from sqlalchemy import (TIMESTAMP, Boolean, Index, Integer, String, Text,
+                        UniqueConstraint, false, text)
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.database import Base
+
+
+class BackgroundJob(Base):
+    """
+    Задача очереди JOB_QUEUE_BACKEND=database (см. app/jobs.py).
+    """
+
+    __tablename__ = "background_jobs"
+    __table_args__ = (
+        # Одна ожидающая задача на имя и ключ: повторные постановки схлопываются
+        UniqueConstraint("name", "key", name="uq_background_jobs_name_key"),
+        # Выбор задач, срок запуска которых наступил
+        Index("ix_background_jobs_run_at", "run_at"),
+    )
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    name: Mapped[str] = mapped_column(String(50), nullable=False)
+    key: Mapped[str] = mapped_column(String(100), nullable=False)
+    run_at: Mapped[datetime] = mapped_column(TIMESTAMP, nullable=False)
+    attempts: Mapped[int] = mapped_column(
+        Integer, nullable=False, default=0, server_default=text("0")
+    )
+    # Задача выполняется воркером до этого момента; NULL — ожидает запуска
+    locked_until: Mapped[datetime | None] = mapped_column(TIMESTAMP, nullable=True)
+    # Задачу поставили повторно во время выполнения: после него она
+    # запускается ещё раз вместо удаления
+    rerun: Mapped[bool] = mapped_column(
+        Boolean, nullable=False, default=False, server_default=false()
+    )
+    last_error: Mapped[str | None] = mapped_column(Text, nullable=True)
+    created_at: Mapped[datetime] = mapped_column(TIMESTAMP, default=datetime.now)
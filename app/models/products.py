@@ -1,6 +1,8 @@
 from decimal import Decimal
 
-from sqlalchemy import Boolean, ForeignKey, Integer, Numeric, String, text
+from sqlalchemy import (Boolean, ForeignKey, Index, Integer, Numeric, String,
+                        Text, text)
+from sqlalchemy.dialects.postgresql import TSVECTOR
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.database import Base
@@ -8,6 +10,61 @@ from app.database import Base
 
 class Product(Base):
     __tablename__ = "products"
+    # Частичные индексы по активным строкам. SQLite применяет частичный индекс,
+    # только если условие запроса буквально совпадает с условием индекса, а
+    # is_active == True компилируется в SQLite как is_active = 1
+    __table_args__ = (
+        # Keyset-пагинация списка товаров категории: (category_id, id) по активным
+        Index(
+            "ix_products_category_id_id_active",
+            "category_id",
+            "id",
+            postgresql_where=text("is_active"),
+            sqlite_where=text("is_active = 1"),
+        ),
+        # Фильтры и сортировки каталога (GET /products/)
+        Index(
+            "ix_products_category_id_price_active",
+            "category_id",
+            "price",
+            "id",
+            postgresql_where=text("is_active"),
+            sqlite_where=text("is_active = 1"),
+        ),
+        Index(
+            "ix_products_category_id_rating_active",
+            "category_id",
+            "rating",
+            "id",
+            postgresql_where=text("is_active"),
+            sqlite_where=text("is_active = 1"),
+        ),
+        Index(
+            "ix_products_price_active",
+            "price",
+            "id",
+            postgresql_where=text("is_active"),
+            sqlite_where=text("is_active = 1"),
+        ),
+        Index(
+            "ix_products_rating_active",
+            "rating",
+            "id",
+            postgresql_where=text("is_active"),
+            sqlite_where=text("is_active = 1"),
+        ),
+        Index(
+            "ix_products_seller_id_id_active",
+            "seller_id",
+            "id",
+            postgresql_where=text("is_active"),
+            sqlite_where=text("is_active = 1"),
+        ),
+        # Полнотекстовый поиск (только PostgreSQL, в SQLite используется FTS5)
+        Index(
+            "ix_products_search_vector", "search_vector", postgresql_using="gin"
+        ).ddl_if(dialect="postgresql"),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True)
     name: Mapped[str] = mapped_column(String(100), nullable=False)
@@ -16,6 +73,8 @@ class Product(Base):
     image_url: Mapped[str | None] = mapped_column(String(200), nullable=True)
     stock: Mapped[int] = mapped_column(Integer, nullable=True)
     is_active: Mapped[bool] = mapped_column(Boolean, default=True)
+    # Причина неактивности, см. app/soft_delete.py
+    inactive_reason: Mapped[str | None] = mapped_column(String(20), nullable=True)
     category_id: Mapped[int] = mapped_column(
         Integer, ForeignKey("categories.id"), nullable=False
     )
@@ -25,6 +84,25 @@ class Product(Base):
     rating: Mapped[float] = mapped_column(
         Numeric, default=0.0, server_default=text("0")
     )
+    # Сумма и количество оценок активных отзывов, см. app/ratings.py
+    rating_sum: Mapped[int] = mapped_column(
+        Integer, nullable=False, default=0, server_default=text("0")
+    )
+    rating_count: Mapped[int] = mapped_column(
+        Integer, nullable=False, default=0, server_default=text("0")
+    )
+    # Число шардов остатка; 0 — остаток хранится в stock (см. app/stock.py)
+    stock_shard_count: Mapped[int] = mapped_column(
+        Integer, nullable=False, default=0, server_default=text("0")
+    )
+    # Версия строки, увеличивается при каждом изменении товара (ETag)
+    version: Mapped[int] = mapped_column(
+        Integer, nullable=False, default=1, server_default=text("1")
+    )
+    # Заполняется триггером в PostgreSQL, см. app/search.py
+    search_vector: Mapped[str | None] = mapped_column(
+        TSVECTOR().with_variant(Text(), "sqlite"), nullable=True, deferred=True
+    )
 
     category: Mapped["Category"] = relationship("Category", back_populates="products")
     seller: Mapped["User"] = relationship("User", back_populates="products")
@@ -1,6 +1,7 @@
 from datetime import datetime
 
-from sqlalchemy import TIMESTAMP, Boolean, ForeignKey, Integer, Text
+from sqlalchemy import (TIMESTAMP, Boolean, ForeignKey, Index, Integer, String,
+                        Text, text)
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.database import Base
@@ -8,6 +9,34 @@ from app.database import Base
 
 class Review(Base):
     __tablename__ = "reviews"
+    __table_args__ = (
+        # Keyset-пагинация активных отзывов: по товару и по всему списку,
+        # сначала новые или по оценке
+        Index(
+            "ix_reviews_product_id_comment_date_active",
+            "product_id",
+            "comment_date",
+            "id",
+            postgresql_where=text("is_active"),
+            sqlite_where=text("is_active = 1"),
+        ),
+        Index(
+            "ix_reviews_product_id_grade_active",
+            "product_id",
+            "grade",
+            "comment_date",
+            "id",
+            postgresql_where=text("is_active"),
+            sqlite_where=text("is_active = 1"),
+        ),
+        Index(
+            "ix_reviews_comment_date_active",
+            "comment_date",
+            "id",
+            postgresql_where=text("is_active"),
+            sqlite_where=text("is_active = 1"),
+        ),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
     user_id: Mapped[int] = mapped_column(
@@ -20,6 +49,8 @@ class Review(Base):
     comment_date: Mapped[datetime] = mapped_column(TIMESTAMP, default=datetime.now)
     grade: Mapped[int] = mapped_column(Integer, nullable=False)  # Оценка от 1 до 5
     is_active: Mapped[bool] = mapped_column(Boolean, default=True)
+    # Причина неактивности, см. app/soft_delete.py
+    inactive_reason: Mapped[str | None] = mapped_column(String(20), nullable=True)
 
     product: Mapped["Product"] = relationship("Product", back_populates="reviews")
     user: Mapped["User"] = relationship("User", back_populates="reviews")
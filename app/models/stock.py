@@ -0,0 +1,44 @@
+from datetime import datetime
+
+from sqlalchemy import TIMESTAMP, ForeignKey, Index, Integer, String
+from sqlalchemy.orm import Mapped, mapped_column, relationship
+
+from app.database import Base
+
+
+class StockReservation(Base):
+    __tablename__ = "stock_reservations"
+    __table_args__ = (
+        # Поиск истёкших активных резерваций фоновой задачей
+        Index("ix_stock_reservations_status_expires_at", "status", "expires_at"),
+    )
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    product_id: Mapped[int] = mapped_column(
+        Integer, ForeignKey("products.id"), nullable=False, index=True
+    )
+    user_id: Mapped[int] = mapped_column(
+        Integer, ForeignKey("users.id"), nullable=False, index=True
+    )
+    quantity: Mapped[int] = mapped_column(Integer, nullable=False)
+    status: Mapped[str] = mapped_column(
+        String(20), nullable=False, default="active"
+    )  # active, confirmed, released или expired
+    created_at: Mapped[datetime] = mapped_column(TIMESTAMP, default=datetime.now)
+    expires_at: Mapped[datetime] = mapped_column(TIMESTAMP, nullable=False)
+
+    product: Mapped["Product"] = relationship("Product")
+
+
+class StockShard(Base):
+    """
+    Часть остатка товара в режиме шардированного счётчика (см. app/stock.py).
+    """
+
+    __tablename__ = "stock_shards"
+
+    product_id: Mapped[int] = mapped_column(
+        Integer, ForeignKey("products.id"), primary_key=True
+    )
+    shard: Mapped[int] = mapped_column(Integer, primary_key=True)
+    stock: Mapped[int] = mapped_column(Integer, nullable=False)
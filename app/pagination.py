@@ -0,0 +1,85 @@
+# --------------- Курсорная (keyset) пагинация -------------------------
+import base64
+import binascii
+import json
+from collections.abc import Sequence
+from datetime import datetime
+from typing import Any
+
+from fastapi import HTTPException, status
+from sqlalchemy import Select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import InstrumentedAttribute
+
+from app.projection import rows_to_dicts
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    """
+    Кодирует значения ключа сортировки последней записи страницы в непрозрачный курсор.
+    """
+    raw = json.dumps(list(values), default=str, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, columns: Sequence[InstrumentedAttribute]) -> list[Any]:
+    """
+    Декодирует курсор и приводит значения к типам столбцов сортировки.
+    При повреждённом или чужом курсоре возвращает 400.
+    """
+    invalid_cursor = HTTPException(
+        status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor"
+    )
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        values = json.loads(raw)
+    except (binascii.Error, ValueError):
+        raise invalid_cursor
+    if not isinstance(values, list) or len(values) != len(columns):
+        raise invalid_cursor
+
+    try:
+        result = []
+        for column, value in zip(columns, values):
+            python_type = column.type.python_type
+            if python_type is datetime:
+                result.append(datetime.fromisoformat(value))
+            else:
+                result.append(python_type(value))
+    except (TypeError, ValueError, ArithmeticError):
+        raise invalid_cursor
+    return result
+
+
+async def paginate(
+    db: AsyncSession,
+    stmt: Select,
+    columns: Sequence[InstrumentedAttribute],
+    cursor: str | None,
+    limit: int,
+    descending: bool = False,
+) -> dict:
+    """
+    Возвращает страницу результатов запроса, упорядоченного по columns.
+    Последним столбцом должен быть уникальный ключ (обычно id), чтобы порядок был строгим.
+    Вместо OFFSET используется условие по ключу последней записи, поэтому стоимость
+    выборки страницы не зависит от её глубины.
+    Запрос выбирает столбцы, а не ORM-объекты (см. app/projection.py), и среди
+    них должны быть столбцы сортировки; элементы страницы — словари.
+    """
+    if cursor is not None:
+        values = decode_cursor(cursor, columns)
+        key = tuple_(*columns)
+        stmt = stmt.where(
+            key < tuple_(*values) if descending else key > tuple_(*values)
+        )
+
+    order_by = [column.desc() if descending else column.asc() for column in columns]
+    result = await db.execute(stmt.order_by(*order_by).limit(limit + 1))
+    items = rows_to_dicts(result.all())
+
+    next_cursor = None
+    if len(items) > limit:
+        items = items[:limit]
+        next_cursor = encode_cursor([items[-1][c.key] for c in columns])
+    return {"items": items, "next_cursor": next_cursor}
@@ -0,0 +1,117 @@
+# --------------- Кеш аутентифицированных пользователей -------------------------
+# get_current_user вызывается на каждый защищённый запрос. Вместо выборки из
+# таблицы users на каждый запрос данные пользователя (id, email, роль)
+# хранятся в памяти воркера ограниченное время. Изменение роли или
+# деактивация пользователя через ORM сразу вытесняют запись из кеша,
+# TTL ограничивает устаревание в других воркерах.
+import time
+from collections import OrderedDict
+
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import ORMExecuteState, Session
+
+from app.config import PRINCIPAL_CACHE_MAX_ENTRIES, PRINCIPAL_CACHE_TTL
+from app.models.users import User as UserModel
+from app.schemas import User as UserSchema
+
+
+class PrincipalCache:
+    """
+    LRU-кеш пользователей по email (subject токена) с TTL.
+    """
+
+    def __init__(
+        self,
+        ttl: float = PRINCIPAL_CACHE_TTL,
+        max_entries: int = PRINCIPAL_CACHE_MAX_ENTRIES,
+    ):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        # email -> (expires_at, user)
+        self._entries: OrderedDict[str, tuple[float, UserSchema]] = OrderedDict()
+
+    def get(self, email: str) -> UserSchema | None:
+        """
+        Возвращает пользователя по email или None, если записи нет или она устарела.
+        """
+        entry = self._entries.get(email)
+        if entry is None:
+            return None
+        if entry[0] <= time.monotonic():
+            del self._entries[email]
+            return None
+        self._entries.move_to_end(email)
+        return entry[1]
+
+    def set(self, user: UserSchema) -> None:
+        """
+        Сохраняет активного пользователя.
+        """
+        if self.ttl <= 0:
+            return
+        self._entries[user.email] = (time.monotonic() + self.ttl, user)
+        self._entries.move_to_end(user.email)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def evict(self, email: str) -> None:
+        """
+        Удаляет пользователя из кеша.
+        """
+        self._entries.pop(email, None)
+
+    def clear(self) -> None:
+        """
+        Полностью очищает кеш.
+        """
+        self._entries.clear()
+
+
+principal_cache = PrincipalCache()
+
+# Атрибуты пользователя, изменение которых должно сбрасывать кеш
+_PRINCIPAL_ATTRIBUTES = ("email", "role", "is_active")
+
+
+@event.listens_for(Session, "after_flush")
+def _evict_changed_users(session: Session, flush_context) -> None:
+    """
+    Вытесняет пользователей, у которых при flush изменились роль, email
+    или активность. Повторно вытесняет их после commit, чтобы в кеш не
+    попали старые данные, прочитанные параллельным запросом до фиксации.
+    """
+    emails = session.info.setdefault("evicted_principals", set())
+    for obj in session.deleted:
+        if isinstance(obj, UserModel):
+            emails.add(obj.email)
+    for obj in session.dirty:
+        if not isinstance(obj, UserModel):
+            continue
+        attrs = inspect(obj).attrs
+        if any(attrs[name].history.has_changes() for name in _PRINCIPAL_ATTRIBUTES):
+            # При смене email вытесняется и запись под старым адресом
+            emails.update(attrs.email.history.deleted)
+            emails.add(obj.email)
+    for email in emails:
+        principal_cache.evict(email)
+
+
+@event.listens_for(Session, "after_commit")
+def _evict_committed_users(session: Session) -> None:
+    for email in session.info.pop("evicted_principals", ()):
+        principal_cache.evict(email)
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_evicted_users(session: Session) -> None:
+    session.info.pop("evicted_principals", None)
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _evict_on_bulk_update(state: ORMExecuteState) -> None:
+    """
+    Массовые UPDATE/DELETE по таблице users не дают списка затронутых
+    строк, поэтому кеш сбрасывается целиком.
+    """
+    if (state.is_update or state.is_delete) and state.bind_mapper is inspect(UserModel):
+        principal_cache.clear()
@@ -0,0 +1,38 @@
+# --------------- Списки без ORM-объектов -------------------------
+# Списочные эндпоинты выбирают только столбцы схемы ответа и получают строки
+# вместо ORM-объектов: без identity map, состояния экземпляров и чтения
+# атрибутов через from_attributes. Строки превращаются в словари и проходят
+# через кешированный TypeAdapter схемы ответа сразу в байты JSON.
+from collections.abc import Sequence
+from typing import Any
+
+from fastapi import Response
+from pydantic import BaseModel, TypeAdapter
+from sqlalchemy import Row
+from sqlalchemy.orm import InstrumentedAttribute
+
+
+def schema_columns(model: type, schema: type[BaseModel]) -> list[InstrumentedAttribute]:
+    """
+    Столбцы модели, соответствующие полям схемы ответа, в порядке полей схемы.
+    """
+    return [getattr(model, name) for name in schema.model_fields]
+
+
+def rows_to_dicts(rows: Sequence[Row]) -> list[dict[str, Any]]:
+    """
+    Превращает строки результата в словари {имя столбца: значение}.
+    """
+    if not rows:
+        return []
+    keys = rows[0]._fields
+    return [dict(zip(keys, row)) for row in rows]
+
+
+def json_response(adapter: TypeAdapter, data: Any) -> Response:
+    """
+    Проверяет данные по схеме ответа и возвращает готовый JSON-ответ.
+    Повторная проверка response_model FastAPI при этом не выполняется.
+    """
+    body = adapter.dump_json(adapter.validate_python(data))
+    return Response(content=body, media_type="application/json")
@@ -0,0 +1,119 @@
+# --------------- Агрегаты рейтинга товаров -------------------------
+# Товар хранит сумму и количество оценок активных отзывов (rating_sum,
+# rating_count), средний рейтинг rating выводится из них в том же UPDATE.
+# Изменение отзыва корректирует агрегаты за O(1) в транзакции самого отзыва,
+# поэтому они не расходятся с отзывами даже при падении воркера. Вне запроса
+# выполняется только сброс кеша: фоновая задача product_rating (app/jobs.py),
+# и серия отзывов на один товар даёт один сброс. Полный пересчёт по отзывам
+# нужен только rebuild_ratings и восстановлению скрытых товаров
+# (app/soft_delete.py).
+from sqlalchemy import ColumnElement, case, func, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.cache import PRODUCTS_RATING, product_tag, response_cache
+from app.jobs import job_queue
+from app.models.products import Product as ProductModel
+from app.models.reviews import Review as ReviewModel
+
+# Имя фоновой задачи сброса кеша рейтинга товара, ключ — id товара
+PRODUCT_RATING_JOB = "product_rating"
+
+
+def average_rating(
+    rating_sum: ColumnElement, rating_count: ColumnElement
+) -> ColumnElement:
+    """
+    SQL-выражение среднего рейтинга (0 при отсутствии оценок).
+    Умножение на 1.0 исключает целочисленное деление в SQLite и PostgreSQL.
+    """
+    return case((rating_count > 0, rating_sum * 1.0 / rating_count), else_=0)
+
+
+def review_aggregates() -> tuple[ColumnElement, ColumnElement]:
+    """
+    Подзапросы суммы и количества оценок активных отзывов товара
+    для UPDATE по таблице products.
+    """
+    active_reviews = (ReviewModel.product_id == ProductModel.id) & (
+        ReviewModel.is_active == True
+    )
+    review_sum = (
+        select(func.coalesce(func.sum(ReviewModel.grade), 0))
+        .where(active_reviews)
+        .scalar_subquery()
+    )
+    review_count = select(func.count()).where(active_reviews).scalar_subquery()
+    return review_sum, review_count
+
+
+def rating_values(review_sum: ColumnElement, review_count: ColumnElement) -> dict:
+    """
+    Значения SET для записи агрегатов рейтинга товара.
+    """
+    return {
+        "rating_sum": review_sum,
+        "rating_count": review_count,
+        "rating": average_rating(review_sum, review_count),
+        "version": ProductModel.version + 1,
+    }
+
+
+async def apply_review_grade(
+    db: AsyncSession, product_id: int, grade: int, delta: int
+) -> None:
+    """
+    Атомарно добавляет (delta=1) или убирает (delta=-1) оценку из агрегатов
+    товара в текущей транзакции. Правые части SET вычисляются по старым
+    значениям строки, поэтому параллельные отзывы не теряют обновлений.
+    """
+    rating_sum = ProductModel.rating_sum + grade * delta
+    rating_count = ProductModel.rating_count + delta
+    await db.execute(
+        update(ProductModel)
+        .where(ProductModel.id == product_id)
+        .values(
+            rating_sum=rating_sum,
+            rating_count=rating_count,
+            rating=average_rating(rating_sum, rating_count),
+            version=ProductModel.version + 1,
+        )
+        .execution_options(synchronize_session=False)
+    )
+
+
+@job_queue.handler(PRODUCT_RATING_JOB)
+async def invalidate_product_rating(key: str) -> None:
+    """
+    Фоновая задача: сбрасывает кеш товара и списков по рейтингу после
+    изменения его отзывов. Если задача потеряна (очередь memory при падении
+    воркера), кеш устаревает не дольше CACHE_TTL, а агрегаты в базе верны.
+    """
+    await response_cache.invalidate(product_tag(int(key)), PRODUCTS_RATING)
+
+
+async def rebuild_ratings(db: AsyncSession, batch_size: int = 10000) -> int:
+    """
+    Пересчитывает агрегаты рейтинга из таблицы reviews по диапазонам id товаров,
+    фиксируя каждый диапазон отдельной транзакцией. Обновляются только
+    разошедшиеся строки. Возвращает количество исправленных товаров.
+    """
+    review_sum, review_count = review_aggregates()
+    max_id = await db.scalar(select(func.max(ProductModel.id))) or 0
+    fixed = 0
+    for start in range(0, max_id + 1, batch_size):
+        result = await db.execute(
+            update(ProductModel)
+            .where(
+                ProductModel.id >= start,
+                ProductModel.id < start + batch_size,
+                or_(
+                    ProductModel.rating_count != review_count,
+                    ProductModel.rating_sum != review_sum,
+                ),
+            )
+            .values(**rating_values(review_sum, review_count))
+            .execution_options(synchronize_session=False)
+        )
+        await db.commit()
+        fixed += result.rowcount
+    return fixed
@@ -0,0 +1,138 @@
+from decimal import Decimal
+from typing import Annotated
+
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy import delete, func, select
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.auth import get_current_buyer
+from app.config import CART_MAX_ITEMS
+from app.db_depends import get_async_db
+from app.models.carts import CartItem as CartItemModel
+from app.models.products import Product as ProductModel
+from app.schemas import Cart as CartSchema
+from app.schemas import CartItemUpdate
+from app.schemas import User as UserSchema
+
+router = APIRouter(prefix="/cart", tags=["cart"])
+
+# Строки корзины вместе с текущими названием и ценой товаров одним запросом
+CART_COLUMNS = (
+    CartItemModel.product_id,
+    ProductModel.name,
+    ProductModel.price,
+    CartItemModel.quantity,
+    CartItemModel.added_at,
+)
+
+
+async def load_cart(db: AsyncSession, user_id: int) -> dict:
+    """
+    Корзина пользователя с текущими ценами товаров.
+    """
+    result = await db.execute(
+        select(*CART_COLUMNS)
+        .join(ProductModel, ProductModel.id == CartItemModel.product_id)
+        .where(CartItemModel.user_id == user_id)
+        .order_by(CartItemModel.added_at, CartItemModel.product_id)
+    )
+    items = [row._asdict() for row in result]
+    total = sum((item["price"] * item["quantity"] for item in items), Decimal("0.00"))
+    return {"items": items, "total_amount": total}
+
+
+@router.get("/", response_model=CartSchema)
+async def get_cart(
+    current_user: Annotated[UserSchema, Depends(get_current_buyer)],
+    db: Annotated[AsyncSession, Depends(get_async_db)],
+):
+    """
+    Возвращает корзину текущего покупателя.
+    """
+    return await load_cart(db, current_user.id)
+
+
+@router.put("/items/{product_id}", response_model=CartSchema)
+async def set_cart_item(
+    product_id: int,
+    item: CartItemUpdate,
+    current_user: Annotated[UserSchema, Depends(get_current_buyer)],
+    db: Annotated[AsyncSession, Depends(get_async_db)],
+):
+    """
+    Добавляет товар в корзину текущего покупателя или меняет его количество.
+    Остаток не резервируется и проверяется при оформлении заказа.
+    """
+    product_exists = await db.scalar(
+        select(ProductModel.id).where(
+            ProductModel.id == product_id, ProductModel.is_active == True
+        )
+    )
+    if product_exists is None:
+        raise HTTPException(status_code=404, detail="Product not found")
+
+    item_count = await db.scalar(
+        select(func.count()).where(
+            CartItemModel.user_id == current_user.id,
+            CartItemModel.product_id != product_id,
+        )
+    )
+    if item_count >= CART_MAX_ITEMS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Cart can hold at most {CART_MAX_ITEMS} products",
+        )
+
+    if db.get_bind().dialect.name == "postgresql":
+        stmt = postgresql_insert(CartItemModel)
+    else:
+        stmt = sqlite_insert(CartItemModel)
+    stmt = stmt.values(
+        user_id=current_user.id, product_id=product_id, quantity=item.quantity
+    )
+    await db.execute(
+        stmt.on_conflict_do_update(
+            index_elements=[CartItemModel.user_id, CartItemModel.product_id],
+            set_={"quantity": stmt.excluded.quantity},
+        )
+    )
+    await db.commit()
+    return await load_cart(db, current_user.id)
+
+
+@router.delete("/items/{product_id}", response_model=CartSchema)
+async def delete_cart_item(
+    product_id: int,
+    current_user: Annotated[UserSchema, Depends(get_current_buyer)],
+    db: Annotated[AsyncSession, Depends(get_async_db)],
+):
+    """
+    Удаляет товар из корзины текущего покупателя.
+    """
+    result = await db.execute(
+        delete(CartItemModel).where(
+            CartItemModel.user_id == current_user.id,
+            CartItemModel.product_id == product_id,
+        )
+    )
+    if result.rowcount == 0:
+        raise HTTPException(status_code=404, detail="Product not in cart")
+    await db.commit()
+    return await load_cart(db, current_user.id)
+
+
+@router.delete("/", response_model=CartSchema)
+async def clear_cart(
+    current_user: Annotated[UserSchema, Depends(get_current_buyer)],
+    db: Annotated[AsyncSession, Depends(get_async_db)],
+):
+    """
+    Очищает корзину текущего покупателя.
+    """
+    await db.execute(
+        delete(CartItemModel).where(CartItemModel.user_id == current_user.id)
+    )
+    await db.commit()
+    return {"items": [], "total_amount": Decimal("0.00")}
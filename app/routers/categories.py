@@ -1,28 +1,61 @@
 from typing import Annotated
 
 from fastapi import APIRouter, Depends, HTTPException, status
+from pydantic import TypeAdapter
 from sqlalchemy import select, update
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.auth import get_current_admin
-from app.db_depends import get_async_db
+from app.cache import (CATEGORIES, PRODUCTS_ALL, cache_key, category_tag,
+                       response_cache)
+from app.category_tree import category_subtree_cte, category_tree_cache
+from app.db_depends import cache_generation, get_async_db, get_read_db
 from app.models.categories import Category as CategoryModel
 from app.models.users import User as UserModel
+from app.projection import rows_to_dicts, schema_columns
 from app.schemas import Category as CategorySchema
-from app.schemas import CategoryCreate
+from app.schemas import CategoryCreate, CategoryTreeNode
+from app.soft_delete import (deactivate_category_subtree,
+                             restore_category_subtree)
 
 router = APIRouter(prefix="/categories", tags=["categories"])
 
+category_list_adapter = TypeAdapter(list[CategorySchema])
+
+# Столбцы схемы ответа для списка категорий (см. app/projection.py)
+CATEGORY_COLUMNS = schema_columns(CategoryModel, CategorySchema)
+
 
 @router.get("/", response_model=list[CategorySchema])
-async def get_all_categories(db: AsyncSession = Depends(get_async_db)):
+async def get_all_categories(db: AsyncSession = Depends(get_read_db)):
     """
     Возвращает список всех активных категорий.
     """
-    stmt = select(CategoryModel).where(CategoryModel.is_active == True)
-    result = await db.scalars(stmt)
-    categories = result.all()
-    return categories
+    key = cache_key("categories")
+    response = await response_cache.cached_response(key)
+    if response is not None:
+        return response
+    generation = cache_generation(db)
+
+    stmt = select(*CATEGORY_COLUMNS).where(CategoryModel.is_active == True)
+    result = await db.execute(stmt)
+    categories = rows_to_dicts(result.all())
+    return await response_cache.store_response(
+        key,
+        category_list_adapter,
+        categories,
+        [CATEGORIES],
+        generation=generation,
+    )
+
+
+@router.get("/tree", response_model=list[CategoryTreeNode])
+async def get_category_tree(db: AsyncSession = Depends(get_async_db)):
+    """
+    Возвращает дерево активных категорий с количеством товаров в каждой категории
+    и во всём её поддереве. Отдаётся из снимка в памяти без запросов к базе.
+    """
+    return await category_tree_cache.get_tree(db)
 
 
 @router.post("/", response_model=CategorySchema, status_code=status.HTTP_201_CREATED)
@@ -52,6 +85,8 @@ async def create_category(
     db_category = CategoryModel(**category.model_dump())
     db.add(db_category)
     await db.commit()
+    category_tree_cache.invalidate()
+    await response_cache.invalidate(CATEGORIES)
     await db.refresh(db_category)
     return db_category
 
@@ -85,6 +120,16 @@ async def update_category(
         if parent is None:
             raise HTTPException(status_code=400, detail="Parent category not found")
 
+        # Проверка, что родитель не входит в поддерево самой категории (цикл)
+        subtree = category_subtree_cte(category_id)
+        cycle = await db.scalar(
+            select(subtree.c.id).where(subtree.c.id == category.parent_id)
+        )
+        if cycle is not None:
+            raise HTTPException(
+                status_code=400, detail="Category cannot be moved into its own subtree"
+            )
+
     # Обновление категории
     update_data = category.model_dump(exclude_unset=True)
     await db.execute(
@@ -93,6 +138,8 @@ async def update_category(
         .values(**update_data)
     )
     await db.commit()
+    category_tree_cache.invalidate()
+    await response_cache.invalidate(CATEGORIES, category_tag(category_id), PRODUCTS_ALL)
     await db.refresh(db_category)
     return db_category
 
@@ -106,7 +153,8 @@ async def delete_category(
     current_user: Annotated[UserModel, Depends(get_current_admin)],
 ):
     """
-    Логически удаляет категорию по её ID, устанавливая is_active=False.
+    Логически удаляет категорию по её ID вместе со всеми подкатегориями,
+    их товарами и отзывами на эти товары (см. app/soft_delete.py).
     """
     # Проверка наличия активной категории
     stmt = select(CategoryModel).where(
@@ -117,11 +165,51 @@ async def delete_category(
     if db_category is None:
         raise HTTPException(status_code=404, detail="Category not found")
 
-    # Логическое удаление категории (Установка is_active = False)
-    await db.execute(
-        update(CategoryModel)
-        .where(CategoryModel.id == category_id)
-        .values(is_active=False)
+    # Каскадное скрытие поддерева несколькими запросами по множествам строк
+    category_ids = await deactivate_category_subtree(db, category_id)
+    await db.commit()
+    category_tree_cache.invalidate()
+    await response_cache.invalidate(
+        CATEGORIES, PRODUCTS_ALL, *map(category_tag, category_ids)
+    )
+    await db.refresh(db_category)
+    return db_category
+
+
+@router.post("/{category_id}/restore", response_model=CategorySchema)
+async def restore_category(
+    category_id: int,
+    db: Annotated[AsyncSession, Depends(get_async_db)],
+    current_user: Annotated[UserModel, Depends(get_current_admin)],
+):
+    """
+    Восстанавливает удалённую категорию вместе с подкатегориями, товарами
+    и отзывами, скрытыми при её удалении.
+    """
+    # Восстановить можно только явно удалённую категорию под активным родителем
+    stmt = select(CategoryModel).where(
+        CategoryModel.id == category_id,
+        CategoryModel.is_active == False,
+        CategoryModel.inactive_reason == "deleted",
     )
+    result = await db.scalars(stmt)
+    db_category = result.first()
+    if db_category is None:
+        raise HTTPException(status_code=404, detail="Deleted category not found")
+    if db_category.parent_id is not None:
+        parent_active = await db.scalar(
+            select(CategoryModel.is_active).where(
+                CategoryModel.id == db_category.parent_id
+            )
+        )
+        if not parent_active:
+            raise HTTPException(status_code=400, detail="Parent category is inactive")
+
+    category_ids = await restore_category_subtree(db, category_id)
     await db.commit()
+    category_tree_cache.invalidate()
+    await response_cache.invalidate(
+        CATEGORIES, PRODUCTS_ALL, *map(category_tag, category_ids)
+    )
+    await db.refresh(db_category)
     return db_category
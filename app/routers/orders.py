@@ -0,0 +1,161 @@
+from typing import Annotated
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from pydantic import TypeAdapter
+from sqlalchemy import delete, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.auth import get_current_buyer, get_current_user
+from app.cache import PRODUCTS_ALL, product_tag, response_cache
+from app.config import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+from app.db_depends import get_async_db, get_read_db
+from app.models.carts import CartItem as CartItemModel
+from app.models.orders import Order as OrderModel
+from app.models.orders import OrderItem as OrderItemModel
+from app.models.products import Product as ProductModel
+from app.pagination import paginate
+from app.projection import json_response, schema_columns
+from app.schemas import CheckoutRequest
+from app.schemas import Order as OrderSchema
+from app.schemas import OrderDetail as OrderDetailSchema
+from app.schemas import OrderItem as OrderItemSchema
+from app.schemas import Page
+from app.schemas import User as UserSchema
+from app.stock import decrement_stock_bulk
+
+router = APIRouter(prefix="/orders", tags=["orders"])
+
+order_page_adapter = TypeAdapter(Page[OrderSchema])
+
+# Столбцы схемы ответа для списка заказов (см. app/projection.py)
+ORDER_COLUMNS = schema_columns(OrderModel, OrderSchema)
+ORDER_ITEM_COLUMNS = schema_columns(OrderItemModel, OrderItemSchema)
+
+
+@router.post("/", response_model=OrderDetailSchema, status_code=status.HTTP_201_CREATED)
+async def checkout(
+    current_user: Annotated[UserSchema, Depends(get_current_buyer)],
+    db: Annotated[AsyncSession, Depends(get_async_db)],
+    checkout_request: CheckoutRequest | None = None,
+):
+    """
+    Оформляет заказ из корзины текущего покупателя одной транзакцией:
+    проверяет товары и цены, списывает остатки всех строк, создаёт заказ
+    со строками и очищает корзину. Число SQL-запросов не зависит от числа
+    строк корзины. При любой ошибке корзина и остатки не меняются.
+    """
+    # Корзина забирается удалением: параллельное оформление той же корзины
+    # получит пустой результат, а откат транзакции вернёт строки на место
+    result = await db.execute(
+        delete(CartItemModel)
+        .where(CartItemModel.user_id == current_user.id)
+        .returning(CartItemModel.product_id, CartItemModel.quantity)
+    )
+    quantities = dict(result.all())
+    if not quantities:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="Cart is empty"
+        )
+
+    # Строки товаров блокируются в порядке id (FOR NO KEY UPDATE не мешает
+    # внешним ключам резерваций и строк заказов), поэтому цены не изменятся
+    # до конца транзакции, а параллельные заказы не блокируют друг друга
+    # во встречном порядке
+    result = await db.execute(
+        select(ProductModel.id, ProductModel.price)
+        .where(ProductModel.id.in_(quantities), ProductModel.is_active == True)
+        .order_by(ProductModel.id)
+        .with_for_update(key_share=True)
+    )
+    prices = dict(result.all())
+    unavailable = sorted(set(quantities) - set(prices))
+    if unavailable:
+        await db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Products are not available: {', '.join(map(str, unavailable))}",
+        )
+
+    total = sum(
+        prices[product_id] * quantity for product_id, quantity in quantities.items()
+    )
+    if (
+        checkout_request is not None
+        and checkout_request.expected_total is not None
+        and checkout_request.expected_total != total
+    ):
+        await db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Prices have changed, cart total is {total}",
+        )
+
+    failed = await decrement_stock_bulk(db, quantities)
+    if failed:
+        await db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Insufficient stock for products: {', '.join(map(str, failed))}",
+        )
+
+    order_db = OrderModel(user_id=current_user.id, total_amount=total)
+    db.add(order_db)
+    await db.flush()
+    items = [
+        {
+            "order_id": order_db.id,
+            "product_id": product_id,
+            "quantity": quantity,
+            "unit_price": prices[product_id],
+        }
+        for product_id, quantity in sorted(quantities.items())
+    ]
+    await db.execute(insert(OrderItemModel), items)
+    await db.commit()
+    # Остатки показываются в карточках и списках товаров (и фильтре in_stock)
+    await response_cache.invalidate(*map(product_tag, quantities), PRODUCTS_ALL)
+    return {**OrderSchema.model_validate(order_db).model_dump(), "items": items}
+
+
+@router.get("/", response_model=Page[OrderSchema])
+async def get_orders(
+    current_user: Annotated[UserSchema, Depends(get_current_user)],
+    db: Annotated[AsyncSession, Depends(get_read_db)],
+    cursor: Annotated[
+        str | None, Query(description="Курсор из next_cursor предыдущей страницы")
+    ] = None,
+    limit: Annotated[int, Query(ge=1, le=MAX_PAGE_SIZE)] = DEFAULT_PAGE_SIZE,
+):
+    """
+    Получение страницы заказов текущего пользователя, сначала новые.
+    """
+    stmt = select(*ORDER_COLUMNS).where(OrderModel.user_id == current_user.id)
+    page = await paginate(
+        db, stmt, [OrderModel.created_at, OrderModel.id], cursor, limit, descending=True
+    )
+    return json_response(order_page_adapter, page)
+
+
+@router.get("/{order_id}", response_model=OrderDetailSchema)
+async def get_order(
+    order_id: int,
+    current_user: Annotated[UserSchema, Depends(get_current_user)],
+    db: Annotated[AsyncSession, Depends(get_read_db)],
+):
+    """
+    Получение заказа текущего пользователя со строками.
+    """
+    result = await db.execute(
+        select(*ORDER_COLUMNS).where(
+            OrderModel.id == order_id, OrderModel.user_id == current_user.id
+        )
+    )
+    order = result.first()
+    if order is None:
+        raise HTTPException(status_code=404, detail="Order not found")
+    result = await db.execute(
+        select(*ORDER_ITEM_COLUMNS)
+        .where(OrderItemModel.order_id == order_id)
+        .order_by(OrderItemModel.product_id)
+    )
+    return {**order._asdict(), "items": [row._asdict() for row in result]}
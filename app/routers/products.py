@@ -1,34 +1,109 @@
-from typing import Annotated
+from typing import Annotated, Literal
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import (APIRouter, Depends, Header, HTTPException, Query, Request,
+                     Response, status)
+from fastapi.responses import StreamingResponse
+from pydantic import TypeAdapter
 from sqlalchemy import select, update
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.auth import get_current_seller
-from app.db_depends import get_async_db
+from app.bulk_import import import_products, parse_csv
+from app.cache import (PRODUCTS_ALL, PRODUCTS_RATING, cache_key, category_tag,
+                       etag_matches, product_tag, response_cache)
+from app.category_tree import category_subtree_cte, category_tree_cache
+from app.config import (BULK_MAX_ROWS, DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE,
+                        STOCK_MAX_SHARDS)
+from app.db_depends import cache_generation, get_async_db, get_read_db
+from app.export import export_csv, export_ndjson
 from app.models import Category as CategoryModel
 from app.models import Product as ProductModel
 from app.models.reviews import Review as ReviewModel
 from app.models.users import User as UserModel
+from app.pagination import paginate
+from app.projection import json_response, rows_to_dicts, schema_columns
+from app.routers.reviews import (REVIEW_COLUMNS, REVIEW_SORTS, ReviewSort,
+                                 review_page_adapter)
+from app.schemas import BulkProductResult, Page
 from app.schemas import Product as ProductSchema
-from app.schemas import ProductCreate
+from app.schemas import ProductCreate, ProductFilter
 from app.schemas import Review as ReviewSchema
+from app.schemas import StockShardsUpdate
+from app.search import search_products_stmt
+from app.stock import set_stock_shards
 
 router = APIRouter(prefix="/products", tags=["products"])
 
+product_adapter = TypeAdapter(ProductSchema)
+product_list_adapter = TypeAdapter(list[ProductSchema])
+product_page_adapter = TypeAdapter(Page[ProductSchema])
 
-@router.get("/", response_model=list[ProductSchema])
-async def get_all_products(db: AsyncSession = Depends(get_async_db)):
+# Столбцы схемы ответа для списков товаров (см. app/projection.py)
+PRODUCT_COLUMNS = schema_columns(ProductModel, ProductSchema)
+
+# Варианты сортировки списка товаров: столбцы ключа пагинации и направление (desc)
+PRODUCT_SORTS = {
+    "id": ([ProductModel.id], False),
+    "price_asc": ([ProductModel.price, ProductModel.id], False),
+    "price_desc": ([ProductModel.price, ProductModel.id], True),
+    "rating": ([ProductModel.rating, ProductModel.id], True),
+    # У товаров нет столбца даты создания, поэтому «сначала новые» — это
+    # убывание id. Порядок верен, пока id выдаются по возрастанию при вставке
+    # (последовательность products.id в PostgreSQL, rowid в SQLite) и не
+    # задаются явно. Товары параллельных транзакций могут получить id не
+    # в порядке фиксации, но порядок внутри страницы и курсор остаются
+    # стабильными
+    "newest": ([ProductModel.id], True),
+}
+
+
+@router.get("/", response_model=Page[ProductSchema])
+async def get_all_products(
+    filters: Annotated[ProductFilter, Depends()],
+    cursor: Annotated[
+        str | None, Query(description="Курсор из next_cursor предыдущей страницы")
+    ] = None,
+    limit: Annotated[int, Query(ge=1, le=MAX_PAGE_SIZE)] = DEFAULT_PAGE_SIZE,
+    db: AsyncSession = Depends(get_read_db),
+):
     """
-    Возвращает список всех товаров.
+    Возвращает страницу списка товаров с фильтрацией и сортировкой.
     """
-    stmt = (
-        select(ProductModel)
-        .join(CategoryModel)
-        .where(ProductModel.is_active == True, CategoryModel.is_active == True)
+    key = cache_key("products", cursor=cursor, limit=limit, **filters.model_dump())
+    response = await response_cache.cached_response(key)
+    if response is not None:
+        return response
+    generation = cache_generation(db)
+
+    # Товары удалённых категорий и продавцов скрыты при удалении
+    # (см. app/soft_delete.py), поэтому соединение с categories не нужно
+    stmt = select(*PRODUCT_COLUMNS).where(ProductModel.is_active == True)
+    if filters.min_price is not None:
+        stmt = stmt.where(ProductModel.price >= filters.min_price)
+    if filters.max_price is not None:
+        stmt = stmt.where(ProductModel.price <= filters.max_price)
+    if filters.min_rating is not None:
+        stmt = stmt.where(ProductModel.rating >= filters.min_rating)
+    if filters.in_stock:
+        stmt = stmt.where(ProductModel.stock > 0)
+    if filters.seller_id is not None:
+        stmt = stmt.where(ProductModel.seller_id == filters.seller_id)
+    if filters.category_id is not None:
+        stmt = stmt.where(ProductModel.category_id == filters.category_id)
+
+    columns, descending = PRODUCT_SORTS[filters.sort]
+    page = await paginate(db, stmt, columns, cursor, limit, descending)
+
+    tags = [PRODUCTS_ALL, *(product_tag(item["id"]) for item in page["items"])]
+    if filters.sort == "rating" or filters.min_rating is not None:
+        tags.append(PRODUCTS_RATING)
+    return await response_cache.store_response(
+        key,
+        product_page_adapter,
+        page,
+        tags,
+        generation=generation,
     )
-    result = await db.scalars(stmt)
-    return result.all()
 
 
 @router.post("/", response_model=ProductSchema, status_code=status.HTTP_201_CREATED)
@@ -40,9 +115,13 @@ async def create_product(
     """
     Создаёт новый товар, привязанный к текущему продавцу (только для 'seller').
     """
-    # Проверка существования категории, к которой относится товар
-    stmt = select(CategoryModel).where(
-        CategoryModel.id == product.category_id, CategoryModel.is_active == True
+    # Проверка существования категории, к которой относится товар. Строка
+    # категории блокируется (FOR SHARE в PostgreSQL) до конца транзакции,
+    # чтобы параллельное удаление категории не оставило в ней активный товар
+    stmt = (
+        select(CategoryModel)
+        .where(CategoryModel.id == product.category_id, CategoryModel.is_active == True)
+        .with_for_update(read=True)
     )
     result = await db.scalars(stmt)
     category = result.first()
@@ -56,17 +135,110 @@ async def create_product(
     db_product = ProductModel(**product.model_dump(), seller_id=current_user.id)
     db.add(db_product)
     await db.commit()
+    category_tree_cache.adjust_product_count(db_product.category_id, 1)
+    await response_cache.invalidate(PRODUCTS_ALL)
     await db.refresh(db_product)
     return db_product
 
 
-@router.get("/category/{category_id}", response_model=list[ProductSchema])
+@router.post(
+    "/bulk",
+    response_model=BulkProductResult,
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {
+                "application/json": {
+                    "schema": {
+                        "type": "array",
+                        "items": {"$ref": "#/components/schemas/ProductCreate"},
+                    }
+                },
+                "text/csv": {"schema": {"type": "string"}},
+                "multipart/form-data": {
+                    "schema": {
+                        "type": "object",
+                        "properties": {"file": {"type": "string", "format": "binary"}},
+                    }
+                },
+            },
+        }
+    },
+)
+async def create_products_bulk(
+    request: Request,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: UserModel = Depends(get_current_seller),
+):
+    """
+    Массово создаёт товары текущего продавца (только для 'seller').
+    Принимает JSON-массив объектов ProductCreate, CSV в теле запроса (text/csv)
+    или CSV-файл в поле file (multipart/form-data). Возвращает созданные товары
+    и построчные ошибки.
+    """
+    content_type = request.headers.get("content-type", "")
+    try:
+        if content_type.startswith("text/csv"):
+            rows = parse_csv(await request.body())
+        elif content_type.startswith("multipart/form-data"):
+            form = await request.form()
+            upload = form.get("file")
+            if upload is None or isinstance(upload, str):
+                raise ValueError("CSV file is required in the 'file' field")
+            rows = parse_csv(await upload.read())
+        else:
+            rows = await request.json()
+    except (ValueError, UnicodeDecodeError) as exc:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail=f"Malformed body: {exc}"
+        )
+    if not isinstance(rows, list):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Request body must be a JSON array of products",
+        )
+    if len(rows) > BULK_MAX_ROWS:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"At most {BULK_MAX_ROWS} products per request",
+        )
+
+    result = await import_products(db, rows, current_user.id)
+    if result["created"]:
+        for category_id, count in result["category_counts"].items():
+            category_tree_cache.adjust_product_count(category_id, count)
+        await response_cache.invalidate(PRODUCTS_ALL)
+    return result
+
+
+@router.get("/category/{category_id}", response_model=Page[ProductSchema])
 async def get_products_by_category(
-    category_id: int, db: AsyncSession = Depends(get_async_db)
+    category_id: int,
+    include_descendants: Annotated[
+        bool, Query(description="Включить товары всех подкатегорий")
+    ] = False,
+    cursor: Annotated[
+        str | None, Query(description="Курсор из next_cursor предыдущей страницы")
+    ] = None,
+    limit: Annotated[int, Query(ge=1, le=MAX_PAGE_SIZE)] = DEFAULT_PAGE_SIZE,
+    db: AsyncSession = Depends(get_read_db),
 ):
     """
-    Возвращает список товаров в указанной категории по её ID.
+    Возвращает страницу списка товаров в указанной категории по её ID.
+    При include_descendants=true возвращает товары всего поддерева категории.
     """
+    key = cache_key(
+        "products_by_category",
+        category_id=category_id,
+        include_descendants=include_descendants,
+        cursor=cursor,
+        limit=limit,
+    )
+    response = await response_cache.cached_response(key)
+    if response is not None:
+        return response
+    generation = cache_generation(db)
+
     # Проверка существования категории
     stmt = select(CategoryModel).where(
         CategoryModel.id == category_id, CategoryModel.is_active == True
@@ -76,36 +248,123 @@ async def get_products_by_category(
     if category is None:
         raise HTTPException(status_code=404, detail="Category not found or inactive")
 
-    stmt = select(ProductModel).where(
-        ProductModel.category_id == category_id, ProductModel.is_active == True
+    # Поддерево разрешается отдельным запросом: для листовой категории товары
+    # читаются по индексу (category_id, id) в порядке пагинации, а список id
+    # даёт планировщику точную оценку вместо подзапроса к CTE
+    category_ids = [category_id]
+    if include_descendants:
+        subtree = category_subtree_cte(category_id)
+        category_ids = list(await db.scalars(select(subtree.c.id)))
+    if len(category_ids) == 1:
+        category_filter = ProductModel.category_id == category_ids[0]
+    else:
+        category_filter = ProductModel.category_id.in_(category_ids)
+
+    stmt = select(*PRODUCT_COLUMNS).where(
+        category_filter, ProductModel.is_active == True
     )
-    result_products = await db.scalars(stmt)
-    products = result_products.all()
-    return products
+    page = await paginate(db, stmt, [ProductModel.id], cursor, limit)
+
+    tags = [PRODUCTS_ALL, *(product_tag(item["id"]) for item in page["items"])]
+    return await response_cache.store_response(
+        key,
+        product_page_adapter,
+        page,
+        tags,
+        generation=generation,
+    )
+
+
+@router.get("/export", response_class=StreamingResponse)
+async def export_products(
+    export_format: Annotated[
+        Literal["ndjson", "csv"], Query(alias="format", description="Формат выгрузки")
+    ] = "ndjson",
+):
+    """
+    Потоковая выгрузка всего активного каталога в NDJSON или CSV.
+    Товары читаются из базы пачками серверным курсором, поэтому потребление
+    памяти не зависит от размера каталога, а первые байты уходят сразу.
+    """
+    if export_format == "csv":
+        return StreamingResponse(
+            export_csv(),
+            media_type="text/csv",
+            headers={"Content-Disposition": 'attachment; filename="products.csv"'},
+        )
+    return StreamingResponse(export_ndjson(), media_type="application/x-ndjson")
+
+
+@router.get("/search", response_model=list[ProductSchema])
+async def search_products(
+    q: Annotated[
+        str, Query(min_length=1, max_length=100, description="Поисковый запрос")
+    ],
+    limit: Annotated[int, Query(ge=1, le=MAX_PAGE_SIZE)] = DEFAULT_PAGE_SIZE,
+    db: AsyncSession = Depends(get_read_db),
+):
+    """
+    Полнотекстовый поиск по названию и описанию активных товаров.
+    Возвращает товары, упорядоченные по релевантности.
+    """
+    if not q.strip():
+        return []
+    stmt = search_products_stmt(db.get_bind().dialect.name, q).limit(limit)
+    result = await db.execute(stmt.with_only_columns(*PRODUCT_COLUMNS))
+    return json_response(product_list_adapter, rows_to_dicts(result.all()))
+
+
+def product_etag(product: ProductModel) -> str:
+    """
+    Строгий ETag товара по номеру версии строки.
+    """
+    return f'"{product.id}-{product.version}"'
 
 
 @router.get("/{product_id}", response_model=ProductSchema)
-async def get_product(product_id: int, db: AsyncSession = Depends(get_async_db)):
+async def get_product(
+    product_id: int,
+    if_none_match: Annotated[str | None, Header()] = None,
+    db: AsyncSession = Depends(get_read_db),
+):
     """
     Возвращает детальную информацию о товаре по его ID.
+    Поддерживает условный запрос: при совпадении If-None-Match с ETag
+    возвращает 304 без тела.
     """
+    key = cache_key("product", product_id=product_id)
+    response = await response_cache.cached_response(key)
+    if response is not None:
+        etag = response.headers["ETag"]
+        if etag_matches(if_none_match, etag):
+            return Response(
+                status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag}
+            )
+        return response
+    generation = cache_generation(db)
+
     stmt = select(ProductModel).where(
         ProductModel.id == product_id, ProductModel.is_active == True
     )
-    result_product = await db.scalars(stmt)
-    product = result_product.first()
+    product = (await db.scalars(stmt)).first()
     if product is None:
         raise HTTPException(status_code=404, detail="Product not found")
 
-    stmt = select(CategoryModel).where(
-        CategoryModel.id == product.category_id, CategoryModel.is_active == True
-    )
-    result_category = await db.scalars(stmt)
-    category = result_category.first()
-    if category is None:
-        raise HTTPException(status_code=400, detail="Category not found or inactive")
+    etag = product_etag(product)
+    if etag_matches(if_none_match, etag):
+        return Response(
+            status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag}
+        )
 
-    return product
+    tags = [product_tag(product.id), category_tag(product.category_id)]
+    return await response_cache.store_response(
+        key,
+        product_adapter,
+        product,
+        tags,
+        etag=etag,
+        generation=generation,
+    )
 
 
 @router.put("/{product_id}", response_model=ProductSchema)
@@ -133,21 +392,70 @@ async def update_product(
             detail="You can only update your own products",
         )
 
-    # Проверка существования категории
-    stmt = select(CategoryModel).where(CategoryModel.id == product.category_id)
+    # Проверка существования категории с блокировкой её строки, как при создании
+    stmt = (
+        select(CategoryModel)
+        .where(CategoryModel.id == product.category_id, CategoryModel.is_active == True)
+        .with_for_update(read=True)
+    )
     result_category = await db.scalars(stmt)
     category = result_category.first()
     if category is None:
         raise HTTPException(status_code=400, detail="Category not found or inactive")
 
-    # Обновление товара
+    # Обновление товара; остаток шардированного товара распределяется по шардам
+    old_category_id = product_db.category_id
+    if product_db.stock_shard_count:
+        await set_stock_shards(
+            db, product_id, product_db.stock_shard_count, stock=product.stock
+        )
     stmt = (
         update(ProductModel)
         .where(ProductModel.id == product_id)
-        .values(**product.model_dump(exclude_unset=True))
+        .values(
+            **product.model_dump(exclude_unset=True),
+            version=ProductModel.version + 1,
+        )
     )
     await db.execute(stmt)
     await db.commit()
+    if old_category_id != product.category_id:
+        category_tree_cache.adjust_product_count(old_category_id, -1)
+        category_tree_cache.adjust_product_count(product.category_id, 1)
+    await response_cache.invalidate(product_tag(product_id), PRODUCTS_ALL)
+    await db.refresh(product_db)
+    return product_db
+
+
+@router.put("/{product_id}/stock-shards", response_model=ProductSchema)
+async def update_stock_shards(
+    product_id: int,
+    shards: StockShardsUpdate,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: UserModel = Depends(get_current_seller),
+):
+    """
+    Включает шардированный остаток товара для резервирования при высокой
+    конкуренции (shards > 0) или возвращает обычный остаток (shards = 0).
+    Только для продавца товара.
+    """
+    if shards.shards > STOCK_MAX_SHARDS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"At most {STOCK_MAX_SHARDS} shards per product",
+        )
+    product_db = await db.get(ProductModel, product_id)
+    if product_db is None or not product_db.is_active:
+        raise HTTPException(status_code=404, detail="Product not found")
+    if product_db.seller_id != current_user.id:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="You can only update your own products",
+        )
+
+    await set_stock_shards(db, product_id, shards.shards)
+    await db.commit()
+    await response_cache.invalidate(product_tag(product_id), PRODUCTS_ALL)
     await db.refresh(product_db)
     return product_db
 
@@ -178,44 +486,56 @@ async def delete_product(
     await db.execute(
         update(ProductModel)
         .where(ProductModel.id == product_id)
-        .values(is_active=False)
+        .values(
+            is_active=False,
+            inactive_reason="deleted",
+            version=ProductModel.version + 1,
+        )
     )
 
-    # Мягкое удаление отзывов на товар
+    # Мягкое удаление отзывов на товар; явно удалённые отзывы не меняются
     await db.execute(
         update(ReviewModel)
-        .where(ReviewModel.product_id == product_id)
-        .values(is_active=False)
+        .where(ReviewModel.product_id == product_id, ReviewModel.is_active == True)
+        .values(is_active=False, inactive_reason="product")
     )
 
     await db.commit()
+    category_tree_cache.adjust_product_count(product.category_id, -1)
+    await response_cache.invalidate(product_tag(product_id), PRODUCTS_ALL)
     return {
         "status": "success",
         "message": f"Product {product.name}, id={product_id} marked as inactive",
     }
 
 
-@router.get("/products/{product_id}/reviews/", response_model=list[ReviewSchema])
+@router.get("/products/{product_id}/reviews/", response_model=Page[ReviewSchema])
 async def get_product_reviews(
-    product_id: int, db: Annotated[AsyncSession, Depends(get_async_db)]
+    product_id: int,
+    db: Annotated[AsyncSession, Depends(get_read_db)],
+    sort: Annotated[
+        ReviewSort, Query(description="Сортировка: сначала новые или по оценке")
+    ] = "newest",
+    cursor: Annotated[
+        str | None, Query(description="Курсор из next_cursor предыдущей страницы")
+    ] = None,
+    limit: Annotated[int, Query(ge=1, le=MAX_PAGE_SIZE)] = DEFAULT_PAGE_SIZE,
 ):
     """
-    Возвращает список отзывов на продукт по его id
+    Возвращает страницу списка отзывов на продукт по его id
     """
     # Проверка существования продукта
-    result = await db.scalars(
-        select(ProductModel).where(
+    product_exists = await db.scalar(
+        select(ProductModel.id).where(
             ProductModel.id == product_id, ProductModel.is_active == True
         )
     )
-    if not result.first():
+    if product_exists is None:
         raise HTTPException(status_code=404, detail="Product not found or inactive")
 
-    # Возвращение списка отзывов
-    result = await db.scalars(
-        select(ReviewModel).where(
-            ReviewModel.product_id == product_id, ProductModel.is_active == True
-        )
+    # Возвращение страницы отзывов
+    stmt = select(*REVIEW_COLUMNS).where(
+        ReviewModel.product_id == product_id, ReviewModel.is_active == True
     )
-    reviews = result.all()
-    return reviews
+    page = await paginate(db, stmt, REVIEW_SORTS[sort], cursor, limit, descending=True)
+    return json_response(review_page_adapter, page)
@@ -0,0 +1,147 @@
+from datetime import datetime, timedelta
+from typing import Annotated
+
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.auth import get_current_user
+from app.cache import PRODUCTS_ALL, product_tag, response_cache
+from app.config import STOCK_RESERVATION_TTL
+from app.db_depends import get_async_db
+from app.models.products import Product as ProductModel
+from app.models.stock import StockReservation as StockReservationModel
+from app.schemas import StockReservation as StockReservationSchema
+from app.schemas import StockReservationCreate
+from app.schemas import User as UserSchema
+from app.stock import decrement_stock, return_stock
+
+router = APIRouter(prefix="/reservations", tags=["reservations"])
+
+
+async def reservation_not_active(
+    db: AsyncSession, reservation_id: int, user_id: int
+) -> HTTPException:
+    """
+    Ошибка для резервации, которую не удалось перевести из статуса active:
+    404, если её нет у пользователя, иначе 409 с её статусом.
+    """
+    reservation_status = await db.scalar(
+        select(StockReservationModel.status).where(
+            StockReservationModel.id == reservation_id,
+            StockReservationModel.user_id == user_id,
+        )
+    )
+    if reservation_status is None:
+        return HTTPException(status_code=404, detail="Reservation not found")
+    if reservation_status == "active":
+        # Срок истёк, но фоновая задача ещё не вернула остаток на склад
+        reservation_status = "expired"
+    return HTTPException(
+        status_code=status.HTTP_409_CONFLICT,
+        detail=f"Reservation is {reservation_status}",
+    )
+
+
+@router.post(
+    "/", response_model=StockReservationSchema, status_code=status.HTTP_201_CREATED
+)
+async def create_reservation(
+    reservation: StockReservationCreate,
+    current_user: Annotated[UserSchema, Depends(get_current_user)],
+    db: Annotated[AsyncSession, Depends(get_async_db)],
+):
+    """
+    Резервирует товар для текущего покупателя (только для "buyer").
+    Остаток списывается сразу и возвращается на склад при отмене
+    резервации или по истечении STOCK_RESERVATION_TTL секунд.
+    """
+    if current_user.role != "buyer":
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only buyer can reserve products",
+        )
+
+    if not await decrement_stock(db, reservation.product_id, reservation.quantity):
+        await db.rollback()
+        product_exists = await db.scalar(
+            select(ProductModel.id).where(
+                ProductModel.id == reservation.product_id,
+                ProductModel.is_active == True,
+            )
+        )
+        if product_exists is None:
+            raise HTTPException(status_code=404, detail="Product not found")
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT, detail="Insufficient stock"
+        )
+
+    reservation_db = StockReservationModel(
+        **reservation.model_dump(),
+        user_id=current_user.id,
+        expires_at=datetime.now() + timedelta(seconds=STOCK_RESERVATION_TTL),
+    )
+    db.add(reservation_db)
+    await db.commit()
+    # Остаток показывается в карточке и списках товаров (и фильтре in_stock)
+    await response_cache.invalidate(product_tag(reservation.product_id), PRODUCTS_ALL)
+    return reservation_db
+
+
+@router.post("/{reservation_id}/confirm", response_model=StockReservationSchema)
+async def confirm_reservation(
+    reservation_id: int,
+    current_user: Annotated[UserSchema, Depends(get_current_user)],
+    db: Annotated[AsyncSession, Depends(get_async_db)],
+):
+    """
+    Подтверждает активную резервацию текущего пользователя: списанный
+    остаток больше не возвращается на склад.
+    """
+    result = await db.scalars(
+        update(StockReservationModel)
+        .where(
+            StockReservationModel.id == reservation_id,
+            StockReservationModel.user_id == current_user.id,
+            StockReservationModel.status == "active",
+            StockReservationModel.expires_at > datetime.now(),
+        )
+        .values(status="confirmed")
+        .returning(StockReservationModel)
+    )
+    reservation_db = result.first()
+    if reservation_db is None:
+        raise await reservation_not_active(db, reservation_id, current_user.id)
+    await db.commit()
+    return reservation_db
+
+
+@router.delete("/{reservation_id}", response_model=StockReservationSchema)
+async def release_reservation(
+    reservation_id: int,
+    current_user: Annotated[UserSchema, Depends(get_current_user)],
+    db: Annotated[AsyncSession, Depends(get_async_db)],
+):
+    """
+    Отменяет активную резервацию текущего пользователя и возвращает
+    зарезервированное количество на склад.
+    """
+    result = await db.scalars(
+        update(StockReservationModel)
+        .where(
+            StockReservationModel.id == reservation_id,
+            StockReservationModel.user_id == current_user.id,
+            StockReservationModel.status == "active",
+        )
+        .values(status="released")
+        .returning(StockReservationModel)
+    )
+    reservation_db = result.first()
+    if reservation_db is None:
+        raise await reservation_not_active(db, reservation_id, current_user.id)
+    await return_stock(db, {reservation_db.product_id: reservation_db.quantity})
+    await db.commit()
+    await response_cache.invalidate(
+        product_tag(reservation_db.product_id), PRODUCTS_ALL
+    )
+    return reservation_db
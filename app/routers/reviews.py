@@ -1,47 +1,59 @@
-from typing import Annotated
+from typing import Annotated, Literal
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from pydantic import TypeAdapter
 from sqlalchemy import select, update
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.auth import get_current_user
-from app.db_depends import get_async_db
+from app.config import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+from app.db_depends import get_async_db, get_read_db
+from app.jobs import job_queue
 from app.models.products import Product as ProductModel
 from app.models.reviews import Review as ReviewModel
+from app.pagination import paginate
+from app.projection import json_response, schema_columns
+from app.ratings import PRODUCT_RATING_JOB, apply_review_grade
+from app.schemas import Page
 from app.schemas import Review as ReviewSchema
 from app.schemas import ReviewCreate
 from app.schemas import User as UserSchema
 
 router = APIRouter(prefix="/reviews", tags=["reviews"])
 
-from sqlalchemy.sql import func
-
 # teapot = status.HTTP_418_IM_A_TEAPOT
 
+# Варианты сортировки отзывов: столбцы ключа пагинации (все по убыванию)
+REVIEW_SORTS = {
+    "newest": [ReviewModel.comment_date, ReviewModel.id],
+    "grade": [ReviewModel.grade, ReviewModel.comment_date, ReviewModel.id],
+}
 
-async def update_product_rating(db: AsyncSession, product_id: int):
-    """
-    Делает пересчет рейтинга товара
-    """
-    result = await db.execute(
-        select(func.avg(ReviewModel.grade)).where(
-            ReviewModel.product_id == product_id, ReviewModel.is_active == True
-        )
-    )
-    avg_rating = result.scalar() or 0.0
-    product = await db.get(ProductModel, product_id)
-    product.rating = avg_rating
-    await db.commit()
+ReviewSort = Literal["newest", "grade"]
 
+review_page_adapter = TypeAdapter(Page[ReviewSchema])
 
-@router.get("/", response_model=list[ReviewSchema])
-async def get_reviews(db: Annotated[AsyncSession, Depends(get_async_db)]):
+# Столбцы схемы ответа для списка отзывов (см. app/projection.py)
+REVIEW_COLUMNS = schema_columns(ReviewModel, ReviewSchema)
+
+
+@router.get("/", response_model=Page[ReviewSchema])
+async def get_reviews(
+    db: Annotated[AsyncSession, Depends(get_read_db)],
+    sort: Annotated[
+        ReviewSort, Query(description="Сортировка: сначала новые или по оценке")
+    ] = "newest",
+    cursor: Annotated[
+        str | None, Query(description="Курсор из next_cursor предыдущей страницы")
+    ] = None,
+    limit: Annotated[int, Query(ge=1, le=MAX_PAGE_SIZE)] = DEFAULT_PAGE_SIZE,
+):
     """
-    Получение списка всех активных отзывов
+    Получение страницы списка всех активных отзывов
     """
-    result = await db.scalars(select(ReviewModel).where(ReviewModel.is_active == True))
-    reviews = result.all()
-    return reviews
+    stmt = select(*REVIEW_COLUMNS).where(ReviewModel.is_active == True)
+    page = await paginate(db, stmt, REVIEW_SORTS[sort], cursor, limit, descending=True)
+    return json_response(review_page_adapter, page)
 
 
 @router.post("/", response_model=ReviewSchema, status_code=status.HTTP_201_CREATED)
@@ -83,14 +95,13 @@ async def create_review(
             status_code=400, detail="Users can post only one review for the product"
         )
 
-    # Создание нового отзыва
+    # Создание нового отзыва и обновление рейтинга товара в одной транзакции;
+    # кеш сбрасывает фоновая задача, см. app/ratings.py
     review_db = ReviewModel(**review.model_dump(), user_id=current_user.id)
     db.add(review_db)
+    await apply_review_grade(db, product_db.id, review_db.grade, 1)
     await db.commit()
-    await db.refresh(review_db)
-
-    # Обновление среднего рейтинга
-    await update_product_rating(db, product_db.id)
+    await job_queue.enqueue(PRODUCT_RATING_JOB, product_db.id)
 
     return review_db
 
@@ -116,17 +127,18 @@ async def delete_review(
         raise HTTPException(status_code=404, detail="Review not found or inactive")
 
     # Проверка авторства пользователя
-    if current_user.id != review_db.user_id or current_user.role != "admin":
+    if current_user.id != review_db.user_id and current_user.role != "admin":
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Permission denied",
         )
 
-    # Мягкое удаление отзыва
+    # Мягкое удаление отзыва и обновление рейтинга товара в одной транзакции;
+    # кеш сбрасывает фоновая задача
     review_db.is_active = False
+    review_db.inactive_reason = "deleted"
+    await apply_review_grade(db, review_db.product_id, review_db.grade, -1)
     await db.commit()
-
-    # Обновление рейтинга товара
-    await update_product_rating(db, review_db.product_id)
+    await job_queue.enqueue(PRODUCT_RATING_JOB, review_db.product_id)
 
     return {"message": "Review deleted"}
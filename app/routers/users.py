@@ -3,17 +3,21 @@ from typing import Annotated
 import jwt
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordRequestForm
-from sqlalchemy import select
+from sqlalchemy import select, update
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.auth import (create_access_token, create_refresh_token, hash_password,
-                      verify_password)
+from app.auth import (create_access_token, create_refresh_token,
+                      get_current_admin, hash_password_async,
+                      verify_password_async)
+from app.cache import PRODUCTS_ALL, product_tag, response_cache
+from app.category_tree import category_tree_cache
 from app.config import ALGORITHM, SECRET_KEY
 from app.db_depends import get_async_db
 from app.models.users import User as UserModel
 from app.schemas import RefreshTokenRequest
 from app.schemas import User as UserSchema
 from app.schemas import UserCreate
+from app.soft_delete import deactivate_seller, restore_seller
 
 router = APIRouter(prefix="/users", tags=["users"])
 
@@ -37,7 +41,9 @@ async def create_user(
 
     # Создание объекта пользователя с хешированным паролем
     db_user = UserModel(
-        email=user.email, hashed_password=hash_password(user.password), role=user.role
+        email=user.email,
+        hashed_password=await hash_password_async(user.password),
+        role=user.role,
     )
     db.add(db_user)
     await db.commit()
@@ -61,13 +67,23 @@ async def login(
         )
     )
     user = result.first()
-    if not user or not verify_password(form_data.password, user.hashed_password):
+    verified, new_hash = (
+        await verify_password_async(form_data.password, user.hashed_password)
+        if user
+        else (False, None)
+    )
+    if not verified:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password",
             headers={"WWW-Authenticate": "Bearer"},
         )
 
+    # Пересчёт хеша, созданного с прежней стоимостью bcrypt
+    if new_hash is not None:
+        user.hashed_password = new_hash
+        await db.commit()
+
     # Создание JWT токена
     access_token = create_access_token(
         data={"sub": user.email, "role": user.role, "id": user.id}
@@ -180,3 +196,66 @@ async def access_token(
         "access_token": new_access_token,
         "token_type": "bearer",
     }
+
+
+@router.delete("/{user_id}", response_model=UserSchema)
+async def deactivate_user(
+    user_id: int,
+    current_user: Annotated[UserSchema, Depends(get_current_admin)],
+    db: Annotated[AsyncSession, Depends(get_async_db)],
+):
+    """
+    Деактивирует пользователя (только для 'admin'). Товары продавца и отзывы
+    на них скрываются вместе с ним (см. app/soft_delete.py).
+    """
+    if user_id == current_user.id:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="You cannot deactivate yourself",
+        )
+    user = await db.get(UserModel, user_id)
+    if user is None or not user.is_active:
+        raise HTTPException(status_code=404, detail="User not found")
+
+    product_ids = []
+    if user.role == "seller":
+        product_ids = await deactivate_seller(db, user_id)
+    else:
+        await db.execute(
+            update(UserModel).where(UserModel.id == user_id).values(is_active=False)
+        )
+    await db.commit()
+    if product_ids:
+        category_tree_cache.invalidate()
+        await response_cache.invalidate(PRODUCTS_ALL, *map(product_tag, product_ids))
+    await db.refresh(user)
+    return user
+
+
+@router.post("/{user_id}/restore", response_model=UserSchema)
+async def restore_user(
+    user_id: int,
+    current_user: Annotated[UserSchema, Depends(get_current_admin)],
+    db: Annotated[AsyncSession, Depends(get_async_db)],
+):
+    """
+    Активирует пользователя (только для 'admin'). Товары продавца и отзывы
+    на них, скрытые при деактивации, возвращаются.
+    """
+    user = await db.get(UserModel, user_id)
+    if user is None or user.is_active:
+        raise HTTPException(status_code=404, detail="Inactive user not found")
+
+    product_ids = []
+    if user.role == "seller":
+        product_ids = await restore_seller(db, user_id)
+    else:
+        await db.execute(
+            update(UserModel).where(UserModel.id == user_id).values(is_active=True)
+        )
+    await db.commit()
+    if product_ids:
+        category_tree_cache.invalidate()
+        await response_cache.invalidate(PRODUCTS_ALL, *map(product_tag, product_ids))
+    await db.refresh(user)
+    return user
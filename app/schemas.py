@@ -1,6 +1,6 @@
 from datetime import datetime
 from decimal import Decimal
-from typing import Annotated
+from typing import Annotated, Generic, Literal, TypeVar
 
 from pydantic import BaseModel, ConfigDict, EmailStr, Field
 
@@ -41,6 +41,33 @@ class Category(BaseModel):
     model_config = ConfigDict(from_attributes=True)
 
 
+class CategoryTreeNode(BaseModel):
+    """
+    Модель узла дерева категорий со счётчиками товаров.
+    Используется в GET /categories/tree.
+    """
+
+    id: Annotated[int, Field(..., description="Уникальный идентификатор категории")]
+    name: Annotated[str, Field(..., description="Название категории")]
+    parent_id: Annotated[
+        int | None, Field(None, description="ID родительской категории, если есть")
+    ]
+    product_count: Annotated[
+        int, Field(..., description="Количество активных товаров в самой категории")
+    ]
+    total_product_count: Annotated[
+        int,
+        Field(
+            ...,
+            description="Количество активных товаров в категории и всех подкатегориях",
+        ),
+    ]
+    children: Annotated[
+        list["CategoryTreeNode"],
+        Field(default_factory=list, description="Подкатегории"),
+    ]
+
+
 class ProductCreate(BaseModel):
     """
     Модель для создания и обновления товара.
@@ -90,11 +117,76 @@ class Product(BaseModel):
     stock: Annotated[int, Field(..., description="Количество товара на складе")]
     category_id: Annotated[int, Field(..., description="ID категории")]
     rating: Annotated[float, Field(description="Средний рейтинг товара")]
+    rating_count: Annotated[int, Field(0, description="Количество оценок товара")]
     is_active: Annotated[bool, Field(..., description="Активность товара")]
 
     model_config = ConfigDict(from_attributes=True)
 
 
+class ProductFilter(BaseModel):
+    """
+    Модель параметров фильтрации и сортировки списка товаров.
+    Используется в query-параметрах GET /products/.
+    """
+
+    min_price: Annotated[
+        Decimal | None, Field(None, ge=0, description="Минимальная цена товара")
+    ]
+    max_price: Annotated[
+        Decimal | None, Field(None, ge=0, description="Максимальная цена товара")
+    ]
+    min_rating: Annotated[
+        float | None,
+        Field(None, ge=0, le=5, description="Минимальный средний рейтинг товара"),
+    ]
+    in_stock: Annotated[
+        bool, Field(False, description="Только товары, которые есть на складе")
+    ]
+    seller_id: Annotated[int | None, Field(None, description="ID продавца")]
+    category_id: Annotated[int | None, Field(None, description="ID категории")]
+    sort: Annotated[
+        Literal["id", "price_asc", "price_desc", "rating", "newest"],
+        Field(
+            "id",
+            description=(
+                "Сортировка: по id, по цене, по рейтингу или сначала новые "
+                "(newest — по убыванию id, то есть в обратном порядке создания)"
+            ),
+        ),
+    ]
+
+
+class BulkProductCreated(BaseModel):
+    """
+    Модель созданного товара в ответе массовой загрузки.
+    """
+
+    row: Annotated[int, Field(..., description="Индекс строки во входных данных")]
+    id: Annotated[int, Field(..., description="ID созданного товара")]
+
+
+class BulkProductError(BaseModel):
+    """
+    Модель ошибки строки в ответе массовой загрузки.
+    """
+
+    row: Annotated[int, Field(..., description="Индекс строки во входных данных")]
+    errors: Annotated[list[dict], Field(..., description="Ошибки валидации строки")]
+
+
+class BulkProductResult(BaseModel):
+    """
+    Модель ответа массовой загрузки товаров.
+    """
+
+    created: Annotated[
+        list[BulkProductCreated], Field(..., description="Созданные товары")
+    ]
+    errors: Annotated[
+        list[BulkProductError], Field(..., description="Строки, не прошедшие загрузку")
+    ]
+
+
 class UserCreate(BaseModel):
     """
     Модель для создания и обновления пользователя.
@@ -147,7 +239,7 @@ class Review(BaseModel):
     product_id: Annotated[
         int, Field(..., description="Идентификатор товара, на который написан отзыв")
     ]
-    comment: Annotated[str, Field(description="Текст отзыва")]
+    comment: Annotated[str | None, Field(None, description="Текст отзыва")]
     comment_date: Annotated[
         datetime, Field(..., description="Дата и время создания отзыва")
     ]
@@ -170,3 +262,156 @@ class ReviewCreate(BaseModel):
     grade: Annotated[
         int, Field(..., ge=1, le=5, description="Оценка товара")
     ]  # Оценка от 1 до 5
+
+
+T = TypeVar("T")
+
+
+class Page(BaseModel, Generic[T]):
+    """
+    Модель для ответа со страницей списка при курсорной пагинации.
+    """
+
+    items: Annotated[list[T], Field(..., description="Элементы текущей страницы")]
+    next_cursor: Annotated[
+        str | None,
+        Field(
+            None,
+            description="Курсор для запроса следующей страницы, null на последней странице",
+        ),
+    ]
+
+
+class StockReservationCreate(BaseModel):
+    """
+    Модель для резервирования товара.
+    """
+
+    product_id: Annotated[int, Field(..., description="Идентификатор товара")]
+    quantity: Annotated[
+        int, Field(..., ge=1, le=1000, description="Количество (1-1000)")
+    ]
+
+
+class StockReservation(BaseModel):
+    """
+    Модель для ответа с данными резервации товара.
+    """
+
+    id: Annotated[int, Field(..., description="Уникальный идентификатор резервации")]
+    product_id: Annotated[int, Field(..., description="Идентификатор товара")]
+    user_id: Annotated[int, Field(..., description="Идентификатор покупателя")]
+    quantity: Annotated[int, Field(..., description="Зарезервированное количество")]
+    status: Annotated[
+        Literal["active", "confirmed", "released", "expired"],
+        Field(..., description="Статус резервации"),
+    ]
+    created_at: Annotated[datetime, Field(..., description="Дата и время создания")]
+    expires_at: Annotated[
+        datetime, Field(..., description="Срок, до которого действует резервация")
+    ]
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+class StockShardsUpdate(BaseModel):
+    """
+    Модель для включения шардированного остатка товара.
+    """
+
+    shards: Annotated[
+        int,
+        Field(
+            ...,
+            ge=0,
+            description="Число шардов остатка, 0 — обычный остаток в одной строке",
+        ),
+    ]
+
+
+class CartItemUpdate(BaseModel):
+    """
+    Модель для изменения количества товара в корзине.
+    """
+
+    quantity: Annotated[
+        int, Field(..., ge=1, le=1000, description="Количество (1-1000)")
+    ]
+
+
+class CartItem(BaseModel):
+    """
+    Модель для ответа со строкой корзины и текущей ценой товара.
+    """
+
+    product_id: Annotated[int, Field(..., description="Идентификатор товара")]
+    name: Annotated[str, Field(..., description="Название товара")]
+    price: Annotated[Decimal, Field(..., description="Текущая цена товара в рублях")]
+    quantity: Annotated[int, Field(..., description="Количество")]
+    added_at: Annotated[
+        datetime, Field(..., description="Дата и время добавления в корзину")
+    ]
+
+
+class Cart(BaseModel):
+    """
+    Модель для ответа с корзиной текущего покупателя.
+    """
+
+    items: Annotated[list[CartItem], Field(..., description="Строки корзины")]
+    total_amount: Annotated[
+        Decimal, Field(..., description="Сумма корзины по текущим ценам")
+    ]
+
+
+class CheckoutRequest(BaseModel):
+    """
+    Модель для оформления заказа из корзины.
+    """
+
+    expected_total: Annotated[
+        Decimal | None,
+        Field(
+            None,
+            description="Сумма, которую видел покупатель; при расхождении "
+            "с текущими ценами заказ не оформляется",
+        ),
+    ]
+
+
+class OrderItem(BaseModel):
+    """
+    Модель для ответа со строкой заказа.
+    """
+
+    product_id: Annotated[int, Field(..., description="Идентификатор товара")]
+    quantity: Annotated[int, Field(..., description="Количество")]
+    unit_price: Annotated[
+        Decimal, Field(..., description="Цена товара на момент оформления")
+    ]
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+class Order(BaseModel):
+    """
+    Модель для ответа с данными заказа.
+    """
+
+    id: Annotated[int, Field(..., description="Уникальный идентификатор заказа")]
+    user_id: Annotated[int, Field(..., description="Идентификатор покупателя")]
+    status: Annotated[str, Field(..., description="Статус заказа")]
+    total_amount: Annotated[Decimal, Field(..., description="Сумма заказа в рублях")]
+    created_at: Annotated[
+        datetime, Field(..., description="Дата и время оформления заказа")
+    ]
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+class OrderDetail(Order):
+    """
+    Модель для ответа с заказом и его строками.
+    """
+
+    items: Annotated[list[OrderItem], Field(..., description="Строки заказа")]
@@ -0,0 +1,114 @@
+# --------------- Полнотекстовый поиск по товарам -------------------------
+# PostgreSQL: столбец products.search_vector (tsvector) с GIN-индексом,
+# который заполняет триггер. SQLite: внешняя FTS5-таблица products_fts,
+# синхронизируемая триггерами. Схема для PostgreSQL создаётся миграцией,
+# DDL ниже также выполняется при Base.metadata.create_all.
+from sqlalchemy import (DDL, Select, cast, column, event, func, literal,
+                        select, table, text)
+from sqlalchemy.dialects.postgresql import REGCONFIG
+
+from app.models import Product as ProductModel
+
+# Конфигурация полнотекстового поиска PostgreSQL. В 'russian' латинские слова
+# обрабатываются английским стеммером, поэтому подходит для смешанного каталога.
+SEARCH_CONFIG = "russian"
+
+products_fts = table("products_fts", column("rowid"))
+
+POSTGRESQL_DDL = [
+    f"""
+    CREATE OR REPLACE FUNCTION products_search_vector_update() RETURNS trigger AS $$
+    BEGIN
+        NEW.search_vector :=
+            setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(NEW.name, '')), 'A') ||
+            setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(NEW.description, '')), 'B');
+        RETURN NEW;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+    """
+    CREATE TRIGGER products_search_vector_trigger
+    BEFORE INSERT OR UPDATE OF name, description ON products
+    FOR EACH ROW EXECUTE FUNCTION products_search_vector_update()
+    """,
+]
+
+SQLITE_DDL = [
+    """
+    CREATE VIRTUAL TABLE products_fts USING fts5(
+        name, description, content='products', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    """
+    CREATE TRIGGER products_fts_insert AFTER INSERT ON products BEGIN
+        INSERT INTO products_fts(rowid, name, description)
+        VALUES (new.id, new.name, new.description);
+    END
+    """,
+    """
+    CREATE TRIGGER products_fts_delete AFTER DELETE ON products BEGIN
+        INSERT INTO products_fts(products_fts, rowid, name, description)
+        VALUES ('delete', old.id, old.name, old.description);
+    END
+    """,
+    """
+    CREATE TRIGGER products_fts_update AFTER UPDATE OF name, description ON products
+    BEGIN
+        INSERT INTO products_fts(products_fts, rowid, name, description)
+        VALUES ('delete', old.id, old.name, old.description);
+        INSERT INTO products_fts(rowid, name, description)
+        VALUES (new.id, new.name, new.description);
+    END
+    """,
+]
+
+for statement in POSTGRESQL_DDL:
+    event.listen(
+        ProductModel.__table__,
+        "after_create",
+        DDL(statement).execute_if(dialect="postgresql"),
+    )
+for statement in SQLITE_DDL:
+    event.listen(
+        ProductModel.__table__,
+        "after_create",
+        DDL(statement).execute_if(dialect="sqlite"),
+    )
+event.listen(
+    ProductModel.__table__,
+    "before_drop",
+    DDL("DROP TABLE IF EXISTS products_fts").execute_if(dialect="sqlite"),
+)
+
+
+def fts5_query(query: str) -> str:
+    """
+    Преобразует пользовательскую строку в безопасный запрос FTS5:
+    каждое слово берётся в кавычки, слова объединяются через AND.
+    """
+    return " ".join('"' + word.replace('"', '""') + '"' for word in query.split())
+
+
+def search_products_stmt(dialect: str, query: str) -> Select:
+    """
+    Строит запрос поиска активных товаров, упорядоченный по релевантности.
+    """
+    stmt = select(ProductModel).where(ProductModel.is_active == True)
+    if dialect == "postgresql":
+        ts_query = func.websearch_to_tsquery(
+            cast(literal(SEARCH_CONFIG), REGCONFIG), query
+        )
+        rank = func.ts_rank_cd(ProductModel.search_vector, ts_query)
+        return stmt.where(ProductModel.search_vector.op("@@")(ts_query)).order_by(
+            rank.desc(), ProductModel.id
+        )
+    if dialect == "sqlite":
+        return (
+            stmt.join(products_fts, products_fts.c.rowid == ProductModel.id)
+            .where(
+                text("products_fts MATCH :query").bindparams(query=fts5_query(query))
+            )
+            .order_by(text("bm25(products_fts, 10.0, 1.0)"), ProductModel.id)
+        )
+    raise NotImplementedError(f"Full-text search is not supported for {dialect}")
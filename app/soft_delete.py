@@ -0,0 +1,216 @@
+# --------------- Каскадное мягкое удаление -------------------------
+# is_active категорий, товаров и отзывов — итоговая видимость строки: чтение
+# фильтрует только по is_active своей таблицы и не соединяется с categories
+# или users. Поэтому удаление категории или продавца сразу скрывает всё,
+# что от них зависит, несколькими UPDATE по множествам строк, а
+# inactive_reason запоминает, почему строка скрыта:
+#
+# deleted  — удалена явно (эндпоинт удаления самой строки)
+# category — скрыта вместе с удалённой категорией-предком
+# seller   — товар скрыт вместе с деактивированным продавцом
+# product  — отзыв скрыт вместе со своим товаром
+#
+# Восстановление возвращает только строки, скрытые каскадом, поэтому явно
+# удалённые подкатегории, товары и отзывы остаются удалёнными. Товар
+# становится видимым, только если активны и его категория, и продавец.
+from sqlalchemy import case, null, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.category_tree import category_subtree_cte, hidden_subtree_cte
+from app.models.categories import Category as CategoryModel
+from app.models.products import Product as ProductModel
+from app.models.reviews import Review as ReviewModel
+from app.models.users import User as UserModel
+from app.ratings import rating_values, review_aggregates
+
+
+async def deactivate_category_subtree(db: AsyncSession, category_id: int) -> list[int]:
+    """
+    Скрывает активную категорию, её активные подкатегории, их товары и отзывы
+    на эти товары четырьмя запросами в текущей транзакции.
+    Возвращает id скрытых категорий.
+    """
+    # id поддерева выбираются заранее: с явным списком планировщик точно
+    # оценивает число товаров и идёт по индексам, а оценка рекурсивного
+    # CTE завышена и приводит к полному сканированию products и reviews
+    category_ids = list(
+        await db.scalars(select(category_subtree_cte(category_id).c.id))
+    )
+    # Категории скрываются первыми: UPDATE ждёт транзакции, которые создают или
+    # переносят товары в эти категории и держат их строки (FOR SHARE), и
+    # следующие запросы уже видят эти товары. Транзакция, пришедшая позже,
+    # после ожидания видит категорию неактивной
+    await db.execute(
+        update(CategoryModel)
+        .where(CategoryModel.id.in_(category_ids))
+        .values(
+            is_active=False,
+            inactive_reason=case(
+                (CategoryModel.id == category_id, "deleted"), else_="category"
+            ),
+        )
+        .execution_options(synchronize_session=False)
+    )
+    products = select(ProductModel.id).where(
+        ProductModel.category_id.in_(category_ids), ProductModel.is_active == True
+    )
+    await db.execute(
+        update(ReviewModel)
+        .where(ReviewModel.product_id.in_(products), ReviewModel.is_active == True)
+        .values(is_active=False, inactive_reason="product")
+        .execution_options(synchronize_session=False)
+    )
+    await db.execute(
+        update(ProductModel)
+        .where(
+            ProductModel.category_id.in_(category_ids),
+            ProductModel.is_active == True,
+        )
+        .values(
+            is_active=False,
+            inactive_reason="category",
+            version=ProductModel.version + 1,
+        )
+        .execution_options(synchronize_session=False)
+    )
+    return category_ids
+
+
+async def restore_category_subtree(db: AsyncSession, category_id: int) -> list[int]:
+    """
+    Восстанавливает удалённую категорию вместе со всем, что было скрыто
+    при её удалении, пятью запросами в текущей транзакции.
+    Родитель категории должен быть активен (проверяет вызывающий).
+    Возвращает id восстановленных категорий.
+    """
+    category_ids = list(await db.scalars(select(hidden_subtree_cte(category_id).c.id)))
+    seller_active = (
+        select(UserModel.is_active)
+        .where(UserModel.id == ProductModel.seller_id)
+        .scalar_subquery()
+    )
+    await db.execute(
+        update(ProductModel)
+        .where(
+            ProductModel.category_id.in_(category_ids),
+            ProductModel.is_active == False,
+            ProductModel.inactive_reason == "category",
+        )
+        .values(
+            is_active=seller_active,
+            inactive_reason=case((seller_active == True, null()), else_="seller"),
+            version=ProductModel.version + 1,
+        )
+        .execution_options(synchronize_session=False)
+    )
+    await _restore_product_reviews(db, ProductModel.category_id.in_(category_ids))
+    await db.execute(
+        update(CategoryModel)
+        .where(CategoryModel.id.in_(category_ids))
+        .values(is_active=True, inactive_reason=None)
+        .execution_options(synchronize_session=False)
+    )
+    return category_ids
+
+
+async def deactivate_seller(db: AsyncSession, user_id: int) -> list[int]:
+    """
+    Деактивирует продавца и скрывает его активные товары и отзывы на них
+    тремя запросами в текущей транзакции. Возвращает id скрытых товаров.
+    """
+    products = select(ProductModel.id).where(
+        ProductModel.seller_id == user_id, ProductModel.is_active == True
+    )
+    await db.execute(
+        update(ReviewModel)
+        .where(ReviewModel.product_id.in_(products), ReviewModel.is_active == True)
+        .values(is_active=False, inactive_reason="product")
+        .execution_options(synchronize_session=False)
+    )
+    result = await db.execute(
+        update(ProductModel)
+        .where(ProductModel.seller_id == user_id, ProductModel.is_active == True)
+        .values(
+            is_active=False,
+            inactive_reason="seller",
+            version=ProductModel.version + 1,
+        )
+        .returning(ProductModel.id)
+        .execution_options(synchronize_session=False)
+    )
+    product_ids = list(result.scalars())
+    await db.execute(
+        update(UserModel).where(UserModel.id == user_id).values(is_active=False)
+    )
+    return product_ids
+
+
+async def restore_seller(db: AsyncSession, user_id: int) -> list[int]:
+    """
+    Активирует продавца и возвращает товары и отзывы, скрытые при его
+    деактивации, четырьмя запросами в текущей транзакции. Товар в удалённой
+    категории остаётся скрытым до её восстановления.
+    Возвращает id товаров, изменённых восстановлением.
+    """
+    category_active = (
+        select(CategoryModel.is_active)
+        .where(CategoryModel.id == ProductModel.category_id)
+        .scalar_subquery()
+    )
+    await db.execute(
+        update(UserModel).where(UserModel.id == user_id).values(is_active=True)
+    )
+    result = await db.execute(
+        update(ProductModel)
+        .where(
+            ProductModel.seller_id == user_id,
+            ProductModel.is_active == False,
+            ProductModel.inactive_reason == "seller",
+        )
+        .values(
+            is_active=category_active,
+            inactive_reason=case((category_active == True, null()), else_="category"),
+            version=ProductModel.version + 1,
+        )
+        .returning(ProductModel.id)
+        .execution_options(synchronize_session=False)
+    )
+    product_ids = list(result.scalars())
+    await _restore_product_reviews(db, ProductModel.seller_id == user_id)
+    return product_ids
+
+
+async def _restore_product_reviews(db: AsyncSession, product_filter) -> None:
+    """
+    Возвращает отзывы, скрытые вместе с товарами, для активных товаров
+    из product_filter и пересчитывает их агрегаты рейтинга там, где они
+    разошлись с отзывами.
+    """
+    products = select(ProductModel.id).where(
+        product_filter, ProductModel.is_active == True
+    )
+    await db.execute(
+        update(ReviewModel)
+        .where(
+            ReviewModel.product_id.in_(products),
+            ReviewModel.is_active == False,
+            ReviewModel.inactive_reason == "product",
+        )
+        .values(is_active=True, inactive_reason=None)
+        .execution_options(synchronize_session=False)
+    )
+    # Пока товар был скрыт, rebuild_ratings мог обнулить его агрегаты
+    review_sum, review_count = review_aggregates()
+    await db.execute(
+        update(ProductModel)
+        .where(
+            product_filter,
+            ProductModel.is_active == True,
+            or_(
+                ProductModel.rating_count != review_count,
+                ProductModel.rating_sum != review_sum,
+            ),
+        )
+        .values(**rating_values(review_sum, review_count))
+        .execution_options(synchronize_session=False)
+    )
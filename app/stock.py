@@ -0,0 +1,386 @@
+# --------------- Резервирование остатков -------------------------
+# Остаток списывается одним условным UPDATE ... SET stock = stock - n
+# WHERE stock >= n RETURNING: проверка и списание атомарны, поэтому
+# параллельные покупатели не могут купить больше, чем есть на складе.
+# Резервация удерживает списанное количество до подтверждения, отмены или
+# истечения срока; истёкшие резервации возвращает на склад фоновая задача.
+#
+# Для очень популярных товаров продавец может включить шардированный
+# счётчик: остаток делится между stock_shard_count строками stock_shards,
+# и резервация списывает с одной случайной строки, поэтому параллельные
+# UPDATE не выстраиваются в очередь за блокировкой одной строки products.
+# products.stock у таких товаров — отображаемая сумма шардов, её обновляет
+# та же фоновая задача.
+import asyncio
+import logging
+import random
+from collections import Counter
+from datetime import datetime
+
+from sqlalchemy import (bindparam, case, delete, func, insert, or_, select,
+                        update)
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.cache import PRODUCTS_ALL, product_tag, response_cache
+from app.config import STOCK_SWEEP_BATCH_SIZE, STOCK_SWEEP_INTERVAL
+from app.database import async_session_maker
+from app.models import Product as ProductModel
+from app.models.stock import StockReservation as StockReservationModel
+from app.models.stock import StockShard as StockShardModel
+
+logger = logging.getLogger("app.stock")
+
+products_table = ProductModel.__table__
+shards_table = StockShardModel.__table__
+
+
+async def decrement_stock(db: AsyncSession, product_id: int, quantity: int) -> bool:
+    """
+    Атомарно списывает quantity единиц активного товара в текущей транзакции.
+    Возвращает False, если товара нет или остатка не хватает.
+    Для обычного товара это один UPDATE; строка шардированного товара
+    условию не соответствует и не блокируется.
+    """
+    result = await db.execute(
+        update(ProductModel)
+        .where(
+            ProductModel.id == product_id,
+            ProductModel.is_active == True,
+            ProductModel.stock_shard_count == 0,
+            ProductModel.stock >= quantity,
+        )
+        .values(stock=ProductModel.stock - quantity, version=ProductModel.version + 1)
+        .returning(ProductModel.stock)
+        .execution_options(synchronize_session=False)
+    )
+    if result.first() is not None:
+        return True
+
+    shard_count = await db.scalar(
+        select(ProductModel.stock_shard_count).where(
+            ProductModel.id == product_id, ProductModel.is_active == True
+        )
+    )
+    if not shard_count:
+        return False
+    return await _decrement_shards(db, product_id, quantity)
+
+
+async def _decrement_shards(db: AsyncSession, product_id: int, quantity: int) -> bool:
+    """
+    Списывает остаток с одного случайного шарда, а если ни в одном
+    свободном шарде не хватает — собирает его из нескольких шардов под
+    блокировкой строк.
+    """
+    # Шард выбирается среди незаблокированных (SKIP LOCKED): неудачная попытка
+    # не ждёт и не удерживает блокировок до сборки из нескольких шардов
+    shard = (
+        select(StockShardModel.shard)
+        .where(
+            StockShardModel.product_id == product_id,
+            StockShardModel.stock >= quantity,
+        )
+        .order_by(func.random())
+        .limit(1)
+        .with_for_update(skip_locked=True)
+        .scalar_subquery()
+    )
+    result = await db.execute(
+        update(StockShardModel)
+        .where(
+            StockShardModel.product_id == product_id,
+            StockShardModel.shard == shard,
+            StockShardModel.stock >= quantity,
+        )
+        .values(stock=StockShardModel.stock - quantity)
+        .returning(StockShardModel.stock)
+        .execution_options(synchronize_session=False)
+    )
+    if result.first() is not None:
+        return True
+
+    # Шарды блокируются в порядке номеров, чтобы параллельные сборки
+    # не приводили к взаимоблокировкам
+    rows = (
+        await db.execute(
+            select(StockShardModel.shard, StockShardModel.stock)
+            .where(StockShardModel.product_id == product_id)
+            .order_by(StockShardModel.shard)
+            .with_for_update()
+        )
+    ).all()
+    if sum(stock for _, stock in rows) < quantity:
+        return False
+    params = []
+    remaining = quantity
+    for shard, stock in rows:
+        take = min(stock, remaining)
+        if take:
+            params.append({"b_shard": shard, "b_stock": stock - take})
+            remaining -= take
+        if not remaining:
+            break
+    await db.execute(
+        update(shards_table)
+        .where(
+            shards_table.c.product_id == product_id,
+            shards_table.c.shard == bindparam("b_shard"),
+        )
+        .values(stock=bindparam("b_stock")),
+        params,
+    )
+    return True
+
+
+async def decrement_stock_bulk(
+    db: AsyncSession, quantities: dict[int, int]
+) -> list[int]:
+    """
+    Списывает остатки нескольких товаров (id товара -> количество) в текущей
+    транзакции не более чем тремя запросами при любом числе товаров:
+    один UPDATE с CASE для обычных товаров, блокировка и executemany для
+    шардированных. Возвращает id товаров, которым не хватило остатка;
+    в этом случае часть остатков уже списана и транзакцию нужно откатить.
+    """
+    if not quantities:
+        return []
+    quantity = case(quantities, value=ProductModel.id)
+    result = await db.execute(
+        update(ProductModel)
+        .where(
+            ProductModel.id.in_(quantities),
+            ProductModel.is_active == True,
+            ProductModel.stock_shard_count == 0,
+            ProductModel.stock >= quantity,
+        )
+        .values(stock=ProductModel.stock - quantity, version=ProductModel.version + 1)
+        .returning(ProductModel.id)
+        .execution_options(synchronize_session=False)
+    )
+    remaining = set(quantities) - set(result.scalars())
+    if not remaining:
+        return []
+
+    # Остальные товары либо шардированы, либо их остатка не хватило.
+    # Шарды блокируются в порядке (товар, номер), как и в _decrement_shards
+    rows = await db.execute(
+        select(StockShardModel.product_id, StockShardModel.shard, StockShardModel.stock)
+        .where(StockShardModel.product_id.in_(remaining))
+        .order_by(StockShardModel.product_id, StockShardModel.shard)
+        .with_for_update()
+    )
+    shards: dict[int, list[tuple[int, int]]] = {}
+    for product_id, shard, stock in rows:
+        shards.setdefault(product_id, []).append((shard, stock))
+
+    failed, params = [], []
+    for product_id in sorted(remaining):
+        needed = quantities[product_id]
+        product_shards = shards.get(product_id, [])
+        if sum(stock for _, stock in product_shards) < needed:
+            failed.append(product_id)
+            continue
+        for shard, stock in product_shards:
+            take = min(stock, needed)
+            if take:
+                params.append(
+                    {"b_id": product_id, "b_shard": shard, "b_stock": stock - take}
+                )
+                needed -= take
+            if not needed:
+                break
+    if failed:
+        return failed
+    await db.execute(
+        update(shards_table)
+        .where(
+            shards_table.c.product_id == bindparam("b_id"),
+            shards_table.c.shard == bindparam("b_shard"),
+        )
+        .values(stock=bindparam("b_stock")),
+        params,
+    )
+    return []
+
+
+async def return_stock(db: AsyncSession, quantities: dict[int, int]) -> None:
+    """
+    Возвращает на склад количества по товарам (id товара -> количество)
+    в текущей транзакции: один executemany для обычных товаров и один
+    для шардированных (в случайный шард).
+    """
+    if not quantities:
+        return
+    rows = await db.execute(
+        select(ProductModel.id, ProductModel.stock_shard_count).where(
+            ProductModel.id.in_(quantities)
+        )
+    )
+    plain, sharded = [], []
+    for product_id, shard_count in rows:
+        if shard_count:
+            sharded.append(
+                {
+                    "b_id": product_id,
+                    "b_shard": random.randrange(shard_count),
+                    "b_quantity": quantities[product_id],
+                }
+            )
+        else:
+            plain.append({"b_id": product_id, "b_quantity": quantities[product_id]})
+    if plain:
+        await db.execute(
+            update(products_table)
+            .where(products_table.c.id == bindparam("b_id"))
+            .values(
+                stock=products_table.c.stock + bindparam("b_quantity"),
+                version=products_table.c.version + 1,
+            ),
+            plain,
+        )
+    if sharded:
+        await db.execute(
+            update(shards_table)
+            .where(
+                shards_table.c.product_id == bindparam("b_id"),
+                shards_table.c.shard == bindparam("b_shard"),
+            )
+            .values(stock=shards_table.c.stock + bindparam("b_quantity")),
+            sharded,
+        )
+
+
+async def set_stock_shards(
+    db: AsyncSession, product_id: int, shard_count: int, stock: int | None = None
+) -> int:
+    """
+    Переводит товар в режим shard_count шардов (0 — обычный остаток в
+    products.stock), распределяя остаток поровну. Если stock не передан,
+    сохраняется текущий остаток. Возвращает итоговый остаток.
+    Выполняется в текущей транзакции под блокировкой строки товара.
+    """
+    current_count, current_stock = (
+        await db.execute(
+            select(ProductModel.stock_shard_count, ProductModel.stock)
+            .where(ProductModel.id == product_id)
+            .with_for_update()
+        )
+    ).one()
+    if stock is None:
+        if current_count:
+            result = await db.scalars(
+                select(StockShardModel.stock)
+                .where(StockShardModel.product_id == product_id)
+                .with_for_update()
+            )
+            stock = sum(result)
+        else:
+            stock = current_stock or 0
+
+    await db.execute(
+        delete(StockShardModel).where(StockShardModel.product_id == product_id)
+    )
+    if shard_count:
+        base, extra = divmod(stock, shard_count)
+        await db.execute(
+            insert(StockShardModel),
+            [
+                {
+                    "product_id": product_id,
+                    "shard": shard,
+                    "stock": base + (1 if shard < extra else 0),
+                }
+                for shard in range(shard_count)
+            ],
+        )
+    await db.execute(
+        update(ProductModel)
+        .where(ProductModel.id == product_id)
+        .values(
+            stock=stock,
+            stock_shard_count=shard_count,
+            version=ProductModel.version + 1,
+        )
+        .execution_options(synchronize_session=False)
+    )
+    return stock
+
+
+async def expire_reservations(
+    db: AsyncSession, batch_size: int = STOCK_SWEEP_BATCH_SIZE
+) -> set[int]:
+    """
+    Переводит пачку истёкших активных резерваций в статус expired и
+    возвращает их количество на склад одной транзакцией.
+    Возвращает id товаров, остаток которых изменился.
+    """
+    expired = (
+        select(StockReservationModel.id)
+        .where(
+            StockReservationModel.status == "active",
+            StockReservationModel.expires_at <= datetime.now(),
+        )
+        .limit(batch_size)
+    )
+    result = await db.execute(
+        update(StockReservationModel)
+        .where(
+            StockReservationModel.id.in_(expired),
+            StockReservationModel.status == "active",
+        )
+        .values(status="expired")
+        .returning(StockReservationModel.product_id, StockReservationModel.quantity)
+        .execution_options(synchronize_session=False)
+    )
+    quantities = Counter()
+    for product_id, quantity in result:
+        quantities[product_id] += quantity
+    await return_stock(db, quantities)
+    await db.commit()
+    return set(quantities)
+
+
+async def sync_sharded_stock(db: AsyncSession) -> set[int]:
+    """
+    Записывает в products.stock шардированных товаров сумму их шардов.
+    Возвращает id товаров, у которых отображаемый остаток изменился.
+    """
+    shard_sum = (
+        select(func.coalesce(func.sum(StockShardModel.stock), 0))
+        .where(StockShardModel.product_id == ProductModel.id)
+        .scalar_subquery()
+    )
+    result = await db.execute(
+        update(ProductModel)
+        .where(
+            ProductModel.stock_shard_count > 0,
+            or_(ProductModel.stock.is_(None), ProductModel.stock != shard_sum),
+        )
+        .values(stock=shard_sum, version=ProductModel.version + 1)
+        .returning(ProductModel.id)
+        .execution_options(synchronize_session=False)
+    )
+    product_ids = set(result.scalars())
+    await db.commit()
+    return product_ids
+
+
+async def sweep_stock_periodically() -> None:
+    """
+    Фоновая задача воркера: раз в STOCK_SWEEP_INTERVAL секунд возвращает на
+    склад истёкшие резервации и обновляет остаток шардированных товаров.
+    """
+    while True:
+        try:
+            changed = set()
+            async with async_session_maker() as session:
+                while expired := await expire_reservations(session):
+                    changed |= expired
+                changed |= await sync_sharded_stock(session)
+            if changed:
+                await response_cache.invalidate(
+                    *map(product_tag, changed), PRODUCTS_ALL
+                )
+        except Exception:
+            logger.exception("Stock sweep failed")
+        await asyncio.sleep(STOCK_SWEEP_INTERVAL)
@@ -0,0 +1,12 @@
+# --------------- Нагрузочные тесты и бенчмарки -------------------------
+# seed       — наполнение локальной базы (SQLite или PostgreSQL) тестовыми данными
+# load       — нагрузка на все маршруты с заданной конкурентностью, отчёт JSON
+#              с пропускной способностью и p50/p95/p99 по эндпоинтам и сравнение
+#              с сохранённым базовым отчётом
+# replay     — воспроизведение журнала HTTP-запросов (JSON Lines)
+# projection — списки из ORM-объектов против выборки столбцов схемы ответа
+# stock      — параллельное резервирование одного товара: пропускная способность
+#              и проверка, что товар не продан сверх остатка
+# plans      — планы (EXPLAIN) всех SQL-запросов каждого маршрута: полные
+#              сканирования products, reviews, users и рост стоимости планов
+#              относительно сохранённого базового отчёта
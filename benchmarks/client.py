@@ -0,0 +1,39 @@
+# --------------- HTTP-клиент бенчмарков -------------------------
+import httpx
+
+
+def make_client(base_url: str | None, concurrency: int) -> httpx.AsyncClient:
+    """
+    Клиент к запущенному серверу по base_url или, если он не задан,
+    к приложению в текущем процессе через ASGI (без сети).
+    """
+    limits = httpx.Limits(
+        max_connections=concurrency, max_keepalive_connections=concurrency
+    )
+    timeout = httpx.Timeout(60.0)
+    if base_url:
+        return httpx.AsyncClient(base_url=base_url, limits=limits, timeout=timeout)
+
+    from app.main import app
+
+    return httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=app),
+        base_url="http://bench",
+        timeout=timeout,
+    )
+
+
+async def login(client: httpx.AsyncClient, email: str, password: str) -> dict:
+    """
+    Получает токены пользователя и возвращает заголовки авторизации
+    и refresh-токен.
+    """
+    response = await client.post(
+        "/users/token", data={"username": email, "password": password}
+    )
+    response.raise_for_status()
+    tokens = response.json()
+    return {
+        "headers": {"Authorization": f"Bearer {tokens['access_token']}"},
+        "refresh_token": tokens["refresh_token"],
+    }
@@ -0,0 +1,165 @@
+# --------------- Нагрузка на все маршруты -------------------------
+# Запуск (база наполнена benchmarks.seed):
+#   python -m benchmarks.load --concurrency 32 --duration 60 --output baseline.json
+#   python -m benchmarks.load --base-url http://localhost:8000 --baseline baseline.json
+# Без --base-url приложение запускается в текущем процессе через ASGI.
+import argparse
+import asyncio
+import random
+import sys
+import time
+from dataclasses import replace
+
+from benchmarks.client import make_client
+from benchmarks.scenarios import (SCENARIOS, BenchContext, Scenario,
+                                  create_context)
+from benchmarks.stats import (EndpointStats, build_report, compare_reports,
+                              load_report, print_report, save_report)
+
+
+async def worker(
+    ctx: BenchContext,
+    scenarios: list[Scenario],
+    weights: list[float],
+    stats: dict[str, EndpointStats],
+    deadline: float,
+    budget: list[int],
+) -> None:
+    """
+    Выполняет случайные сценарии с учётом весов до дедлайна или исчерпания
+    общего числа запросов.
+    """
+    while time.perf_counter() < deadline and budget[0] > 0:
+        budget[0] -= 1
+        scenario = ctx.rng.choices(scenarios, weights)[0]
+        start = time.perf_counter()
+        try:
+            response = await scenario.run(ctx)
+            status = response.status_code
+        except Exception:
+            status = 0
+        latency = time.perf_counter() - start
+        stats[scenario.name].record(latency, status, status in scenario.ok_statuses)
+
+
+def select_scenarios(only: list[str], weights: list[str]) -> list[Scenario]:
+    """
+    Сценарии прогона с учётом фильтра --only и переопределений веса --weight.
+    """
+    overrides = {}
+    for item in weights:
+        name, _, value = item.rpartition("=")
+        overrides[name] = float(value)
+    selected = []
+    for scenario in SCENARIOS:
+        if only and not any(part in scenario.name for part in only):
+            continue
+        weight = overrides.get(scenario.name, scenario.weight)
+        if weight > 0:
+            selected.append(replace(scenario, weight=weight))
+    return selected
+
+
+async def run(args: argparse.Namespace) -> dict:
+    scenarios = select_scenarios(args.only, args.weight)
+    if not scenarios:
+        raise SystemExit("No scenarios selected")
+    rng = random.Random(args.seed)
+    async with make_client(args.base_url, args.concurrency) as client:
+        ctx = await create_context(client, rng, args.sellers, args.buyers)
+        stats = {scenario.name: EndpointStats() for scenario in scenarios}
+        weights = [scenario.weight for scenario in scenarios]
+
+        # Прогрев: запросы не попадают в отчёт
+        warmup = {scenario.name: EndpointStats() for scenario in scenarios}
+        warmup_deadline = time.perf_counter() + args.warmup
+        await asyncio.gather(
+            *(
+                worker(ctx, scenarios, weights, warmup, warmup_deadline, [sys.maxsize])
+                for _ in range(args.concurrency)
+            )
+        )
+
+        started = time.perf_counter()
+        budget = [args.requests or sys.maxsize]
+        await asyncio.gather(
+            *(
+                worker(ctx, scenarios, weights, stats, started + args.duration, budget)
+                for _ in range(args.concurrency)
+            )
+        )
+        elapsed = time.perf_counter() - started
+
+    config = {
+        "base_url": args.base_url or "asgi",
+        "concurrency": args.concurrency,
+        "duration_s": args.duration,
+        "requests": args.requests,
+        "seed": args.seed,
+        "max_product_id": ctx.max_product_id,
+        "categories": len(ctx.category_ids),
+    }
+    return build_report(
+        {name: s for name, s in stats.items() if s.latencies}, elapsed, config
+    )
+
+
+def add_common_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        "--base-url", help="Адрес сервера; по умолчанию ASGI в процессе"
+    )
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--output", help="Сохранить отчёт JSON")
+    parser.add_argument("--baseline", help="Базовый отчёт JSON для сравнения")
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.2,
+        help="Допустимый рост p95 относительно базового отчёта (доля)",
+    )
+
+
+def finish(report: dict, args: argparse.Namespace) -> None:
+    """
+    Печатает и сохраняет отчёт; при деградации относительно базового
+    отчёта завершает процесс с кодом 1.
+    """
+    print_report(report)
+    if args.output:
+        save_report(report, args.output)
+    if args.baseline:
+        regressions = compare_reports(
+            report, load_report(args.baseline), args.tolerance
+        )
+        if regressions:
+            print("\nRegressions:")
+            for line in regressions:
+                print(f"  {line}")
+            raise SystemExit(1)
+        print("\nNo regressions against baseline")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Нагрузочный тест всех маршрутов")
+    add_common_arguments(parser)
+    parser.add_argument("--duration", type=float, default=30, help="Секунды")
+    parser.add_argument("--requests", type=int, default=0, help="Лимит запросов")
+    parser.add_argument("--warmup", type=float, default=5, help="Прогрев, секунды")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--sellers", type=int, default=5, help="Продавцов с токенами")
+    parser.add_argument("--buyers", type=int, default=20, help="Покупателей с токенами")
+    parser.add_argument(
+        "--only", action="append", default=[], help="Только сценарии с подстрокой"
+    )
+    parser.add_argument(
+        "--weight",
+        action="append",
+        default=[],
+        help='Вес сценария, например "GET /products/export=1"',
+    )
+    args = parser.parse_args()
+    finish(asyncio.run(run(args)), args)
+
+
+if __name__ == "__main__":
+    main()
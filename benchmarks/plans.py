@@ -0,0 +1,328 @@
+# --------------- Регрессии планов запросов -------------------------
+# Запуск (база наполнена benchmarks.seed; на маленькой базе планировщик
+# выбирает полное сканирование даже при наличии индекса):
+#   python -m benchmarks.plans --output plans.json
+#   python -m benchmarks.plans --baseline plans.json
+# Выполняет в текущем процессе каждый сценарий benchmarks.scenarios, включая
+# сценарии с нулевым весом, собирает все SQL-запросы, которые отправили
+# эндпоинты, и строит план каждого запроса с его параметрами: EXPLAIN
+# (FORMAT JSON) в PostgreSQL, EXPLAIN QUERY PLAN в SQLite. EXPLAIN без
+# ANALYZE только планирует запрос и не выполняет его повторно.
+# Прогон завершается с кодом 1, если запрос полностью сканирует products,
+# reviews или users (кроме сканирований из ALLOWED_SCANS) или если оценка
+# стоимости плана (только PostgreSQL) выросла больше допустимого
+# относительно базового отчёта. Сценарии записи меняют данные, как и
+# в benchmarks.load. В SQLite обход индекса не считается сканированием,
+# только если индекс выдаёт строки в порядке ORDER BY и запрос ограничен
+# LIMIT; обход таблицы без индекса считается всегда. Эту проверку по
+# сценариям на сгенерированной базе SQLite выполняет tests/test_query_plans.py.
+import argparse
+import asyncio
+import hashlib
+import json
+import random
+import re
+from contextlib import contextmanager
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+from app.cache import response_cache
+from app.category_tree import category_tree_cache
+from app.database import async_engine, read_async_engine
+from app.principals import principal_cache
+from benchmarks.client import make_client
+from benchmarks.scenarios import SCENARIOS, create_context
+from benchmarks.stats import load_report, save_report
+
+# Таблицы, полное сканирование которых считается регрессией
+HOT_TABLES = ("products", "reviews", "users")
+
+# Полные сканирования, которые ожидаемы по смыслу запроса
+ALLOWED_SCANS = {
+    # Выгрузка читает весь активный каталог
+    "GET /products/export": {"products"},
+    # Снимок дерева считает товары всех категорий; строится редко
+    # и отдаётся из памяти
+    "GET /categories/tree": {"products"},
+    # Слова SEARCH_WORDS есть почти в каждом сгенерированном товаре, и для
+    # таких запросов полное сканирование дешевле индекса GIN
+    "GET /products/search": {"products"},
+    # Без фильтра по категории список в порядке id (и newest в обратном) читает
+    # таблицу в порядке первичного ключа до LIMIT: почти все товары активны,
+    # отдельного индекса для такого порядка нет ни в SQLite, ни в PostgreSQL
+    "GET /products/": {"products"},
+    "GET /products/?filters": {"products"},
+    # Поддерево из нескольких категорий SQLite обходит в порядке id до LIMIT:
+    # слить диапазоны индекса (category_id, id) по списку категорий он не умеет.
+    # Товары листовой категории читаются по этому индексу
+    "GET /products/category/{id}": {"products"},
+}
+
+# Запросы, которые читают таблицы; INSERT ... VALUES сканировать нечего
+EXPLAINABLE = ("SELECT", "WITH", "UPDATE", "DELETE")
+
+# Строка плана SQLite для обхода таблицы: без индекса (полное сканирование,
+# в том числе в порядке rowid) или целиком по индексу
+SQLITE_SCAN = re.compile(
+    r"^SCAN (\w+)(?: AS \w+)?(?P<index> USING (?:COVERING )?INDEX \w+)?(?: .*)?$"
+)
+
+
+class StatementRecorder:
+    """
+    Собирает SQL-запросы движков приложения (текст, параметры DBAPI)
+    внутри блока capture.
+    """
+
+    def __init__(self):
+        self.statements: list[tuple[str, tuple]] | None = None
+        self._engines = {async_engine.sync_engine, read_async_engine.sync_engine}
+
+    def _record(self, conn, cursor, statement, parameters, context, executemany):
+        if self.statements is None:
+            return
+        # executemany передаёт список наборов параметров, план строится
+        # по первому
+        if executemany and parameters and isinstance(parameters[0], (tuple, list)):
+            parameters = parameters[0]
+        self.statements.append((statement, tuple(parameters or ())))
+
+    @contextmanager
+    def capture(self):
+        for engine in self._engines:
+            event.listen(engine, "before_cursor_execute", self._record)
+        self.statements = []
+        try:
+            yield self.statements
+        finally:
+            self.statements = None
+            for engine in self._engines:
+                event.remove(engine, "before_cursor_execute", self._record)
+
+
+def normalize(statement: str) -> str:
+    """
+    Текст запроса без различий в пробелах, нумерации параметров и длине
+    списков IN: один и тот же запрос эндпоинта даёт один ключ отчёта.
+    """
+    sql = " ".join(statement.split())
+    sql = re.sub(r"\$\d+", "?", sql)
+    return re.sub(r"\(\?(?:::\w+)?(?:, \?(?:::\w+)?)*\)", "(?...)", sql)
+
+
+def statement_key(scenario: str, sql: str) -> str:
+    return f"{scenario} | {hashlib.sha1(sql.encode()).hexdigest()[:12]}"
+
+
+def seq_scans_postgresql(plan: dict) -> set[str]:
+    """
+    Таблицы, которые узлы плана PostgreSQL читают полным сканированием.
+    """
+    scans = set()
+    if plan.get("Node Type") == "Seq Scan":
+        scans.add(plan["Relation Name"])
+    for child in plan.get("Plans", []):
+        scans |= seq_scans_postgresql(child)
+    return scans
+
+
+async def explain(
+    conn: AsyncConnection, dialect: str, statement: str, parameters: tuple
+) -> tuple[float | None, set[str]]:
+    """
+    Оценка стоимости плана (None в SQLite) и полностью сканируемые таблицы.
+    """
+    if dialect == "postgresql":
+        result = await conn.exec_driver_sql(
+            "EXPLAIN (FORMAT JSON) " + statement, parameters
+        )
+        plan = result.scalar()
+        # asyncpg отдаёт значения типа json строкой
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        root = plan[0]["Plan"]
+        return root["Total Cost"], seq_scans_postgresql(root)
+
+    result = await conn.exec_driver_sql("EXPLAIN QUERY PLAN " + statement, parameters)
+    details = [row[-1] for row in result]
+    # Обход индекса, который выдаёт строки в порядке ORDER BY, останавливается
+    # на LIMIT, поэтому сканированием не считается. Обход таблицы без индекса
+    # считается всегда: при избирательном WHERE он читает всю таблицу
+    ordered_by_index = "LIMIT" in statement.upper() and not any(
+        "USE TEMP B-TREE" in detail for detail in details
+    )
+    scans = set()
+    for detail in details:
+        match = SQLITE_SCAN.match(detail)
+        if match and not (match.group("index") and ordered_by_index):
+            scans.add(match.group(1))
+    return None, scans
+
+
+async def capture_statements(
+    args: argparse.Namespace,
+) -> tuple[dict[str, list], list[str]]:
+    """
+    Выполняет каждый сценарий repeat раз и возвращает запросы по сценариям
+    и ошибки упавших сценариев (их запросы в отчёт не попадают). Кеши
+    ответов, дерева категорий и пользователей сбрасываются перед каждым
+    запросом, чтобы эндпоинты действительно обращались к базе.
+    """
+    recorder = StatementRecorder()
+    captured, errors = {}, []
+    async with make_client(None, 1) as client:
+        ctx = await create_context(
+            client, random.Random(args.seed), args.sellers, args.buyers
+        )
+        for scenario in SCENARIOS:
+            if args.only and not any(part in scenario.name for part in args.only):
+                continue
+            statements = []
+            try:
+                for _ in range(args.repeat):
+                    await response_cache.clear()
+                    category_tree_cache.invalidate()
+                    principal_cache.clear()
+                    with recorder.capture() as recorded:
+                        response = await scenario.run(ctx)
+                    if response.status_code not in scenario.ok_statuses:
+                        print(
+                            f"{scenario.name}: unexpected status "
+                            f"{response.status_code}"
+                        )
+                    statements.extend(recorded)
+            except Exception as exc:
+                errors.append(f"{scenario.name}: failed with {exc.__class__.__name__}")
+                continue
+            captured[scenario.name] = statements
+    return captured, errors
+
+
+async def build_plans(args: argparse.Namespace) -> dict:
+    captured, errors = await capture_statements(args)
+    dialect = async_engine.dialect.name
+    plans = {}
+    async with async_engine.connect() as conn:
+        # Свежая статистика, иначе планы зависят от того, успел ли
+        # autovacuum обработать данные после наполнения базы
+        await conn.exec_driver_sql("ANALYZE")
+        await conn.commit()
+        for scenario, statements in captured.items():
+            for statement, parameters in statements:
+                if not statement.lstrip().upper().startswith(EXPLAINABLE):
+                    continue
+                sql = normalize(statement)
+                key = statement_key(scenario, sql)
+                cost, scans = await explain(conn, dialect, statement, parameters)
+                entry = plans.setdefault(
+                    key, {"scenario": scenario, "sql": sql, "cost": cost, "scans": []}
+                )
+                if cost is not None:
+                    entry["cost"] = max(entry["cost"], cost)
+                entry["scans"] = sorted(set(entry["scans"]) | scans)
+            await conn.rollback()
+    return {
+        "config": {"dialect": dialect, "seed": args.seed, "repeat": args.repeat},
+        "statements": plans,
+        "errors": errors,
+    }
+
+
+def check_plans(
+    report: dict, baseline: dict | None, tolerance: float, min_cost: float
+) -> list[str]:
+    """
+    Полные сканирования горячих таблиц и рост стоимости планов
+    относительно базового отчёта. Планы дешевле min_cost не сравниваются:
+    их оценка заметно меняется от небольшого прироста данных.
+    """
+    problems = list(report["errors"])
+    base_statements = baseline["statements"] if baseline else {}
+    for key, entry in report["statements"].items():
+        allowed = ALLOWED_SCANS.get(entry["scenario"], set())
+        for table in entry["scans"]:
+            if table in HOT_TABLES and table not in allowed:
+                problems.append(
+                    f"{entry['scenario']}: seq scan on {table}\n      {entry['sql']}"
+                )
+        base = base_statements.get(key)
+        if base is None or base.get("cost") is None or entry["cost"] is None:
+            continue
+        if entry["cost"] > max(base["cost"] * (1 + tolerance), min_cost):
+            problems.append(
+                f"{entry['scenario']}: cost {base['cost']:.1f} -> "
+                f"{entry['cost']:.1f}\n      {entry['sql']}"
+            )
+    return problems
+
+
+def print_plans(report: dict, baseline: dict | None) -> None:
+    base_statements = baseline["statements"] if baseline else {}
+    by_scenario: dict[str, list[dict]] = {}
+    for key, entry in report["statements"].items():
+        by_scenario.setdefault(entry["scenario"], []).append(
+            {**entry, "new": bool(baseline) and key not in base_statements}
+        )
+    print(f"{'scenario':<40} {'stmts':>5} {'max cost':>12} {'new':>4}  scans")
+    for scenario, entries in by_scenario.items():
+        costs = [entry["cost"] for entry in entries if entry["cost"] is not None]
+        scans = sorted({table for entry in entries for table in entry["scans"]})
+        max_cost = f"{max(costs):.1f}" if costs else "-"
+        new = sum(entry["new"] for entry in entries)
+        print(
+            f"{scenario:<40} {len(entries):>5} {max_cost:>12} {new:>4}  "
+            f"{', '.join(scans)}"
+        )
+
+
+async def run(args: argparse.Namespace) -> dict:
+    try:
+        return await build_plans(args)
+    finally:
+        await async_engine.dispose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Регрессии планов запросов")
+    parser.add_argument("--output", help="Сохранить отчёт JSON")
+    parser.add_argument("--baseline", help="Базовый отчёт JSON для сравнения")
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.5,
+        help="Допустимый рост стоимости плана относительно базового отчёта (доля)",
+    )
+    parser.add_argument(
+        "--min-cost",
+        type=float,
+        default=100,
+        help="Не сравнивать стоимость планов дешевле этой оценки",
+    )
+    parser.add_argument("--repeat", type=int, default=3, help="Запусков сценария")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--sellers", type=int, default=2, help="Продавцов с токенами")
+    parser.add_argument("--buyers", type=int, default=5, help="Покупателей с токенами")
+    parser.add_argument(
+        "--only", action="append", default=[], help="Только сценарии с подстрокой"
+    )
+    args = parser.parse_args()
+
+    report = asyncio.run(run(args))
+    baseline = load_report(args.baseline) if args.baseline else None
+    if baseline and baseline["config"]["dialect"] != report["config"]["dialect"]:
+        raise SystemExit("Baseline was captured on another database")
+    print_plans(report, baseline)
+    if args.output:
+        save_report(report, args.output)
+    problems = check_plans(report, baseline, args.tolerance, args.min_cost)
+    if problems:
+        print("\nPlan problems:")
+        for line in problems:
+            print(f"  {line}")
+        raise SystemExit(1)
+    print("\nNo plan regressions")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+# --------------- Списки: ORM-объекты против выборки столбцов -------------------------
+# Запуск (база наполнена benchmarks.seed или app.commands.generate_data):
+#   python -m benchmarks.projection --rows 10000 --repeat 5
+# Сравнивает формирование JSON-ответа из rows строк двумя способами:
+#   orm        — select(Model), ORM-объекты, проверка схемой через from_attributes
+#   projection — select(столбцы схемы), словари из строк (app/projection.py)
+# Для каждого способа выводятся лучшие время и процессорное время из repeat
+# прогонов и пиковый объём памяти, выделенной во время прогона (tracemalloc).
+import argparse
+import asyncio
+import time
+import tracemalloc
+
+from pydantic import TypeAdapter
+from sqlalchemy import select
+
+from app.database import async_engine, async_session_maker
+from app.models import Category as CategoryModel
+from app.models import Product as ProductModel
+from app.models.reviews import Review as ReviewModel
+from app.projection import rows_to_dicts, schema_columns
+from app.schemas import Category as CategorySchema
+from app.schemas import Product as ProductSchema
+from app.schemas import Review as ReviewSchema
+
+LISTS = {
+    "products": (ProductModel, ProductSchema),
+    "reviews": (ReviewModel, ReviewSchema),
+    "categories": (CategoryModel, CategorySchema),
+}
+
+
+async def render_orm(model, schema, adapter: TypeAdapter, rows: int) -> int:
+    async with async_session_maker() as session:
+        result = await session.scalars(select(model).order_by(model.id).limit(rows))
+        items = result.all()
+        adapter.dump_json(adapter.validate_python(items, from_attributes=True))
+    return len(items)
+
+
+async def render_projection(model, schema, adapter: TypeAdapter, rows: int) -> int:
+    columns = schema_columns(model, schema)
+    async with async_session_maker() as session:
+        result = await session.execute(select(*columns).order_by(model.id).limit(rows))
+        items = rows_to_dicts(result.all())
+        adapter.dump_json(adapter.validate_python(items))
+    return len(items)
+
+
+async def measure(
+    render, model, schema, adapter: TypeAdapter, rows: int, repeat: int
+) -> dict:
+    """
+    Лучшие время и процессорное время из repeat прогонов, затем отдельный
+    прогон под tracemalloc для пикового объёма памяти.
+    """
+    wall = cpu = float("inf")
+    for _ in range(repeat):
+        wall_start, cpu_start = time.perf_counter(), time.process_time()
+        count = await render(model, schema, adapter, rows)
+        wall = min(wall, time.perf_counter() - wall_start)
+        cpu = min(cpu, time.process_time() - cpu_start)
+
+    tracemalloc.start()
+    try:
+        await render(model, schema, adapter, rows)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return {
+        "wall_ms": round(wall * 1000, 1),
+        "cpu_ms": round(cpu * 1000, 1),
+        "peak_kib": peak // 1024,
+        "rows": count,
+    }
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description="ORM-объекты против столбцов")
+    parser.add_argument("--rows", type=int, default=10_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--only", choices=sorted(LISTS), action="append")
+    args = parser.parse_args()
+
+    header = (
+        f"{'list':<12} {'mode':<11} {'rows':>6} {'wall ms':>9} "
+        f"{'cpu ms':>9} {'peak KiB':>9}"
+    )
+    print(header)
+    print("-" * len(header))
+    for name in args.only or LISTS:
+        model, schema = LISTS[name]
+        adapter = TypeAdapter(list[schema])
+        results = {}
+        for mode, render in (("orm", render_orm), ("projection", render_projection)):
+            results[mode] = await measure(
+                render, model, schema, adapter, args.rows, args.repeat
+            )
+        for mode, row in results.items():
+            print(
+                f"{name:<12} {mode:<11} {row['rows']:>6} {row['wall_ms']:>9} "
+                f"{row['cpu_ms']:>9} {row['peak_kib']:>9}"
+            )
+        orm, projection = results["orm"], results["projection"]
+        print(
+            f"{'':<12} {'speedup':<11} {'':>6} "
+            f"{orm['wall_ms'] / max(projection['wall_ms'], 0.1):>8.2f}x "
+            f"{orm['cpu_ms'] / max(projection['cpu_ms'], 0.1):>8.2f}x "
+            f"{orm['peak_kib'] / max(projection['peak_kib'], 1):>8.2f}x"
+        )
+    await async_engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
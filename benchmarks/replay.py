@@ -0,0 +1,115 @@
+# --------------- Воспроизведение журнала запросов -------------------------
+# Запуск: python -m benchmarks.replay requests.log --concurrency 16
+#
+# Журнал — JSON Lines, одна запись на строку:
+#   {"method": "GET", "path": "/products/42", "params": {...}, "json": {...},
+#    "as": "seller"}
+# Подходят и строки журнала app.request ({"event": "request", "method", "path"}),
+# строки других событий пропускаются. "as" (admin, seller, buyer) — от чьего
+# имени выполнить запрос; для этого используются пользователи benchmarks.seed.
+import argparse
+import asyncio
+import json
+import re
+import time
+
+from benchmarks.client import login, make_client
+from benchmarks.load import add_common_arguments, finish
+from benchmarks.seed import (ADMIN_EMAIL, BENCH_PASSWORD, buyer_email,
+                             seller_email)
+from benchmarks.stats import EndpointStats, build_report
+
+# Числовые сегменты пути заменяются на {id}, чтобы группировать по маршрутам
+ID_SEGMENT = re.compile(r"/\d+(?=/|$)")
+
+
+def read_log(path: str) -> list[dict]:
+    records = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            if not isinstance(record, dict) or "path" not in record:
+                continue
+            if record.get("event", "request") != "request":
+                continue
+            records.append(record)
+    return records
+
+
+def endpoint_name(record: dict) -> str:
+    return f"{record.get('method', 'GET').upper()} {ID_SEGMENT.sub('/{id}', record['path'])}"
+
+
+async def run(args: argparse.Namespace) -> dict:
+    records = read_log(args.log)
+    if not records:
+        raise SystemExit(f"No request records in {args.log}")
+    stats: dict[str, EndpointStats] = {}
+    queue: asyncio.Queue[dict] = asyncio.Queue()
+    for _ in range(args.repeat):
+        for record in records:
+            queue.put_nowait(record)
+
+    async with make_client(args.base_url, args.concurrency) as client:
+        sessions = {}
+        roles = {record["as"] for record in records if record.get("as")}
+        for role, email in (
+            ("admin", ADMIN_EMAIL),
+            ("seller", seller_email(0)),
+            ("buyer", buyer_email(0)),
+        ):
+            if role in roles:
+                sessions[role] = (await login(client, email, BENCH_PASSWORD))["headers"]
+
+        async def replay_worker() -> None:
+            while not queue.empty():
+                record = queue.get_nowait()
+                name = endpoint_name(record)
+                start = time.perf_counter()
+                try:
+                    response = await client.request(
+                        record.get("method", "GET").upper(),
+                        record["path"],
+                        params=record.get("params"),
+                        json=record.get("json"),
+                        headers=sessions.get(record.get("as")),
+                    )
+                    status = response.status_code
+                except Exception:
+                    status = 0
+                latency = time.perf_counter() - start
+                expected = record.get("status")
+                ok = status == expected if expected else 0 < status < 500
+                stats.setdefault(name, EndpointStats()).record(latency, status, ok)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(replay_worker() for _ in range(args.concurrency)))
+        elapsed = time.perf_counter() - started
+
+    config = {
+        "base_url": args.base_url or "asgi",
+        "concurrency": args.concurrency,
+        "log": args.log,
+        "records": len(records),
+        "repeat": args.repeat,
+    }
+    return build_report(stats, elapsed, config)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Воспроизведение журнала запросов")
+    parser.add_argument("log", help="Файл JSON Lines с запросами")
+    add_common_arguments(parser)
+    parser.add_argument("--repeat", type=int, default=1, help="Повторить журнал N раз")
+    args = parser.parse_args()
+    finish(asyncio.run(run(args)), args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,354 @@
+# --------------- Сценарии нагрузки по маршрутам -------------------------
+# Каждый сценарий — один запрос к одному маршруту. Вес задаёт долю сценария
+# в смеси: чтение каталога преобладает, запись и bcrypt-маршруты редки.
+import random
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass, field
+
+import httpx
+
+from benchmarks.client import login
+from benchmarks.seed import (ADMIN_EMAIL, BENCH_PASSWORD, buyer_email,
+                             seller_email)
+
+SEARCH_WORDS = ["товар", "Product", "описание", "Product 42", "отзыв"]
+
+
+@dataclass
+class BenchContext:
+    """
+    Общие данные прогона: токены, диапазоны id и созданные в прогоне объекты.
+    """
+
+    client: httpx.AsyncClient
+    rng: random.Random
+    admin: dict
+    sellers: list[dict]
+    buyers: list[dict]
+    max_product_id: int
+    category_ids: list[int]
+    cursors: list[str] = field(default_factory=list)
+    created_products: list[tuple[int, dict]] = field(default_factory=list)
+    created_categories: list[int] = field(default_factory=list)
+    created_reviews: list[tuple[int, dict]] = field(default_factory=list)
+    registered: int = 0
+
+    def product_id(self) -> int:
+        return self.rng.randint(1, self.max_product_id)
+
+    def category_id(self) -> int:
+        return self.rng.choice(self.category_ids)
+
+
+async def create_context(
+    client: httpx.AsyncClient, rng: random.Random, sellers: int, buyers: int
+) -> BenchContext:
+    """
+    Входит под пользователями из benchmarks.seed и определяет диапазоны id.
+    """
+    admin = await login(client, ADMIN_EMAIL, BENCH_PASSWORD)
+    seller_sessions = [
+        await login(client, seller_email(i), BENCH_PASSWORD) for i in range(sellers)
+    ]
+    buyer_sessions = [
+        await login(client, buyer_email(i), BENCH_PASSWORD) for i in range(buyers)
+    ]
+    newest = await client.get("/products/", params={"sort": "newest", "limit": 1})
+    newest.raise_for_status()
+    items = newest.json()["items"]
+    categories = (await client.get("/categories/")).json()
+    return BenchContext(
+        client=client,
+        rng=rng,
+        admin=admin,
+        sellers=seller_sessions,
+        buyers=buyer_sessions,
+        max_product_id=items[0]["id"] if items else 1,
+        category_ids=[category["id"] for category in categories] or [1],
+    )
+
+
+# --------------- categories -------------------------
+async def categories_list(ctx: BenchContext) -> httpx.Response:
+    return await ctx.client.get("/categories/")
+
+
+async def categories_tree(ctx: BenchContext) -> httpx.Response:
+    return await ctx.client.get("/categories/tree")
+
+
+async def categories_create(ctx: BenchContext) -> httpx.Response:
+    response = await ctx.client.post(
+        "/categories/",
+        json={"name": f"Bench {ctx.rng.random():.6f}", "parent_id": ctx.category_id()},
+        headers=ctx.admin["headers"],
+    )
+    if response.status_code == 201:
+        ctx.created_categories.append(response.json()["id"])
+    return response
+
+
+async def categories_update(ctx: BenchContext) -> httpx.Response:
+    if not ctx.created_categories:
+        return await categories_create(ctx)
+    category_id = ctx.rng.choice(ctx.created_categories)
+    return await ctx.client.put(
+        f"/categories/{category_id}",
+        json={"name": f"Bench {ctx.rng.random():.6f}", "parent_id": None},
+        headers=ctx.admin["headers"],
+    )
+
+
+async def categories_delete(ctx: BenchContext) -> httpx.Response:
+    if not ctx.created_categories:
+        return await categories_create(ctx)
+    category_id = ctx.created_categories.pop()
+    return await ctx.client.delete(
+        f"/categories/{category_id}", headers=ctx.admin["headers"]
+    )
+
+
+# --------------- products -------------------------
+async def products_list(ctx: BenchContext) -> httpx.Response:
+    params = {"limit": 20}
+    if ctx.cursors and ctx.rng.random() < 0.5:
+        params["cursor"] = ctx.cursors.pop()
+    response = await ctx.client.get("/products/", params=params)
+    cursor = response.json().get("next_cursor") if response.status_code == 200 else None
+    if cursor and len(ctx.cursors) < 1000:
+        ctx.cursors.append(cursor)
+    return response
+
+
+async def products_list_filtered(ctx: BenchContext) -> httpx.Response:
+    params = {
+        "sort": ctx.rng.choice(["price_asc", "price_desc", "rating", "newest"]),
+        "min_price": ctx.rng.choice([None, 100, 1000]),
+        "in_stock": ctx.rng.choice([False, True]),
+        "category_id": ctx.rng.choice([None, ctx.category_id()]),
+    }
+    return await ctx.client.get(
+        "/products/", params={k: v for k, v in params.items() if v is not None}
+    )
+
+
+async def products_by_category(ctx: BenchContext) -> httpx.Response:
+    return await ctx.client.get(
+        f"/products/category/{ctx.category_id()}",
+        params={"include_descendants": ctx.rng.random() < 0.5},
+    )
+
+
+async def products_search(ctx: BenchContext) -> httpx.Response:
+    return await ctx.client.get(
+        "/products/search", params={"q": ctx.rng.choice(SEARCH_WORDS)}
+    )
+
+
+async def products_detail(ctx: BenchContext) -> httpx.Response:
+    return await ctx.client.get(f"/products/{ctx.product_id()}")
+
+
+async def products_reviews(ctx: BenchContext) -> httpx.Response:
+    return await ctx.client.get(
+        f"/products/products/{ctx.product_id()}/reviews/",
+        params={"sort": ctx.rng.choice(["newest", "grade"])},
+    )
+
+
+async def products_export(ctx: BenchContext) -> httpx.Response:
+    return await ctx.client.get(
+        "/products/export", params={"format": ctx.rng.choice(["ndjson", "csv"])}
+    )
+
+
+def _product_body(ctx: BenchContext) -> dict:
+    return {
+        "name": f"Bench product {ctx.rng.random():.6f}",
+        "description": "Создан нагрузочным тестом",
+        "price": round(ctx.rng.uniform(1, 10000), 2),
+        "stock": ctx.rng.randint(0, 100),
+        "category_id": ctx.category_id(),
+    }
+
+
+async def products_create(ctx: BenchContext) -> httpx.Response:
+    seller = ctx.rng.choice(ctx.sellers)
+    response = await ctx.client.post(
+        "/products/", json=_product_body(ctx), headers=seller["headers"]
+    )
+    if response.status_code == 201:
+        ctx.created_products.append((response.json()["id"], seller))
+    return response
+
+
+async def products_bulk(ctx: BenchContext) -> httpx.Response:
+    seller = ctx.rng.choice(ctx.sellers)
+    return await ctx.client.post(
+        "/products/bulk",
+        json=[_product_body(ctx) for _ in range(100)],
+        headers=seller["headers"],
+    )
+
+
+async def products_update(ctx: BenchContext) -> httpx.Response:
+    if not ctx.created_products:
+        return await products_create(ctx)
+    product_id, seller = ctx.rng.choice(ctx.created_products)
+    return await ctx.client.put(
+        f"/products/{product_id}", json=_product_body(ctx), headers=seller["headers"]
+    )
+
+
+async def products_delete(ctx: BenchContext) -> httpx.Response:
+    if not ctx.created_products:
+        return await products_create(ctx)
+    product_id, seller = ctx.created_products.pop()
+    return await ctx.client.delete(f"/products/{product_id}", headers=seller["headers"])
+
+
+# --------------- reviews -------------------------
+async def reviews_list(ctx: BenchContext) -> httpx.Response:
+    return await ctx.client.get("/reviews/")
+
+
+async def reviews_create(ctx: BenchContext) -> httpx.Response:
+    buyer = ctx.rng.choice(ctx.buyers)
+    response = await ctx.client.post(
+        "/reviews/",
+        json={
+            "product_id": ctx.product_id(),
+            "grade": ctx.rng.randint(1, 5),
+            "comment": "Отзыв нагрузочного теста",
+        },
+        headers=buyer["headers"],
+    )
+    if response.status_code == 201:
+        ctx.created_reviews.append((response.json()["id"], buyer))
+    return response
+
+
+async def reviews_delete(ctx: BenchContext) -> httpx.Response:
+    if not ctx.created_reviews:
+        return await reviews_create(ctx)
+    review_id, buyer = ctx.created_reviews.pop()
+    return await ctx.client.delete(
+        f"/reviews/reviews/{review_id}", headers=buyer["headers"]
+    )
+
+
+# --------------- users -------------------------
+async def users_register(ctx: BenchContext) -> httpx.Response:
+    ctx.registered += 1
+    return await ctx.client.post(
+        "/users/",
+        json={
+            "email": f"bench-{ctx.rng.getrandbits(48):x}-{ctx.registered}@example.com",
+            "password": BENCH_PASSWORD,
+        },
+    )
+
+
+async def users_token(ctx: BenchContext) -> httpx.Response:
+    return await ctx.client.post(
+        "/users/token",
+        data={"username": buyer_email(0), "password": BENCH_PASSWORD},
+    )
+
+
+async def users_refresh_token(ctx: BenchContext) -> httpx.Response:
+    buyer = ctx.rng.choice(ctx.buyers)
+    return await ctx.client.post(
+        "/users/refresh-token", json={"refresh_token": buyer["refresh_token"]}
+    )
+
+
+async def users_access_token(ctx: BenchContext) -> httpx.Response:
+    buyer = ctx.rng.choice(ctx.buyers)
+    return await ctx.client.post(
+        "/users/access-token", json={"refresh_token": buyer["refresh_token"]}
+    )
+
+
+# --------------- cart, orders, reservations -------------------------
+async def cart_get(ctx: BenchContext) -> httpx.Response:
+    buyer = ctx.rng.choice(ctx.buyers)
+    return await ctx.client.get("/cart/", headers=buyer["headers"])
+
+
+async def cart_set_item(ctx: BenchContext) -> httpx.Response:
+    buyer = ctx.rng.choice(ctx.buyers)
+    return await ctx.client.put(
+        f"/cart/items/{ctx.product_id()}",
+        json={"quantity": 1},
+        headers=buyer["headers"],
+    )
+
+
+async def orders_checkout(ctx: BenchContext) -> httpx.Response:
+    buyer = ctx.rng.choice(ctx.buyers)
+    await ctx.client.put(
+        f"/cart/items/{ctx.product_id()}",
+        json={"quantity": 1},
+        headers=buyer["headers"],
+    )
+    return await ctx.client.post("/orders/", headers=buyer["headers"])
+
+
+async def orders_list(ctx: BenchContext) -> httpx.Response:
+    buyer = ctx.rng.choice(ctx.buyers)
+    return await ctx.client.get("/orders/", headers=buyer["headers"])
+
+
+async def reservations_create(ctx: BenchContext) -> httpx.Response:
+    buyer = ctx.rng.choice(ctx.buyers)
+    return await ctx.client.post(
+        "/reservations/",
+        json={"product_id": ctx.product_id(), "quantity": 1},
+        headers=buyer["headers"],
+    )
+
+
+@dataclass(frozen=True)
+class Scenario:
+    name: str
+    weight: float
+    run: Callable[[BenchContext], Awaitable[httpx.Response]]
+    # Ожидаемые коды ответа; остальные считаются ошибками
+    ok_statuses: tuple[int, ...] = (200,)
+
+
+SCENARIOS = [
+    Scenario("GET /categories/", 5, categories_list),
+    Scenario("GET /categories/tree", 3, categories_tree),
+    Scenario("POST /categories/", 0.2, categories_create, (201,)),
+    Scenario("PUT /categories/{id}", 0.2, categories_update, (200, 201)),
+    Scenario("DELETE /categories/{id}", 0.1, categories_delete, (200, 201)),
+    Scenario("GET /products/", 20, products_list),
+    Scenario("GET /products/?filters", 10, products_list_filtered),
+    Scenario("GET /products/category/{id}", 8, products_by_category, (200, 404)),
+    Scenario("GET /products/search", 5, products_search),
+    Scenario("GET /products/{id}", 25, products_detail, (200, 400, 404)),
+    Scenario("GET /products/products/{id}/reviews/", 8, products_reviews, (200, 404)),
+    Scenario("GET /products/export", 0, products_export),
+    Scenario("POST /products/", 1, products_create, (201,)),
+    Scenario("POST /products/bulk", 0.1, products_bulk),
+    Scenario("PUT /products/{id}", 0.5, products_update, (200, 201)),
+    Scenario("DELETE /products/{id}", 0.3, products_delete, (200, 201)),
+    Scenario("GET /reviews/", 3, reviews_list),
+    # 400 — покупатель уже оставил отзыв на этот товар
+    Scenario("POST /reviews/", 1, reviews_create, (201, 400)),
+    Scenario("DELETE /reviews/reviews/{id}", 0.3, reviews_delete, (200, 201, 400)),
+    Scenario("POST /users/", 0.2, users_register, (201,)),
+    Scenario("POST /users/token", 0.2, users_token),
+    Scenario("POST /users/refresh-token", 0.5, users_refresh_token),
+    Scenario("POST /users/access-token", 0.5, users_access_token),
+    # Покупки меняют остатки каталога, поэтому по умолчанию не входят в смесь
+    Scenario("GET /cart/", 0, cart_get),
+    # 404 — товар неактивен
+    Scenario("PUT /cart/items/{id}", 0, cart_set_item, (200, 404)),
+    # 409 — товара не хватает или он неактивен
+    Scenario("POST /orders/", 0, orders_checkout, (201, 409)),
+    Scenario("GET /orders/", 0, orders_list),
+    Scenario("POST /reservations/", 0, reservations_create, (201, 404, 409)),
+]
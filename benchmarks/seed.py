@@ -0,0 +1,26 @@
+# --------------- Наполнение базы для бенчмарков -------------------------
+# Запуск: python -m benchmarks.seed --products 1000000 --reviews 10000000
+# Данные создаёт app.commands.generate_data с размерами по умолчанию для
+# бенчмарков. База берётся из DATABASE_URL, схема должна быть создана
+# (alembic upgrade head).
+import asyncio
+
+from app.commands.generate_data import (ADMIN_EMAIL, GENERATED_PASSWORD,
+                                        buyer_email, main, seller_email)
+
+# Учётные данные пользователей бенчмарка
+BENCH_PASSWORD = GENERATED_PASSWORD
+
+__all__ = ["ADMIN_EMAIL", "BENCH_PASSWORD", "buyer_email", "seller_email"]
+
+
+if __name__ == "__main__":
+    asyncio.run(
+        main(
+            products=1_000_000,
+            reviews=10_000_000,
+            sellers=1000,
+            buyers=100_000,
+            batch_size=5000,
+        )
+    )
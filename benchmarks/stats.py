@@ -0,0 +1,110 @@
+# --------------- Статистика и отчёты бенчмарков -------------------------
+import json
+import math
+from collections import Counter
+
+
+def percentile(sorted_values: list[float], q: float) -> float:
+    """
+    Перцентиль q (0..100) отсортированного списка методом ближайшего ранга.
+    """
+    if not sorted_values:
+        return 0.0
+    rank = max(math.ceil(q / 100 * len(sorted_values)), 1)
+    return sorted_values[rank - 1]
+
+
+class EndpointStats:
+    """
+    Задержки и коды ответов одного эндпоинта.
+    """
+
+    def __init__(self):
+        self.latencies: list[float] = []
+        self.statuses: Counter[int] = Counter()
+        self.errors = 0
+
+    def record(self, latency: float, status: int, ok: bool) -> None:
+        self.latencies.append(latency)
+        self.statuses[status] += 1
+        if not ok:
+            self.errors += 1
+
+    def summary(self, elapsed: float) -> dict:
+        values = sorted(self.latencies)
+        return {
+            "count": len(values),
+            "errors": self.errors,
+            "rps": round(len(values) / elapsed, 2) if elapsed else 0.0,
+            "mean_ms": round(sum(values) / len(values) * 1000, 2) if values else 0.0,
+            "p50_ms": round(percentile(values, 50) * 1000, 2),
+            "p95_ms": round(percentile(values, 95) * 1000, 2),
+            "p99_ms": round(percentile(values, 99) * 1000, 2),
+            "max_ms": round(values[-1] * 1000, 2) if values else 0.0,
+            "statuses": {str(k): v for k, v in sorted(self.statuses.items())},
+        }
+
+
+def build_report(stats: dict[str, EndpointStats], elapsed: float, config: dict) -> dict:
+    """
+    Отчёт прогона: параметры, сводка по всем запросам и по каждому эндпоинту.
+    """
+    total = EndpointStats()
+    for endpoint in stats.values():
+        total.latencies.extend(endpoint.latencies)
+        total.statuses.update(endpoint.statuses)
+        total.errors += endpoint.errors
+    return {
+        "config": config,
+        "elapsed_s": round(elapsed, 2),
+        "total": total.summary(elapsed),
+        "endpoints": {
+            name: endpoint.summary(elapsed) for name, endpoint in sorted(stats.items())
+        },
+    }
+
+
+def compare_reports(
+    report: dict, baseline: dict, tolerance: float, metric: str = "p95_ms"
+) -> list[str]:
+    """
+    Сравнивает отчёт с базовым: эндпоинт считается деградировавшим, если
+    его metric вырос больше чем на tolerance (доля) или появились ошибки.
+    Эндпоинты с малым числом запросов в любом из отчётов не сравниваются.
+    """
+    regressions = []
+    for name, current in report["endpoints"].items():
+        previous = baseline.get("endpoints", {}).get(name)
+        if previous is None or min(current["count"], previous["count"]) < 20:
+            continue
+        if current[metric] > previous[metric] * (1 + tolerance):
+            regressions.append(
+                f"{name}: {metric} {previous[metric]} -> {current[metric]}"
+            )
+        if current["errors"] and not previous["errors"]:
+            regressions.append(f"{name}: {current['errors']} errors")
+    return regressions
+
+
+def print_report(report: dict) -> None:
+    """
+    Краткая таблица отчёта в stdout.
+    """
+    header = f"{'endpoint':<40} {'count':>7} {'err':>5} {'rps':>8} {'p50':>8} {'p95':>8} {'p99':>8}"
+    print(header)
+    print("-" * len(header))
+    for name, row in [*report["endpoints"].items(), ("TOTAL", report["total"])]:
+        print(
+            f"{name:<40} {row['count']:>7} {row['errors']:>5} {row['rps']:>8} "
+            f"{row['p50_ms']:>8} {row['p95_ms']:>8} {row['p99_ms']:>8}"
+        )
+
+
+def load_report(path: str) -> dict:
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_report(report: dict, path: str) -> None:
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
@@ -0,0 +1,196 @@
+# --------------- Конкурентное резервирование остатка -------------------------
+# Запуск (схема создана, alembic upgrade head):
+#   python -m benchmarks.stock --stock 100 --requests 1000 --concurrency 64
+#   python -m benchmarks.stock --stock 100 --shards 8 --concurrency 64
+# Создаёт товар с остатком stock (при --shards — с шардированным счётчиком)
+# и buyers покупателей, затем отправляет requests параллельных запросов
+# POST /reservations/ на одну единицу товара. Выводит пропускную способность
+# и задержки и проверяет, что товар не продан сверх остатка: успешных
+# резерваций ровно min(stock, requests), а остаток и сумма активных
+# резерваций сходятся. При нарушении процесс завершается с кодом 1.
+# С --base-url сервер должен работать с той же базой (DATABASE_URL).
+import argparse
+import asyncio
+import time
+import uuid
+
+from sqlalchemy import func, insert, select
+
+from app.auth import create_access_token, hash_password
+from app.database import async_engine, async_session_maker
+from app.models import Category as CategoryModel
+from app.models import Product as ProductModel
+from app.models import User as UserModel
+from app.models.stock import StockReservation as StockReservationModel
+from app.models.stock import StockShard as StockShardModel
+from app.stock import set_stock_shards
+from benchmarks.client import make_client
+from benchmarks.stats import EndpointStats
+
+
+async def create_product(stock: int, shards: int, buyers: int) -> tuple[int, list]:
+    """
+    Создаёт продавца, категорию, товар и покупателей прогона.
+    Возвращает id товара и заголовки авторизации покупателей.
+    """
+    run_id = uuid.uuid4().hex[:8]
+    password = hash_password(run_id)
+    async with async_session_maker() as session:
+        seller_id = await session.scalar(
+            insert(UserModel)
+            .values(
+                email=f"stock-seller-{run_id}@example.com",
+                hashed_password=password,
+                role="seller",
+            )
+            .returning(UserModel.id)
+        )
+        category_id = await session.scalar(
+            insert(CategoryModel)
+            .values(name=f"Stock bench {run_id}")
+            .returning(CategoryModel.id)
+        )
+        product_id = await session.scalar(
+            insert(ProductModel)
+            .values(
+                name=f"Stock bench {run_id}",
+                price=1,
+                stock=stock,
+                category_id=category_id,
+                seller_id=seller_id,
+            )
+            .returning(ProductModel.id)
+        )
+        result = await session.execute(
+            insert(UserModel).returning(UserModel.id, UserModel.email),
+            [
+                {
+                    "email": f"stock-buyer-{run_id}-{i}@example.com",
+                    "hashed_password": password,
+                    "role": "buyer",
+                }
+                for i in range(buyers)
+            ],
+        )
+        headers = [
+            {
+                "Authorization": "Bearer "
+                + create_access_token(
+                    data={"sub": email, "role": "buyer", "id": user_id}
+                )
+            }
+            for user_id, email in result
+        ]
+        if shards:
+            await set_stock_shards(session, product_id, shards)
+        await session.commit()
+    return product_id, headers
+
+
+async def read_state(product_id: int) -> tuple[int, int]:
+    """
+    Фактический остаток товара (сумма шардов у шардированного) и сумма
+    количеств его активных резерваций.
+    """
+    async with async_session_maker() as session:
+        shard_count, stock = (
+            await session.execute(
+                select(ProductModel.stock_shard_count, ProductModel.stock).where(
+                    ProductModel.id == product_id
+                )
+            )
+        ).one()
+        if shard_count:
+            stock = await session.scalar(
+                select(func.sum(StockShardModel.stock)).where(
+                    StockShardModel.product_id == product_id
+                )
+            )
+        reserved = await session.scalar(
+            select(func.coalesce(func.sum(StockReservationModel.quantity), 0)).where(
+                StockReservationModel.product_id == product_id,
+                StockReservationModel.status == "active",
+            )
+        )
+    return stock, reserved
+
+
+async def run(args: argparse.Namespace) -> bool:
+    product_id, headers = await create_product(args.stock, args.shards, args.buyers)
+    stats = EndpointStats()
+    semaphore = asyncio.Semaphore(args.concurrency)
+
+    async def reserve(client, i: int) -> None:
+        async with semaphore:
+            start = time.perf_counter()
+            try:
+                response = await client.post(
+                    "/reservations/",
+                    json={"product_id": product_id, "quantity": 1},
+                    headers=headers[i % len(headers)],
+                )
+                status = response.status_code
+            except Exception:
+                status = 0
+            stats.record(time.perf_counter() - start, status, status in (201, 409))
+
+    async with make_client(args.base_url, args.concurrency) as client:
+        started = time.perf_counter()
+        await asyncio.gather(*(reserve(client, i) for i in range(args.requests)))
+        elapsed = time.perf_counter() - started
+
+    summary = stats.summary(elapsed)
+    reserved_ok = stats.statuses[201]
+    stock, reserved = await read_state(product_id)
+    expected = min(args.stock, args.requests)
+    print(
+        f"product {product_id}: stock {args.stock}, shards {args.shards}, "
+        f"requests {args.requests}, concurrency {args.concurrency}"
+    )
+    print(
+        f"rps {summary['rps']}, p50 {summary['p50_ms']} ms, "
+        f"p95 {summary['p95_ms']} ms, p99 {summary['p99_ms']} ms"
+    )
+    print(f"statuses {summary['statuses']}")
+    print(
+        f"reserved {reserved_ok} (expected {expected}), active reservations "
+        f"{reserved}, stock left {stock}"
+    )
+
+    problems = []
+    if reserved_ok > args.stock:
+        problems.append(f"oversold by {reserved_ok - args.stock}")
+    if stats.errors:
+        problems.append(f"{stats.errors} unexpected responses")
+    if reserved != reserved_ok or stock + reserved != args.stock:
+        problems.append("stock and reservations do not add up")
+    if not stats.errors and reserved_ok != expected:
+        problems.append(f"{expected - reserved_ok} reservations lost")
+    for problem in problems:
+        print(f"  {problem}")
+    return not problems
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description="Конкурентное резервирование")
+    parser.add_argument(
+        "--base-url", help="Адрес сервера; по умолчанию ASGI в процессе"
+    )
+    parser.add_argument("--stock", type=int, default=100)
+    parser.add_argument("--shards", type=int, default=0)
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--buyers", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=64)
+    args = parser.parse_args()
+
+    try:
+        ok = await run(args)
+    finally:
+        await async_engine.dispose()
+    if not ok:
+        raise SystemExit(1)
+    print("No oversell")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,57 @@
+# --------------- Общие фикстуры тестов -------------------------
+# Тесты работают с временной базой SQLite. Переменные окружения задаются до
+# импорта приложения: движок и настройки создаются при импорте app.config и
+# app.database, а значения из .env не перекрывают уже заданные.
+import os
+import shutil
+import tempfile
+
+_TEST_DIR = tempfile.mkdtemp(prefix="ecommerce-tests-")
+os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{_TEST_DIR}/test.db"
+os.environ.pop("READ_DATABASE_URL", None)
+os.environ["CACHE_BACKEND"] = "memory"
+os.environ["JOB_QUEUE_BACKEND"] = "memory"
+os.environ["SQL_GUARD_MODE"] = "off"
+os.environ.setdefault("SECRET_KEY", "test-secret-key-with-enough-length-for-hs256")
+os.environ.setdefault("ALGORITHM", "HS256")
+# Минимальная стоимость bcrypt: входы пользователей в тестах не должны
+# занимать секунды
+os.environ["BCRYPT_ROUNDS"] = "4"
+
+import pytest  # noqa: E402
+from sqlalchemy.ext.asyncio import AsyncSession  # noqa: E402
+
+import app.main  # noqa: E402,F401  (регистрирует модели и DDL поиска SQLite)
+from app.cache import response_cache  # noqa: E402
+from app.category_tree import category_tree_cache  # noqa: E402
+from app.database import Base, async_engine, async_session_maker  # noqa: E402
+from app.principals import principal_cache  # noqa: E402
+
+
+@pytest.fixture(scope="session", autouse=True)
+async def test_database():
+    """
+    Временный каталог базы удаляется после всех тестов.
+    """
+    yield
+    await async_engine.dispose()
+    shutil.rmtree(_TEST_DIR, ignore_errors=True)
+
+
+@pytest.fixture
+async def schema() -> None:
+    """
+    Пустая схема базы и пустые кеши для каждого теста.
+    """
+    async with async_engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+    await response_cache.clear()
+    category_tree_cache.invalidate()
+    principal_cache.clear()
+
+
+@pytest.fixture
+async def db(schema) -> AsyncSession:
+    async with async_session_maker() as session:
+        yield session
@@ -0,0 +1,74 @@
+from sqlalchemy import func, select
+
+from app.bulk_import import import_products
+from app.database import async_session_maker
+from app.models import Category as CategoryModel
+from app.models import Product as ProductModel
+from app.models import User as UserModel
+from app.soft_delete import deactivate_category_subtree
+
+
+async def create_seller_and_category(db) -> tuple[int, int]:
+    seller = UserModel(email="seller@example.com", hashed_password="x", role="seller")
+    category = CategoryModel(name="Phones")
+    db.add_all([seller, category])
+    await db.commit()
+    return seller.id, category.id
+
+
+def product_rows(category_id: int, count: int) -> list[dict]:
+    return [
+        {"name": f"Product {i}", "price": 10, "stock": 1, "category_id": category_id}
+        for i in range(count)
+    ]
+
+
+async def test_import_reports_inactive_and_missing_categories(db):
+    seller_id, category_id = await create_seller_and_category(db)
+    rows = product_rows(category_id, 2) + product_rows(category_id + 100, 1)
+
+    result = await import_products(db, rows, seller_id, chunk_size=2)
+
+    assert [created["row"] for created in result["created"]] == [0, 1]
+    assert [
+        (error["row"], error["errors"][0]["type"]) for error in result["errors"]
+    ] == [(2, "category_not_found")]
+    assert result["category_counts"] == {category_id: 2}
+
+
+async def test_category_deleted_between_chunks_leaves_no_active_products(
+    db, monkeypatch
+):
+    seller_id, category_id = await create_seller_and_category(db)
+
+    # Категория удаляется параллельной транзакцией сразу после первой порции
+    commit = db.commit
+    deleted = False
+
+    async def commit_then_delete_category():
+        nonlocal deleted
+        await commit()
+        if not deleted:
+            deleted = True
+            async with async_session_maker() as other:
+                await deactivate_category_subtree(other, category_id)
+                await other.commit()
+
+    monkeypatch.setattr(db, "commit", commit_then_delete_category)
+    result = await import_products(
+        db, product_rows(category_id, 3), seller_id, chunk_size=1
+    )
+
+    assert [created["row"] for created in result["created"]] == [0]
+    assert [
+        (error["row"], error["errors"][0]["type"]) for error in result["errors"]
+    ] == [
+        (1, "category_not_found"),
+        (2, "category_not_found"),
+    ]
+    active_products = await db.scalar(
+        select(func.count())
+        .select_from(ProductModel)
+        .where(ProductModel.category_id == category_id, ProductModel.is_active == True)
+    )
+    assert active_products == 0
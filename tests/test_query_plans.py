@@ -0,0 +1,22 @@
+import argparse
+
+from app.commands.generate_data import generate
+from benchmarks.plans import build_plans, check_plans
+
+
+async def test_scenarios_have_no_full_scans(schema):
+    await generate(
+        products=5000,
+        reviews=20000,
+        sellers=5,
+        buyers=200,
+        depth=2,
+        fanout=4,
+        batch_size=1000,
+        seed_value=42,
+    )
+    args = argparse.Namespace(seed=42, repeat=3, sellers=2, buyers=5, only=[])
+    report = await build_plans(args)
+
+    problems = check_plans(report, None, tolerance=0.5, min_cost=100)
+    assert not problems, "\n".join(problems)